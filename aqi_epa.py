@@ -0,0 +1,260 @@
+"""
+    Name: aqi_epa.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Calculate the US EPA Air Quality Index from
+    OpenWeatherMap air pollution components
+    OWM gives its own 1-5 index and concentrations in µg/m³
+    The EPA AQI is the highest sub index of the pollutants:
+        1. Convert gases from µg/m³ to ppb or ppm
+        2. Truncate each concentration
+          Ozone (ppm) – truncate to 3 decimal places
+          PM2.5 (μg/m3) – truncate to 1 decimal place
+          PM10 (μg/m3) – truncate to integer
+          CO (ppm) truncate to 1 decimal place
+          SO2 (ppb) – truncate to integer
+          NO2 (ppb) – truncate to integer
+        3. Find the breakpoints around the concentration and
+           interpolate between their index values
+    Works on columns of readings at once, many locations or a
+    whole hourly forecast, with numpy if it is installed
+    Optional: pip install numpy
+    Run this file to benchmark with the bundled owm_aqi_json.json
+"""
+
+import bisect
+import math
+# Text for an AQI value
+import weather_utils
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Pollutants in the EPA AQI, OWM component names
+POLLUTANTS = ("o3", "pm2_5", "pm10", "co", "so2", "no2")
+
+# Name of each pollutant for people to read
+POLLUTANT_NAMES = {
+    "o3": "Ozone",
+    "pm2_5": "PM2.5",
+    "pm10": "PM10",
+    "co": "CO",
+    "so2": "SO2",
+    "no2": "NO2"
+}
+
+# Molecular weights to convert gases from µg/m³ to ppb
+MOLECULAR_WEIGHTS = {"o3": 48.00, "co": 28.01, "so2": 64.07, "no2": 46.01}
+# Liters in a mole of gas at 25°C and 1 atmosphere
+MOLAR_VOLUME = 24.45
+
+# ppb -> EPA units, and decimal places to truncate to
+UNITS = {
+    "o3": (0.001, 3),   # ppm
+    "pm2_5": (1, 1),    # µg/m³
+    "pm10": (1, 0),     # µg/m³
+    "co": (0.001, 1),   # ppm
+    "so2": (1, 0),      # ppb
+    "no2": (1, 0)       # ppb
+}
+
+# (concentration low, concentration high, index low, index high)
+# 2024 EPA tables, 301-500 is one category
+# Ozone uses the 8-hour breakpoints, above 0.200 ppm the EPA switches
+# to 1-hour values, OWM has one concentration so that range is 301-500
+BREAKPOINTS = {
+    "o3": ((0.000, 0.054, 0, 50), (0.055, 0.070, 51, 100),
+           (0.071, 0.085, 101, 150), (0.086, 0.105, 151, 200),
+           (0.106, 0.200, 201, 300), (0.201, 0.604, 301, 500)),
+    "pm2_5": ((0.0, 9.0, 0, 50), (9.1, 35.4, 51, 100),
+              (35.5, 55.4, 101, 150), (55.5, 125.4, 151, 200),
+              (125.5, 225.4, 201, 300), (225.5, 325.4, 301, 500)),
+    "pm10": ((0, 54, 0, 50), (55, 154, 51, 100),
+             (155, 254, 101, 150), (255, 354, 151, 200),
+             (355, 424, 201, 300), (425, 604, 301, 500)),
+    "co": ((0.0, 4.4, 0, 50), (4.5, 9.4, 51, 100),
+           (9.5, 12.4, 101, 150), (12.5, 15.4, 151, 200),
+           (15.5, 30.4, 201, 300), (30.5, 50.4, 301, 500)),
+    "so2": ((0, 35, 0, 50), (36, 75, 51, 100),
+            (76, 185, 101, 150), (186, 304, 151, 200),
+            (305, 604, 201, 300), (605, 1004, 301, 500)),
+    "no2": ((0, 53, 0, 50), (54, 100, 51, 100),
+            (101, 360, 101, 150), (361, 649, 151, 200),
+            (650, 1249, 201, 300), (1250, 2049, 301, 500))
+}
+
+# Highest AQI, concentrations above the tables are shown as 500
+MAX_AQI = 500
+
+# Breakpoint columns for one reading, and as numpy arrays for columns
+_columns = {name: tuple(zip(*table)) for name, table in BREAKPOINTS.items()}
+if numpy is not None:
+    _arrays = {
+        name: tuple(numpy.array(column, dtype=float) for column in columns)
+        for name, columns in _columns.items()
+    }
+
+
+#----------------------------- CONVERT UNITS ----------------------------------------#
+def to_epa_units(name, concentration):
+    """ One concentration in µg/m³ to the truncated EPA units """
+    factor, places = UNITS[name]
+    if name in MOLECULAR_WEIGHTS:
+        concentration = concentration * MOLAR_VOLUME / MOLECULAR_WEIGHTS[name]
+    scale = 10 ** places
+    # A tiny amount keeps 0.07 from truncating to 0.069
+    return math.floor(concentration * factor * scale + 1e-9) / scale
+
+
+def _to_epa_units_array(name, concentrations):
+    """ A numpy array of µg/m³ to truncated EPA units """
+    factor, places = UNITS[name]
+    if name in MOLECULAR_WEIGHTS:
+        factor = factor * MOLAR_VOLUME / MOLECULAR_WEIGHTS[name]
+    scale = 10 ** places
+    return numpy.floor(concentrations * (factor * scale) + 1e-9) / scale
+
+
+#----------------------------- SUB INDEX --------------------------------------------#
+def sub_index(name, concentration):
+    """ AQI of one pollutant from a concentration in µg/m³ """
+    c_low, c_high, i_low, i_high = _columns[name]
+    concentration = to_epa_units(name, concentration)
+    # First row whose high breakpoint is not below the concentration
+    row = min(bisect.bisect_left(c_high, concentration), len(c_high) - 1)
+    index = ((i_high[row] - i_low[row]) / (c_high[row] - c_low[row]) *
+             (concentration - c_low[row]) + i_low[row])
+    # The EPA rounds to the nearest integer
+    return int(min(max(math.floor(index + 0.5), 0), MAX_AQI))
+
+
+def sub_indices(name, concentrations):
+    """
+        AQI of one pollutant for a column of concentrations in µg/m³
+        Returns a numpy int array, or a list without numpy
+    """
+    if numpy is None:
+        return [sub_index(name, concentration)
+                for concentration in concentrations]
+    c_low, c_high, i_low, i_high = _arrays[name]
+    concentrations = _to_epa_units_array(
+        name, numpy.asarray(concentrations, dtype=float))
+    rows = numpy.minimum(numpy.searchsorted(c_high, concentrations),
+                         len(c_high) - 1)
+    index = ((i_high[rows] - i_low[rows]) / (c_high[rows] - c_low[rows]) *
+             (concentrations - c_low[rows]) + i_low[rows])
+    return numpy.clip(numpy.floor(index + 0.5), 0, MAX_AQI).astype(int)
+
+
+#----------------------------- US AQI -----------------------------------------------#
+def us_aqi_columns(columns):
+    """
+        US AQI for columns of readings
+        columns: dictionary of OWM component name: concentrations in µg/m³,
+        lists, array.array or numpy arrays, the same length
+        Returns (AQI values, pollutant that set each value,
+        dictionary of the sub indices of each pollutant)
+    """
+    names = [name for name in POLLUTANTS if name in columns]
+    indices = {name: sub_indices(name, columns[name]) for name in names}
+    if not names:
+        return [], [], indices
+    if numpy is None:
+        aqi = []
+        dominant = []
+        for values in zip(*(indices[name] for name in names)):
+            highest = max(range(len(names)), key=values.__getitem__)
+            aqi.append(values[highest])
+            dominant.append(names[highest])
+        return aqi, dominant, indices
+    stacked = numpy.stack([indices[name] for name in names])
+    highest = stacked.argmax(axis=0)
+    aqi = stacked[highest, numpy.arange(stacked.shape[1])]
+    dominant = numpy.array(names)[highest]
+    return aqi, dominant, indices
+
+
+def components_to_columns(readings):
+    """ A list of OWM components dictionaries as columns """
+    return {
+        name: [reading.get(name, 0.0) for reading in readings]
+        for name in POLLUTANTS
+    }
+
+
+def us_aqi(components):
+    """
+        US AQI of one reading from an OWM components dictionary
+        Returns (AQI, pollutant that set it)
+    """
+    names = [name for name in POLLUTANTS if name in components]
+    if not names:
+        return None, None
+    values = [sub_index(name, components[name]) for name in names]
+    highest = max(range(len(names)), key=values.__getitem__)
+    return values[highest], names[highest]
+
+
+def from_aqi_data(aqi_data):
+    """
+        US AQI of every reading in an OWM air pollution response
+        current, forecast or history
+        Returns a list of (dt, AQI, pollutant that set it)
+    """
+    readings = aqi_data.get("list", [])
+    if not readings:
+        return []
+    aqi, dominant, _ = us_aqi_columns(components_to_columns(
+        [reading.get("components", {}) for reading in readings]))
+    return [
+        (reading.get("dt"), int(value), str(name))
+        for reading, value, name in zip(readings, aqi, dominant)
+    ]
+
+
+def describe(aqi, pollutant):
+    """ US AQI text, 42 Good (PM2.5) """
+    if aqi is None:
+        return "None"
+    return (f"{aqi} {weather_utils.aqi_to_string(aqi)} "
+            f"({POLLUTANT_NAMES[pollutant]})")
+
+
+#----------------------------- BENCHMARK --------------------------------------------#
+def main():
+    """ Time the US AQI of many readings, one at a time and as columns """
+    import json
+    import random
+    import time
+    with open("owm_aqi_json.json", "rb") as file:
+        aqi_data = json.load(file)
+    components = aqi_data["list"][0]["components"]
+    print(f"numpy: {'installed' if numpy is not None else 'not installed'}")
+    print(f"Bundled reading: US AQI {describe(*us_aqi(components))}")
+
+    # Readings spread around the bundled one
+    random.seed(1)
+    readings = [
+        {name: value * random.uniform(0.1, 20)
+         for name, value in components.items()}
+        for _ in range(10_000)
+    ]
+    start = time.perf_counter()
+    one_at_a_time = [us_aqi(reading)[0] for reading in readings]
+    seconds = time.perf_counter() - start
+    print(f"One at a time: {len(readings)} readings in {seconds * 1000:.1f} ms")
+
+    columns = components_to_columns(readings)
+    start = time.perf_counter()
+    aqi, _, _ = us_aqi_columns(columns)
+    seconds = time.perf_counter() - start
+    print(f"As columns:    {len(readings)} readings in {seconds * 1000:.1f} ms")
+    print(f"Same values: {list(map(int, aqi)) == one_at_a_time}")
+
+
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
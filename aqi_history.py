@@ -0,0 +1,350 @@
+"""
+    Name: aqi_history.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Hourly air pollution history and forecast for AQI trends
+    Each location keeps its readings as typed array columns,
+    a time column, the OWM index and the 8 components,
+    about 41 bytes an hour instead of a dictionary for every hour
+    History is fetched incrementally, only the hours that are not
+    already stored are requested, then saved to ~/.owm_one_call/aqi
+    The forecast is shared by grid cell like the current air pollution
+    python aqi_history.py "Scottsbluff, NE, US" --hours 72
+"""
+
+import argparse
+import bisect
+import os
+import struct
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote
+# Network requests without GUI code
+import owm_fetch
+# CACHE_DIR and location_key()
+import weather_cache
+# Components in the same order as the WeatherStore aqi table
+from weather_store import AQI_COMPONENTS
+# US AQI from columns of components
+import aqi_epa
+
+# Folder for the history files
+HISTORY_DIR = os.path.join(weather_cache.CACHE_DIR, "aqi")
+
+# Readings are hourly
+HOUR = 60 * 60
+# OWM can publish an hour late, newer hours missing from a response
+# are asked for again, older ones are taken as hours without readings
+PUBLISH_DELAY = 6 * HOUR
+
+# Start of a history file, then covered range and reading counts
+MAGIC = b"OWMAQ1"
+HEADER = struct.Struct("<II")
+
+
+def _hour(unix_time):
+    """ Round a Unix time down to the hour """
+    return int(unix_time) // HOUR * HOUR
+
+
+class AqiSeries:
+    """ Hourly air pollution readings as typed array columns sorted by time """
+
+    def __init__(self):
+        # Unix time of each reading
+        self.dt = array("q")
+        # OWM 1-5 index
+        self.aqi = array("B")
+        # µg/m³ of each component, float32 is plenty for 2 decimal places
+        self.components = {name: array("f") for name in AQI_COMPONENTS}
+        # Sorted (start, end) time ranges already requested
+        # Kept apart from dt because OWM has hours without readings
+        self.covered = []
+
+    def __len__(self):
+        return len(self.dt)
+
+    @classmethod
+    def from_aqi_data(cls, aqi_data):
+        """ A series from an OWM air pollution response """
+        series = cls()
+        series.merge(aqi_data.get("list", []))
+        return series
+
+#----------------------------- ADD READINGS -----------------------------------------#
+    def _append(self, reading):
+        """ Add one OWM reading to the end of the columns """
+        components = reading.get("components", {})
+        self.dt.append(reading["dt"])
+        self.aqi.append(reading.get("main", {}).get("aqi", 0))
+        for name, column in self.components.items():
+            column.append(components.get(name, 0.0))
+
+    def merge(self, readings):
+        """
+            Add OWM readings, a new reading replaces a stored one
+            for the same hour
+        """
+        readings = sorted((reading for reading in readings if "dt" in reading),
+                          key=lambda reading: reading["dt"])
+        if not readings:
+            return
+        # Usually newer hours, add them to the end
+        if not self.dt or readings[0]["dt"] > self.dt[-1]:
+            for reading in readings:
+                self._append(reading)
+            return
+
+        # Older or overlapping hours, rebuild the columns in time order
+        rows = {
+            self.dt[i]: (self.aqi[i],) + tuple(
+                column[i] for column in self.components.values())
+            for i in range(len(self.dt))
+        }
+        for reading in readings:
+            components = reading.get("components", {})
+            rows[reading["dt"]] = (reading.get("main", {}).get("aqi", 0),) + \
+                tuple(components.get(name, 0.0) for name in AQI_COMPONENTS)
+        self.dt = array("q", sorted(rows))
+        self.aqi = array("B", (rows[dt][0] for dt in self.dt))
+        for i, name in enumerate(AQI_COMPONENTS, 1):
+            self.components[name] = array("f", (rows[dt][i] for dt in self.dt))
+
+#----------------------------- TIME RANGES ------------------------------------------#
+    def add_covered(self, start, end):
+        """ Remember that the hours from start to end were requested """
+        ranges = sorted(self.covered + [(start, end)])
+        merged = [list(ranges[0])]
+        for range_start, range_end in ranges[1:]:
+            # Touching ranges become one
+            if range_start <= merged[-1][1] + HOUR:
+                merged[-1][1] = max(merged[-1][1], range_end)
+            else:
+                merged.append([range_start, range_end])
+        self.covered = [tuple(item) for item in merged]
+
+    def missing(self, start, end):
+        """ Return the (start, end) ranges between start and end not requested yet """
+        gaps = []
+        for range_start, range_end in self.covered:
+            if range_end < start:
+                continue
+            if range_start > end:
+                break
+            if range_start > start:
+                gaps.append((start, range_start - HOUR))
+            start = max(start, range_end + HOUR)
+        if start <= end:
+            gaps.append((start, end))
+        return gaps
+
+    def columns(self, start=None, end=None):
+        """
+            Columns of the readings from start to end, both included
+            dt, aqi and each component, ready for aqi_epa.us_aqi_columns()
+        """
+        first = 0 if start is None else bisect.bisect_left(self.dt, start)
+        last = len(self.dt) if end is None else bisect.bisect_right(self.dt, end)
+        columns = {"dt": self.dt[first:last], "aqi": self.aqi[first:last]}
+        for name, column in self.components.items():
+            columns[name] = column[first:last]
+        return columns
+
+    def nbytes(self):
+        """ Bytes used by the columns """
+        return sum(column.itemsize * len(column) for column in
+                   [self.dt, self.aqi] + list(self.components.values()))
+
+#----------------------------- SAVE AND LOAD ----------------------------------------#
+    def write(self, file):
+        """ Write the covered ranges and columns to a binary file """
+        file.write(MAGIC)
+        file.write(HEADER.pack(len(self.covered), len(self.dt)))
+        array("q", [time for item in self.covered for time in item]).tofile(file)
+        self.dt.tofile(file)
+        self.aqi.tofile(file)
+        for column in self.components.values():
+            column.tofile(file)
+
+    @classmethod
+    def read(cls, file):
+        """ Read a series written by write() """
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("not an air pollution history file")
+        range_count, count = HEADER.unpack(file.read(HEADER.size))
+        series = cls()
+        ranges = array("q")
+        ranges.fromfile(file, range_count * 2)
+        series.covered = list(zip(ranges[0::2], ranges[1::2]))
+        series.dt.fromfile(file, count)
+        series.aqi.fromfile(file, count)
+        for column in series.components.values():
+            column.fromfile(file, count)
+        return series
+
+
+class AqiHistory:
+    """ Air pollution history of many locations, thread safe """
+
+    def __init__(self, folder=HISTORY_DIR):
+        self.folder = folder
+        self.lock = threading.Lock()
+        # location key -> AqiSeries, loaded when first used
+        self.series = {}
+        # location key -> Lock, one update at a time for each location
+        self.locks = {}
+
+    def _file_name(self, key):
+        """ History file of a location """
+        return os.path.join(self.folder, quote(key, safe="") + ".aqi")
+
+    def _location(self, location):
+        """ Return the (series, lock) of a location, load the file once """
+        key = weather_cache.location_key(location)
+        with self.lock:
+            if key not in self.series:
+                self.locks[key] = threading.Lock()
+                try:
+                    with open(self._file_name(key), "rb") as file:
+                        self.series[key] = AqiSeries.read(file)
+                except (OSError, ValueError, EOFError):
+                    # Missing or damaged, start again
+                    self.series[key] = AqiSeries()
+            return self.series[key], self.locks[key]
+
+    def _save(self, location, series):
+        """ Write a series, readers never see half a file """
+        os.makedirs(self.folder, exist_ok=True)
+        file_name = self._file_name(weather_cache.location_key(location))
+        with open(file_name + ".tmp", "wb") as file:
+            series.write(file)
+        os.replace(file_name + ".tmp", file_name)
+
+#----------------------------- HISTORY ----------------------------------------------#
+    def history(self, location):
+        """ The stored AqiSeries of a location """
+        return self._location(location)[0]
+
+    def update(self, location, latitude, longitude, hours=24, now=None):
+        """
+            Make sure the last hours of history are stored
+            Only the hours not requested before are fetched
+            Returns the number of requests made
+        """
+        series, lock = self._location(location)
+        hour = _hour(time.time() if now is None else now)
+        # The last complete hour
+        end = hour - HOUR
+        start = end - hours * HOUR
+        requests = 0
+        with lock:
+            for gap_start, gap_end in series.missing(start, end):
+                aqi_data = owm_fetch.get_air_quality_history(
+                    latitude, longitude, gap_start, gap_end)
+                readings = aqi_data.get("list", [])
+                series.merge(readings)
+                # Covered up to the last hour that came back, hours
+                # after it may not be published yet
+                returned = [reading["dt"] for reading in readings
+                            if gap_start <= reading.get("dt", -1) <= gap_end]
+                covered_end = min(gap_end, max(returned + [hour - PUBLISH_DELAY]))
+                if covered_end >= gap_start:
+                    series.add_covered(gap_start, covered_end)
+                requests += 1
+            if requests:
+                self._save(location, series)
+        return requests
+
+    def update_many(self, locations, hours=24, workers=8):
+        """
+            Update the history of (location, latitude, longitude)
+            Yields (location, requests made, error) as each one finishes
+        """
+        with ThreadPoolExecutor(workers, thread_name_prefix="owm_aqi") as pool:
+            futures = {
+                pool.submit(self.update, location, latitude, longitude,
+                            hours): location
+                for location, latitude, longitude in locations
+            }
+            for future in as_completed(futures):
+                if future.exception() is None:
+                    yield futures[future], future.result(), None
+                else:
+                    yield futures[future], 0, future.exception()
+
+#----------------------------- FORECAST ---------------------------------------------#
+    def forecast(self, latitude, longitude, max_age=None):
+        """ The hourly air pollution forecast as an AqiSeries """
+        return AqiSeries.from_aqi_data(
+            owm_fetch.get_air_quality_forecast_for_cell(
+                latitude, longitude, max_age))
+
+#----------------------------- TREND ------------------------------------------------#
+    def trend(self, location, hours=24, now=None):
+        """
+            US AQI over the last hours of stored history
+            Returns a dictionary of readings, lowest, average, highest
+            and latest, None if nothing is stored
+        """
+        end = _hour(time.time() if now is None else now)
+        return us_aqi_summary(
+            self.history(location).columns(end - hours * HOUR, end))
+
+
+def us_aqi_summary(columns):
+    """ Lowest, average, highest and latest US AQI of series columns """
+    if not len(columns["dt"]):
+        return None
+    aqi, pollutants, _ = aqi_epa.us_aqi_columns(columns)
+    values = [int(value) for value in aqi]
+    return {
+        "readings": len(values),
+        "lowest": min(values),
+        "average": round(sum(values) / len(values)),
+        "highest": max(values),
+        "latest": values[-1],
+        "latest_pollutant": str(pollutants[-1])
+    }
+
+
+#----------------------------- COMMAND LINE -----------------------------------------#
+def get_arguments():
+    parser = argparse.ArgumentParser(
+        description="Air pollution history and forecast for a location")
+    parser.add_argument("location", help="city, state, country")
+    parser.add_argument(
+        "--hours", type=int, default=24,
+        help="hours of history to keep up to date (default 24)")
+    return parser.parse_args()
+
+
+def main():
+    arguments = get_arguments()
+    latitude, longitude = owm_fetch.get_coordinates(arguments.location)
+    aqi_history = AqiHistory()
+
+    requests = aqi_history.update(
+        arguments.location, latitude, longitude, arguments.hours)
+    series = aqi_history.history(arguments.location)
+    print(f"{arguments.location}: {requests} history requests, "
+          f"{len(series)} hours stored in {series.nbytes():,} bytes")
+    summary = aqi_history.trend(arguments.location, arguments.hours)
+    if summary:
+        print(f"Last {arguments.hours} hours US AQI: lowest {summary['lowest']}, "
+              f"average {summary['average']}, highest {summary['highest']}, "
+              f"latest {aqi_epa.describe(summary['latest'], summary['latest_pollutant'])}")
+
+    forecast = aqi_history.forecast(latitude, longitude)
+    summary = us_aqi_summary(forecast.columns())
+    if summary:
+        print(f"Forecast {summary['readings']} hours US AQI: "
+              f"lowest {summary['lowest']}, average {summary['average']}, "
+              f"highest {summary['highest']}")
+
+
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
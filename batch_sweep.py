@@ -0,0 +1,408 @@
+"""
+    Name: batch_sweep.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Fetch weather for many locations without the GUI
+    The locations file has one location per line
+    Add a tab, latitude, tab, longitude to skip looking up a location
+        Scottsbluff, NE, US
+        Store 12<tab>41.8666<tab>-103.6672
+    Nearby locations share One Call and AQI requests by grid cell
+    python batch_sweep.py locations.txt --resolution 0.02
+    Add --store history.sqlite3 to append every result to a WeatherStore
+    Add --metrics metrics.json to write stage timings and counters
+    every --metrics-interval seconds, or --metrics-port 9100 to serve
+    them for Prometheus at http://127.0.0.1:9100/metrics
+    Add --profile folder (or set OWM_PROFILE) for cProfile and trace files
+    Add --processes 0 to parse and format in one process per core,
+    threads only fetch JSON bytes and work is sent in --chunk sized chunks
+    Text comes from weather_format, the same as the GUI shows
+    Add --fetch current to download only current conditions,
+    the bytes received for each endpoint are in the metrics
+    Add --aqi-history 72 to keep 72 hours of air pollution history for
+    every location, only hours not already stored are requested
+    Add --export exports/sweep to write CSV files as locations complete,
+    --export-format parquet or arrow for columnar files (pip install pyarrow)
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, as_completed, wait)
+# Network requests without GUI code
+import owm_fetch
+from fetch_pool import FetchPool
+import weather_utils
+import weather_store
+from weather_store import WeatherStore
+# Text shown by the GUI
+import weather_format
+import weather_units
+import json_codec
+import json_projection
+# Stage timings and counters
+import weather_metrics
+# cProfile and Chrome trace files
+import weather_profile
+# Incremental air pollution history
+from aqi_history import AqiHistory
+# CSV, Parquet and Arrow files
+import weather_export
+
+
+#----------------------------- READ LOCATIONS ---------------------------------------#
+def read_locations(file_name):
+    """ Return a list of (location, latitude, longitude) from a file """
+    locations = []
+    with open(file_name, encoding="utf-8") as file:
+        for line in file:
+            parts = line.rstrip("\n").split("\t")
+            if not parts[0].strip():
+                continue
+            if len(parts) >= 3:
+                locations.append(
+                    (parts[0].strip(), float(parts[1]), float(parts[2])))
+            else:
+                locations.append((parts[0].strip(), None, None))
+    return locations
+
+
+#----------------------------- COMPACT RESULTS --------------------------------------#
+def compact_result(location, latitude, longitude, weather_data, aqi_data,
+                   address=None, with_rows=False,
+                   units=weather_units.CANONICAL):
+    """
+        The text the GUI would show for a location in imperial or
+        metric units, and the WeatherStore rows if with_rows is True
+    """
+    compact = {
+        "location": location,
+        "latitude": latitude,
+        "longitude": longitude,
+        "formatted": weather_format.format_result(
+            weather_data, aqi_data, units)
+    }
+    if with_rows:
+        compact["rows"] = weather_store.result_rows({
+            "location": location,
+            "latitude": latitude,
+            "longitude": longitude,
+            "address": address,
+            "weather_data": weather_data,
+            "aqi_data": aqi_data
+        })
+    return compact
+
+
+def process_payloads(payloads, with_rows, units=weather_units.CANONICAL,
+                     profile="full"):
+    """
+        Runs in a worker process
+        Parse and format a chunk of (location, latitude, longitude,
+        address, one call bytes, air quality bytes), one compact result each
+    """
+    compacts = []
+    for (location, latitude, longitude, address, one_call_bytes,
+         aqi_bytes) in payloads:
+        try:
+            weather_data = owm_fetch.apply_profile(
+                json_projection.loads_projected(
+                    one_call_bytes, weather_utils.ONE_CALL_FIELDS), profile)
+            aqi_data = json_codec.loads(aqi_bytes)
+            compacts.append(compact_result(
+                location, latitude, longitude, weather_data, aqi_data,
+                address, with_rows=with_rows, units=units))
+        except Exception as e:
+            # One bad payload does not lose the rest of the chunk
+            compacts.append({"location": location, "error": f"{e}"})
+    return compacts
+
+
+def fetch_payload(location, latitude, longitude, profile="full"):
+    """
+        Runs in a fetch thread
+        JSON bytes and address for one location,
+        nearby locations share requests
+    """
+    if latitude is None or longitude is None:
+        latitude, longitude = owm_fetch.get_coordinates(location)
+    # Offline from the place tree, the same address the threads store
+    address = owm_fetch.get_address(latitude, longitude)
+    one_call_bytes = owm_fetch.cells.get(
+        f"one_call_bytes_{profile}", latitude, longitude,
+        lambda latitude, longitude: owm_fetch.get_one_call_bytes(
+            latitude, longitude, profile))
+    aqi_bytes = owm_fetch.cells.get(
+        "air_quality_bytes", latitude, longitude,
+        owm_fetch.get_air_quality_bytes)
+    return (location, latitude, longitude, address, one_call_bytes,
+            aqi_bytes)
+
+
+#----------------------------- SWEEP WITH PROCESSES ---------------------------------#
+# Memory for the JSON bytes of the grid cells shared by nearby locations
+PAYLOAD_MEMORY = 32 * 1024 * 1024
+
+
+def sweep_processes(locations, workers=8, processes=0, chunk_size=16,
+                    with_rows=False, units=weather_units.CANONICAL,
+                    profile="full"):
+    """
+        Fetch JSON bytes in threads, parse and format in processes
+        Only a few chunks are waiting at a time and owm_fetch.cells keeps
+        at most PAYLOAD_MEMORY of JSON bytes, so memory stays bounded
+        however many locations there are
+        Yields (location, compact result, error) as each chunk finishes
+    """
+    processes = processes or os.cpu_count()
+    # Keep only the most recent grid cells of JSON bytes
+    max_bytes = owm_fetch.cells.max_bytes
+    owm_fetch.cells.max_bytes = PAYLOAD_MEMORY
+    try:
+        location_iter = iter(locations)
+        more_locations = True
+        # Future -> location for fetches in progress
+        fetches = {}
+        # Futures for chunks in the process pool
+        chunks = set()
+        chunk = []
+        with ThreadPoolExecutor(workers, thread_name_prefix="owm_fetch") as threads, \
+                ProcessPoolExecutor(processes) as process_pool:
+            while True:
+                # Stop fetching while the processes are behind
+                while (more_locations and len(fetches) < workers * 2 and
+                       len(chunks) < processes * 2):
+                    item = next(location_iter, None)
+                    if item is None:
+                        more_locations = False
+                        break
+                    future = threads.submit(
+                        weather_profile.profiled(fetch_payload), *item, profile)
+                    fetches[future] = item[0]
+
+                # Send a full chunk, or what is left at the end
+                if chunk and (len(chunk) >= chunk_size or
+                              (not more_locations and not fetches)):
+                    chunks.add(process_pool.submit(
+                        process_payloads, chunk, with_rows, units, profile))
+                    chunk = []
+                if not fetches and not chunks:
+                    break
+
+                done, _ = wait(set(fetches) | chunks, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in chunks:
+                        chunks.remove(future)
+                        for compact in future.result():
+                            yield compact["location"], compact, compact.get("error")
+                        continue
+                    location = fetches.pop(future)
+                    if future.exception() is None:
+                        chunk.append(future.result())
+                    else:
+                        yield location, None, future.exception()
+    finally:
+        owm_fetch.cells.max_bytes = max_bytes
+
+
+#----------------------------- SWEEP ------------------------------------------------#
+def sweep(locations, workers=8, profile="full"):
+    """
+        Fetch every location in a shared pool
+        Yields (location, result, error) as each location finishes
+    """
+    fetch_pool = FetchPool(max_workers=workers, profile=profile)
+    futures = {}
+    for location, latitude, longitude in locations:
+        future = fetch_pool.fetch(location, None, latitude, longitude)
+        futures[future] = location
+    try:
+        for future in as_completed(futures):
+            if future.exception() is None:
+                yield futures[future], future.result(), None
+            else:
+                yield futures[future], None, future.exception()
+    finally:
+        fetch_pool.shutdown()
+
+
+#----------------------------- COMMAND LINE ARGUMENTS -------------------------------#
+def get_arguments():
+    parser = argparse.ArgumentParser(
+        description="Fetch weather for many locations")
+    parser.add_argument("locations", help="file with one location per line")
+    parser.add_argument(
+        "--workers", type=int, default=8,
+        help="locations fetched at the same time (default 8)")
+    parser.add_argument(
+        "--resolution", type=float, default=weather_utils.GRID_RESOLUTION,
+        help="grid cell size in degrees shared by nearby locations, "
+             f"0 turns sharing off (default {weather_utils.GRID_RESOLUTION})")
+    parser.add_argument(
+        "--store", metavar="FILE",
+        help="append every result to this SQLite history database")
+    parser.add_argument(
+        "--batch", type=int, default=500,
+        help="results written to the store at a time (default 500)")
+    parser.add_argument(
+        "--metrics", metavar="FILE",
+        help="write stage timings and counters to this JSON file")
+    parser.add_argument(
+        "--metrics-interval", type=float, default=10,
+        help="seconds between metrics files (default 10)")
+    parser.add_argument(
+        "--metrics-port", type=int,
+        help="serve Prometheus metrics on this port")
+    parser.add_argument(
+        "--profile", nargs="?", const=weather_profile.DEFAULT_FOLDER,
+        metavar="FOLDER",
+        help="write cProfile and Chrome trace files for this sweep")
+    parser.add_argument(
+        "--processes", type=int,
+        help="parse and format in this many processes, 0 for one per core")
+    parser.add_argument(
+        "--chunk", type=int, default=16,
+        help="locations sent to a process at a time (default 16)")
+    parser.add_argument(
+        "--units", choices=weather_units.SYSTEMS,
+        default=weather_units.CANONICAL,
+        help="units of the text, converted locally (default imperial)")
+    parser.add_argument(
+        "--fetch", choices=tuple(owm_fetch.FETCH_PROFILES), default="full",
+        help="how much One Call forecast to download, current saves the "
+             "most bytes (default full)")
+    parser.add_argument(
+        "--aqi-history", type=int, metavar="HOURS",
+        help="keep this many hours of air pollution history for every location")
+    parser.add_argument(
+        "--export", metavar="PREFIX",
+        help="export every table to PREFIX_current.csv and so on")
+    parser.add_argument(
+        "--export-format", choices=tuple(weather_export.FORMATS), default="csv",
+        help="csv, or parquet and arrow with pyarrow installed (default csv)")
+    return parser.parse_args()
+
+
+def main():
+    arguments = get_arguments()
+    if arguments.profile:
+        weather_profile.start(arguments.profile)
+    else:
+        weather_profile.start_from_environment()
+    owm_fetch.cells.resolution = arguments.resolution
+    # Only the most recent grid cells, however many locations there are
+    owm_fetch.cells.max_bytes = PAYLOAD_MEMORY
+    locations = read_locations(arguments.locations)
+
+    if arguments.metrics:
+        stop_metrics = weather_metrics.dump_json_every(
+            arguments.metrics, arguments.metrics_interval)
+    if arguments.metrics_port:
+        weather_metrics.serve_prometheus(arguments.metrics_port)
+
+    store = WeatherStore(arguments.store) if arguments.store else None
+    exporter = None
+    if arguments.export:
+        try:
+            exporter = weather_export.open_exporter(
+                arguments.export, arguments.export_format)
+        except ImportError as e:
+            raise SystemExit(f"{e}")
+    # Table rows are only built if something writes them
+    with_rows = store is not None or exporter is not None
+    # Rows waiting to be written to the store in one batch
+    pending = weather_store.empty_rows()
+    pending_count = 0
+
+    if arguments.processes is not None:
+        results = sweep_processes(
+            locations, arguments.workers, arguments.processes,
+            arguments.chunk, with_rows=with_rows,
+            units=arguments.units, profile=arguments.fetch)
+    else:
+        results = (
+            (location, None if result is None else compact_result(
+                location, result["latitude"], result["longitude"],
+                result["weather_data"], result["aqi_data"],
+                result["address"], with_rows=with_rows,
+                units=arguments.units), error)
+            for location, result, error in sweep(
+                locations, arguments.workers, arguments.fetch))
+
+    start = time.perf_counter()
+    failed = 0
+    # Coordinates of every location that worked, for the AQI history
+    found = []
+    for location, compact, error in results:
+        if error is not None:
+            failed += 1
+            print(f"{location}: failed, {error}")
+            continue
+        if store is not None:
+            for table, rows in compact["rows"].items():
+                pending[table].extend(rows)
+            pending_count += 1
+            if pending_count >= arguments.batch:
+                with weather_metrics.span("store"):
+                    store.add_rows(pending)
+                pending = weather_store.empty_rows()
+                pending_count = 0
+        if exporter is not None:
+            with weather_metrics.span("export"):
+                exporter.write_rows(compact["rows"])
+        found.append((location, compact["latitude"], compact["longitude"]))
+        current = compact["formatted"]["current"]
+        air_quality = compact["formatted"]["air_quality"]
+        print(f"{location}: {current['temperature']} "
+              f"{current['description']}, AQI {air_quality['aqi']}, "
+              f"{compact['formatted']['us_aqi']}")
+
+    if store is not None:
+        with weather_metrics.span("store"):
+            store.add_rows(pending)
+        store.close()
+    if exporter is not None:
+        with weather_metrics.span("export"):
+            exporter.close()
+
+    if arguments.aqi_history:
+        aqi_history = AqiHistory()
+        requests = 0
+        for location, made, error in aqi_history.update_many(
+                found, arguments.aqi_history, arguments.workers):
+            if error is not None:
+                print(f"{location}: AQI history failed, {error}")
+                continue
+            requests += made
+            summary = aqi_history.trend(location, arguments.aqi_history)
+            if summary:
+                print(f"{location}: US AQI last {arguments.aqi_history} hours "
+                      f"lowest {summary['lowest']}, average {summary['average']}, "
+                      f"highest {summary['highest']}")
+        print(f"{requests} AQI history requests")
+    if arguments.metrics:
+        stop_metrics.set()
+        weather_metrics.dump_json(arguments.metrics)
+
+    seconds = time.perf_counter() - start
+    stats = owm_fetch.cells.stats()
+    print(f"{len(locations)} locations, {failed} failed, {seconds:.1f} seconds")
+    print(f"{stats['requests']} requests for {stats['cells']} cells and icons, "
+          f"{stats['shared']} requests saved by sharing")
+    received = decoded = 0
+    for counter in weather_metrics.snapshot()["counters"]:
+        if counter["name"] == "response_bytes":
+            received += counter["value"]
+        elif counter["name"] == "decoded_bytes":
+            decoded += counter["value"]
+    print(f"{received:,} bytes received, {decoded:,} bytes decompressed")
+    files = weather_profile.stop()
+    if files:
+        print(f"Profile: {files[0]}\nTrace: {files[1]}")
+
+
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
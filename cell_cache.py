@@ -0,0 +1,175 @@
+"""
+    Name: cell_cache.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Share one request between locations in the same grid cell
+    Latitude and longitude are rounded to a grid, every location in
+    a cell is served by one request made for the center of the cell
+    Thread safe, a second thread waits for the request already running
+    Results older than their max_age and failed requests are dropped,
+    the least recently used are dropped past max_entries or max_bytes
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+import weather_utils
+# measure() the memory of a result
+import location_store
+# Count shared and new requests
+import weather_metrics
+
+# Most results kept, a long running program does not grow past it
+MAX_ENTRIES = 1024
+
+
+class CellCache:
+    def __init__(self, resolution=weather_utils.GRID_RESOLUTION, max_age=600,
+                 max_entries=MAX_ENTRIES, max_bytes=None):
+        """
+            resolution: size of a grid cell in degrees, 0 for exact coordinates
+            max_age: seconds a result is shared before requesting again
+            max_entries: most results kept, least recently used dropped first
+            max_bytes: memory budget for the results, None for no budget
+        """
+        self.resolution = resolution
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # (fetched time, Future, max_age, bytes) for each key,
+        # least recent first, bytes is 0 until the result arrives
+        self.entries = OrderedDict()
+        self.bytes = 0
+        # Requests made and requests served from another request
+        self.misses = 0
+        self.hits = 0
+
+#----------------------------- GRID CELLS -------------------------------------------#
+    def cell(self, latitude, longitude):
+        """ Return the (row, column) grid cell for a location """
+        if not self.resolution:
+            return latitude, longitude
+        return (round(latitude / self.resolution),
+                round(longitude / self.resolution))
+
+    def center(self, cell):
+        """ Return the latitude and longitude of the center of a cell """
+        if not self.resolution:
+            return cell
+        row, column = cell
+        return (round(row * self.resolution, 4),
+                round(column * self.resolution, 4))
+
+#----------------------------- GET --------------------------------------------------#
+    def get(self, kind, latitude, longitude, function, max_age=None,
+            timed=False):
+        """
+            Return function(latitude, longitude) for the center of the cell
+            kind keeps different requests for the same cell apart
+        """
+        cell = self.cell(latitude, longitude)
+        return self.run((kind, cell), function, *self.center(cell),
+                        max_age=max_age, timed=timed)
+
+    def run(self, key, function, *args, max_age=None, timed=False):
+        """
+            Return function(*args), calling it once for every key
+            until the result is older than max_age
+            timed returns (result, Unix time it was requested) instead,
+            a shared result can be up to max_age old
+            The first item of key names the cache in the metrics
+        """
+        if max_age is None:
+            max_age = self.max_age
+        with self.lock:
+            entry = self.entries.get(key)
+            owner = True
+            if entry is not None:
+                fetched, future, _, _ = entry
+                # Wait for a request in progress, reuse a fresh result
+                if not future.done() or (future.exception() is None and
+                                         time.time() - fetched < max_age):
+                    owner = False
+            if owner:
+                future = Future()
+                if entry is not None:
+                    self._remove(key)
+                fetched = time.time()
+                self.entries[key] = (fetched, future, max_age, 0)
+                self.misses += 1
+                self._prune()
+            else:
+                self.hits += 1
+            # Most recently used goes to the end
+            self.entries.move_to_end(key)
+        weather_metrics.count("cache", cache=key[0],
+                              result="miss" if owner else "hit")
+
+        if owner:
+            # Make the request outside the lock, other keys keep going
+            try:
+                result = function(*args)
+                future.set_result(result)
+            except Exception as e:
+                future.set_exception(e)
+                # Threads waiting have the future, the next call retries
+                with self.lock:
+                    if self._owns(key, future):
+                        self._remove(key)
+            else:
+                size = 0 if self.max_bytes is None else \
+                    location_store.measure(result)
+                with self.lock:
+                    if self._owns(key, future):
+                        fetched, _, max_age, _ = self.entries[key]
+                        self.entries[key] = (fetched, future, max_age, size)
+                        self.bytes += size
+                        self._prune()
+        if timed:
+            return future.result(), fetched
+        return future.result()
+
+#----------------------------- EVICT ------------------------------------------------#
+    def _owns(self, key, future):
+        """ True if future is still the entry of key, the lock is held """
+        entry = self.entries.get(key)
+        return entry is not None and entry[1] is future
+
+    def _remove(self, key):
+        """ Remove an entry, the lock is held """
+        self.bytes -= self.entries.pop(key)[3]
+
+    def _prune(self):
+        """ Drop old and least recently used results, the lock is held """
+        now = time.time()
+        for key in [key for key, (fetched, future, max_age, _)
+                    in self.entries.items()
+                    if future.done() and now - fetched >= max_age]:
+            self._remove(key)
+        while len(self.entries) > self.max_entries or (
+                self.max_bytes is not None and self.bytes > self.max_bytes):
+            self._remove(next(iter(self.entries)))
+
+    def prune(self):
+        """ Drop results older than their max_age, for long running callers """
+        with self.lock:
+            self._prune()
+
+    def clear(self):
+        """ Drop every result """
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """ Return a dictionary of requests made and shared """
+        with self.lock:
+            return {
+                "cells": len(self.entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "requests": self.misses,
+                "shared": self.hits
+            }
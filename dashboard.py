@@ -0,0 +1,191 @@
+"""
+    Name: dashboard.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Show the weather for several locations in one window
+    Each location card is the main window panel from QT Designer
+    All cards share one FetchPool of worker threads and its cache
+    python one_call_qt.py --dashboard "Scottsbluff, NE, US" "Denver, CO, US"
+"""
+
+import math
+from PySide6 import QtCore
+from PySide6 import QtGui
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (QApplication, QGridLayout, QMainWindow, QMenu,
+                               QScrollArea, QWidget)
+# Import gui py file created by QT Designer
+from main_ui import Ui_MainWindow
+# Import controller class
+from one_call_class import OneCall
+from fetch_pool import FetchPool
+import owm_fetch
+import weather_cache
+import weather_store
+import weather_units
+
+# Minutes between automatic refreshes of every card
+REFRESH_MINUTES = 10
+
+
+#----------------------- LOCATION CARD ---------------------------#
+class location_card(QMainWindow, Ui_MainWindow):
+    """
+        One location, laid out like the main window
+        OneCall displays weather on the card just like on the main window
+    """
+
+    def __init__(self, location, dashboard, parent=None):
+        super().__init__(parent)
+        # Create the GUI
+        self.setupUi(self)
+        # Embed in the dashboard instead of being a separate window
+        self.setWindowFlags(Qt.Widget)
+        self.setFixedSize(self.size())
+        self.location = location
+        self.dashboard = dashboard
+        # Create weather object with a reference to the card
+        self.weather_class = OneCall(self)
+
+        # The location is fixed, the button refreshes it
+        self.lineEdit.setText(location)
+        self.lineEdit.setReadOnly(True)
+        self.btn_get_weather.setText("Refresh")
+        self.btn_get_weather.clicked.connect(
+            lambda: self.dashboard.refresh_card(self, max_age=0))
+        # Forecast dialogs and exit belong to the single location window
+        self.btn_exit.hide()
+        self.btn_12_hour_forecast.hide()
+        self.btn_48_hour_forecast.hide()
+        self.btn_7_day_forecast.hide()
+        self.status_bar.hide()
+
+    def set_input(self):
+        """ OneCall calls set_input after an error, nothing to select """
+        self.progress_bar.setValue(0)
+
+    def show_result(self, result):
+        """ Display a result from the fetch pool on the card """
+        self.weather_class.load_result(result)
+        self.weather_class.draw_weather_arrow()
+        self.weather_class.display_weather()
+        self.progress_bar.setValue(100)
+
+    def show_error(self, error):
+        """ Keep the last weather, show the error under the location """
+        self.lbl_reverse_geocode.setText(f"Update failed: {error}")
+        self.progress_bar.setValue(0)
+
+
+#----------------------- DASHBOARD WINDOW ---------------------------#
+class dashboard_window(QMainWindow):
+    """ Grid of location cards fed by one shared FetchPool """
+    # Fetch results are sent from worker threads to the GUI thread
+    result_ready = QtCore.Signal(object, object)
+    failed = QtCore.Signal(object, str)
+
+    def __init__(self, locations, fetch_pool=None,
+                 units=weather_units.CANONICAL):
+        super().__init__()
+        self.setWindowTitle("OpenWeatherMap Dashboard")
+        # Cards only show current conditions, skip the forecasts
+        self.fetch_pool = fetch_pool or FetchPool(profile="current")
+        self.result_ready.connect(self.card_result)
+        self.failed.connect(lambda card, error: card.show_error(error))
+        # Keep a history of every result, the dashboard works without it
+        try:
+            self.store = weather_store.WeatherStore()
+        except Exception:
+            self.store = None
+
+        # Lay the cards out in a grid as close to square as possible
+        grid_widget = QWidget()
+        grid = QGridLayout(grid_widget)
+        columns = math.ceil(math.sqrt(len(locations)))
+        self.cards = []
+        for index, location in enumerate(locations):
+            card = location_card(location, self, grid_widget)
+            card.weather_class.units = units
+            grid.addWidget(card, index // columns, index % columns)
+            self.cards.append(card)
+        scroll_area = QScrollArea()
+        scroll_area.setWidget(grid_widget)
+        self.setCentralWidget(scroll_area)
+        # Fit all the cards if the screen is big enough
+        screen = QApplication.primaryScreen().availableGeometry()
+        size = grid_widget.sizeHint()
+        self.resize(min(size.width() + 20, screen.width()),
+                    min(size.height() + 20, screen.height()))
+
+        # Every card switches units at once, nothing is fetched again
+        self.action_metric = QtGui.QAction("Metric Units", self)
+        self.action_metric.setCheckable(True)
+        self.action_metric.setChecked(units == "metric")
+        self.action_metric.setShortcut("Ctrl+M")
+        self.action_metric.toggled.connect(self.set_metric)
+        self.addAction(self.action_metric)
+        # Right click menu, made once and reused
+        self.context_menu = QMenu(self)
+        self.context_menu.addAction(self.action_metric)
+
+        # Show saved weather right away, then fetch fresh weather
+        for card in self.cards:
+            result = weather_cache.load_result(card.location)
+            if result is not None:
+                try:
+                    card.show_result(result)
+                except Exception:
+                    pass
+        self.refresh()
+
+        # Refresh every card on a timer
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(REFRESH_MINUTES * 60 * 1000)
+
+#--------------------- REFRESH -------------------#
+    def refresh(self):
+        """ Fetch every card, cached results are reused by the pool """
+        for card in self.cards:
+            self.refresh_card(card)
+
+    def refresh_card(self, card, max_age=None):
+        """ Fetch one card in the shared pool """
+        card.progress_bar.setValue(33)
+        future = self.fetch_pool.fetch(card.location, max_age)
+        future.add_done_callback(lambda done: self.fetch_done(card, done))
+
+    def fetch_done(self, card, future):
+        """ Runs in a worker thread, hand the result to the GUI thread """
+        if future.exception() is None:
+            self.result_ready.emit(card, future.result())
+        else:
+            self.failed.emit(card, f"{future.exception()}")
+
+    def card_result(self, card, result):
+        """ Display a result on its card and save it """
+        card.show_result(result)
+        try:
+            # Cards fetch current only, the main window warm starts
+            # from saved results and needs the forecasts
+            if owm_fetch.covers(result, "full"):
+                weather_cache.save_result(result)
+            if self.store is not None:
+                self.store.add_results([result])
+        except Exception:
+            pass
+
+    def set_metric(self, metric):
+        """ Display metric or imperial units on every card """
+        for card in self.cards:
+            card.weather_class.set_units("metric" if metric else "imperial")
+
+    def contextMenuEvent(self, event):
+        """ Right click menu with the units switch """
+        self.context_menu.exec(event.globalPos())
+
+    def closeEvent(self, event):
+        """ Override the closeEvent, stop the fetch pool """
+        self.timer.stop()
+        self.fetch_pool.shutdown(wait=False)
+        event.accept()
@@ -0,0 +1,120 @@
+"""
+    Name: fetch_pool.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Shared pool of worker threads that fetch weather
+    Results are cached by location and a location that is
+    already being fetched is not requested a second time
+    owm_fetch.cells has a budget of its own, set by the program's main()
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+# Network requests without GUI code
+import owm_fetch
+# location_key() to match location names
+import weather_cache
+# Count cache hits and shared requests
+import weather_metrics
+# Profile the worker threads when profiling is on
+import weather_profile
+# Results kept within a memory budget
+import location_store
+from location_store import LocationStore
+
+
+class FetchPool:
+    def __init__(self, max_workers=8, max_age=600, profile="full",
+                 function=owm_fetch.fetch_weather,
+                 max_bytes=location_store.MAX_BYTES):
+        """
+            max_workers: number of locations fetched at the same time
+            max_age: seconds a cached result is used before refetching
+            profile: One Call fetch profile, see owm_fetch.FETCH_PROFILES
+            function: fetches one location, owm_fetch.fetch_weather()
+            max_bytes: memory budget for the cached results
+        """
+        self.max_age = max_age
+        self.profile = profile
+        self.function = function
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="owm_fetch"
+        )
+        # Lock for pending, callbacks run in worker threads
+        self.lock = threading.Lock()
+        # Latest result for each location, dropped when stale or over budget
+        self.cache = LocationStore(max_bytes, max_age)
+        # Future for each location key being fetched
+        self.pending = {}
+
+#----------------------------- FETCH ------------------------------------------------#
+    def fetch(self, location, max_age=None, latitude=None, longitude=None):
+        """
+            Return a Future with the result of owm_fetch.fetch_weather()
+            A fresh cached result is returned without a request
+            Latitude and longitude skip looking up the location
+        """
+        if max_age is None:
+            max_age = self.max_age
+        key = weather_cache.location_key(location)
+        with self.lock:
+            result = self.cache.get(key, max_age)
+            if result is not None:
+                weather_metrics.count("cache", cache="fetch_pool",
+                                      result="hit")
+                future = Future()
+                future.set_result(result)
+                return future
+            # Share the request already on its way
+            if key in self.pending:
+                weather_metrics.count("cache", cache="fetch_pool",
+                                      result="shared")
+                return self.pending[key]
+            weather_metrics.count("cache", cache="fetch_pool", result="miss")
+            # Locations in the same grid cell share requests in owm_fetch
+            future = self.executor.submit(
+                weather_profile.profiled(self.function),
+                location,
+                latitude,
+                longitude,
+                max_age,
+                self.profile
+            )
+            self.pending[key] = future
+        future.add_done_callback(lambda done: self._done(key, done))
+        return future
+
+    def _done(self, key, future):
+        """ Cache the result when a fetch finishes """
+        with self.lock:
+            self.pending.pop(key, None)
+            if future.exception() is None:
+                self.cache.put(key, future.result())
+        # Grid cells no location is waiting for
+        owm_fetch.cells.prune()
+
+    def fetch_many(self, locations, max_age=None):
+        """ Start fetching many locations, return {location: Future} """
+        return {
+            location: self.fetch(location, max_age)
+            for location in locations
+        }
+
+    def cached(self, location):
+        """ Return the cached result for a location, None if there is none """
+        return self.cache.get(location)
+
+    def footprint(self):
+        """
+            Memory used by the cached results, see LocationStore.footprint()
+            and by the grid cell results, see CellCache.stats()
+        """
+        footprint = self.cache.footprint()
+        footprint["cells"] = owm_fetch.cells.stats()
+        return footprint
+
+#----------------------------- SHUTDOWN ---------------------------------------------#
+    def shutdown(self, wait=True):
+        """ Stop the worker threads """
+        self.executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,248 @@
+"""
+    Name: forecast_chart.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Temperature and precipitation charts for the forecast dialogs
+    Lines are drawn with QPainterPath into a pixmap, the pixmap is only
+    drawn again when the data, units or chart size change
+    Series with more points than the chart has room for are decimated,
+    each group of points keeps its lowest and highest value so peaks show
+    Only QtGui is used, no charting package to load at startup
+"""
+
+import math
+from collections import OrderedDict
+from PySide6 import QtGui
+from PySide6.QtCore import QPointF, QRectF, Qt
+from PySide6.QtWidgets import QPushButton, QWidget
+import weather_metrics
+import weather_units
+import weather_utils
+
+# Pixels for each point kept, more points than this are decimated
+PIXELS_PER_POINT = 3
+# Chart pixmaps kept, both unit systems of every dialog
+MAX_PIXMAPS = 12
+# Space for the axis labels around the plot
+MARGINS = (50, 12, 45, 28)
+# Color of each temperature line, then the precipitation bars
+LINE_COLORS = ("#ff8c00", "#4fc3f7")
+BAR_COLOR = (70, 130, 255, 120)
+GRID_COLOR = (128, 128, 128, 90)
+
+# Series key, size and pixel ratio -> QPixmap, least recently used first
+_pixmaps = OrderedDict()
+
+
+#----------------------------- SERIES -----------------------------------------------#
+def _series(times, lines, pop, units, label):
+    """ A chart series, key changes whenever anything drawn changes """
+    return {
+        "times": times,
+        "lines": lines,
+        "pop": pop,
+        "units": units,
+        "label": label,
+        "key": hash((units, label, tuple(times), tuple(pop),
+                     tuple((name, tuple(values))
+                           for name, values in lines.items())))
+    }
+
+
+def hourly_series(weather_data, units=weather_units.CANONICAL, hours=None):
+    """ Hourly temperature and chance of precipitation """
+    weather_data = weather_units.to_units(weather_data, units)
+    hourly = weather_data.get("hourly", [])[:hours]
+    return _series(
+        [item["dt"] for item in hourly],
+        {"Temp": [item["temp"] for item in hourly]},
+        # Results saved before pop was fetched have none
+        [item.get("pop", 0) * 100 for item in hourly],
+        units, "hour")
+
+
+def daily_series(weather_data, units=weather_units.CANONICAL):
+    """ Daily high and low temperature and chance of precipitation """
+    weather_data = weather_units.to_units(weather_data, units)
+    daily = weather_data.get("daily", [])
+    return _series(
+        [item["dt"] for item in daily],
+        {"High": [item["temp"]["max"] for item in daily],
+         "Low": [item["temp"]["min"] for item in daily]},
+        [item.get("pop", 0) * 100 for item in daily],
+        units, "day")
+
+
+#----------------------------- DECIMATE ---------------------------------------------#
+def decimate(times, values, max_points):
+    """
+        Keep at most max_points of a series
+        Each group keeps its lowest and highest point in time order
+    """
+    if len(values) <= max_points or max_points < 4:
+        return times, values
+    groups = max_points // 2
+    size = len(values) / groups
+    kept_times = []
+    kept_values = []
+    start = 0
+    for group in range(1, groups + 1):
+        end = round(group * size)
+        indexes = range(start, end)
+        low = min(indexes, key=values.__getitem__)
+        high = max(indexes, key=values.__getitem__)
+        for index in sorted({low, high}):
+            kept_times.append(times[index])
+            kept_values.append(values[index])
+        start = end
+    return kept_times, kept_values
+
+
+#----------------------------- DRAW -------------------------------------------------#
+def draw_chart(series, width, height, text_color, ratio=1.0):
+    """ Draw a series into a new pixmap of width x height """
+    pixmap = QtGui.QPixmap(round(width * ratio), round(height * ratio))
+    pixmap.setDevicePixelRatio(ratio)
+    pixmap.fill(Qt.transparent)
+    painter = QtGui.QPainter(pixmap)
+    painter.setRenderHint(QtGui.QPainter.Antialiasing)
+    painter.setPen(text_color)
+
+    times = series["times"]
+    if not times:
+        painter.drawText(QRectF(0, 0, width, height), Qt.AlignCenter,
+                         "No forecast, fetch the full forecast to chart it")
+        painter.end()
+        return pixmap
+
+    left, top, right, bottom = MARGINS
+    plot = QRectF(left, top, width - left - right, height - top - bottom)
+    max_points = max(int(plot.width() // PIXELS_PER_POINT), 4)
+    first = times[0]
+    span = max(times[-1] - first, 1)
+
+    def x(time):
+        return plot.left() + (time - first) / span * plot.width()
+
+    # Temperature range with a little room above and below
+    values = [value for line in series["lines"].values() for value in line]
+    low, high = min(values), max(values)
+    padding = max((high - low) * 0.1, 1)
+    low, high = low - padding, high + padding
+
+    def y(value):
+        return plot.bottom() - (value - low) / (high - low) * plot.height()
+
+    # Grid and temperature labels on the left
+    degrees = weather_units.symbol("temperature", series["units"])
+    for step in range(5):
+        value = low + (high - low) * step / 4
+        painter.setPen(QtGui.QColor(*GRID_COLOR))
+        painter.drawLine(QPointF(plot.left(), y(value)),
+                         QPointF(plot.right(), y(value)))
+        painter.setPen(text_color)
+        painter.drawText(QRectF(0, y(value) - 8, left - 6, 16),
+                         Qt.AlignRight | Qt.AlignVCenter,
+                         f"{value:.0f}{degrees}")
+    # Chance of precipitation labels on the right
+    for percent in (0, 50, 100):
+        bar_y = plot.bottom() - percent / 100 * plot.height()
+        painter.drawText(QRectF(plot.right() + 6, bar_y - 8, right - 6, 16),
+                         Qt.AlignLeft | Qt.AlignVCenter, f"{percent}%")
+
+    # Time labels, about one every 90 pixels
+    convert = weather_utils.convert_hourly_time \
+        if series["label"] == "hour" else weather_utils.convert_day_time
+    step = max(1, math.ceil(len(times) / max(plot.width() / 90, 1)))
+    for index in range(0, len(times), step):
+        painter.drawText(QRectF(x(times[index]) - 45, plot.bottom() + 6, 90, 18),
+                         Qt.AlignHCenter | Qt.AlignTop, convert(times[index]))
+
+    # Chance of precipitation bars, 0 to 100% of the plot height
+    bar_times, bar_values = decimate(times, series["pop"], max_points)
+    bar_width = max(plot.width() / len(bar_times) * 0.6, 1)
+    painter.setPen(Qt.NoPen)
+    painter.setBrush(QtGui.QColor(*BAR_COLOR))
+    for time, percent in zip(bar_times, bar_values):
+        if percent > 0:
+            bar_height = percent / 100 * plot.height()
+            painter.drawRect(QRectF(x(time) - bar_width / 2,
+                                    plot.bottom() - bar_height,
+                                    bar_width, bar_height))
+
+    # Temperature lines and their names
+    painter.setBrush(Qt.NoBrush)
+    legend_x = plot.left() + 8
+    for (name, line), color in zip(series["lines"].items(), LINE_COLORS):
+        line_times, line_values = decimate(times, line, max_points)
+        path = QtGui.QPainterPath(QPointF(x(line_times[0]), y(line_values[0])))
+        for time, value in zip(line_times[1:], line_values[1:]):
+            path.lineTo(x(time), y(value))
+        painter.setPen(QtGui.QPen(QtGui.QColor(color), 2))
+        painter.drawPath(path)
+        painter.drawText(QPointF(legend_x, plot.top() + 14), name)
+        legend_x += 60
+    painter.setPen(QtGui.QColor(*BAR_COLOR[:3]))
+    painter.drawText(QPointF(legend_x, plot.top() + 14), "Precip %")
+    painter.end()
+    return pixmap
+
+
+#----------------------------- CHART WIDGET -----------------------------------------#
+class forecast_chart(QWidget):
+    """ Shows a series from a cached pixmap """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.series = None
+
+    def set_series(self, series):
+        """ Chart a series from hourly_series() or daily_series() """
+        self.series = series
+        self.update()
+
+    def chart_pixmap(self):
+        """ The pixmap of the series, drawn only if it is not cached """
+        ratio = self.devicePixelRatioF()
+        key = (self.series["key"], self.width(), self.height(), ratio)
+        pixmap = _pixmaps.get(key)
+        if pixmap is not None:
+            _pixmaps.move_to_end(key)
+            weather_metrics.count("cache", cache="chart", result="hit")
+            return pixmap
+        weather_metrics.count("cache", cache="chart", result="miss")
+        with weather_metrics.span("draw_chart"):
+            pixmap = draw_chart(
+                self.series, self.width(), self.height(),
+                self.palette().color(QtGui.QPalette.WindowText), ratio)
+        _pixmaps[key] = pixmap
+        # Forget the least recently used chart
+        if len(_pixmaps) > MAX_PIXMAPS:
+            _pixmaps.popitem(last=False)
+        return pixmap
+
+    def paintEvent(self, event):
+        """ Copy the cached pixmap to the widget """
+        if self.series is None:
+            return
+        painter = QtGui.QPainter(self)
+        painter.drawPixmap(0, 0, self.chart_pixmap())
+        painter.end()
+
+
+def add_to_dialog(dialog, list_widget):
+    """
+        Put a chart in place of a forecast dialog's list
+        with a Chart button to switch between them
+        Returns the chart
+    """
+    chart = forecast_chart(dialog)
+    chart.setGeometry(list_widget.geometry())
+    chart.hide()
+    button = QPushButton("Chart", dialog)
+    button.setCheckable(True)
+    button.setGeometry(list_widget.x(), list_widget.geometry().bottom() + 14,
+                       75, 24)
+    button.toggled.connect(chart.setVisible)
+    button.toggled.connect(lambda checked: list_widget.setVisible(not checked))
+    return chart
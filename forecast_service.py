@@ -0,0 +1,223 @@
+"""
+    Name: forecast_service.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Local forecast service, many displays share one fetch
+    Serves the same result owm_fetch.fetch_weather() returns as JSON
+    OpenWeatherMap is asked once per location every --max-age seconds
+    however many displays ask, the rest are answered from the cache
+        python forecast_service.py --host 0.0.0.0 --port 8765
+        python one_call_qt.py --service http://server:8765
+    GET /weather?location=Scottsbluff, NE, US   weather result JSON
+    GET /metrics                                Prometheus text
+    GET /store                                  memory used by the cache
+    GET /health                                 ok
+    An unknown location is 404 with the places it may have meant
+    A keep-alive connection idle for IDLE_TIMEOUT seconds is closed
+    Cached results stay within --max-memory, 1/2 for parsed results,
+    1/4 for the grid cells they are made from and 1/4 for the JSON
+    sent to clients
+"""
+
+import argparse
+import asyncio
+from urllib.parse import parse_qs, urlsplit
+import requests
+# Shared cache and worker threads for the upstream requests
+from fetch_pool import FetchPool
+import json_codec
+# UnknownLocation for names not in the place index
+import place_index
+# Memory bounded cache of the JSON sent to clients
+from location_store import LocationStore
+import owm_fetch
+import weather_cache
+import weather_metrics
+
+# Default port of the service
+PORT = 8765
+
+# Seconds a result is served before asking OpenWeatherMap again
+MAX_AGE = 600
+# A client can ask for fresher weather, but not fresher than this
+MIN_MAX_AGE = 60
+
+# Memory for cached results in MB
+MAX_MEMORY = 64
+
+# Seconds a connection may wait for the next request
+IDLE_TIMEOUT = 30
+
+# Status line text for the codes the service sends
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 502: "Bad Gateway"}
+
+
+class ForecastService:
+    def __init__(self, fetch_pool=None, max_age=MAX_AGE,
+                 max_bytes=MAX_MEMORY * 1024 * 1024):
+        self.max_age = max_age
+        # Always OpenWeatherMap, even if SERVICE_URL is set
+        self.fetch_pool = fetch_pool or FetchPool(
+            max_age=max_age, function=owm_fetch.fetch_from_owm,
+            max_bytes=max_bytes // 2)
+        # JSON bytes for each location, encoded once for every client
+        self.encoded = LocationStore(max_bytes // 4, max_age)
+
+#----------------------------- CONNECTIONS ------------------------------------------#
+    async def handle(self, reader, writer):
+        """ Answer requests on one connection until the client closes it """
+        try:
+            while True:
+                request_line = await self.read_line(reader)
+                if not request_line:
+                    break
+                method, target, version = \
+                    request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await self.read_line(reader)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                with weather_metrics.span("service_request"):
+                    status, content_type, body = await self.route(
+                        method, target)
+                weather_metrics.count("service_requests", status=status)
+                # HTTP/1.1 keeps the connection open for the next refresh
+                keep_alive = version == "HTTP/1.1" and \
+                    headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    "\r\n".encode("latin-1") + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.TimeoutError):
+            # Client went away, sent something that is not HTTP
+            # or left the connection idle
+            pass
+        finally:
+            writer.close()
+
+    async def read_line(self, reader):
+        """ The next line, raises asyncio.TimeoutError after IDLE_TIMEOUT """
+        return await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+
+#----------------------------- ROUTES -----------------------------------------------#
+    async def route(self, method, target):
+        """ Return (status, content type, body bytes) for a request """
+        if method != "GET":
+            return self.error(405, "only GET is supported")
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        if url.path == "/weather":
+            if not query.get("location"):
+                return self.error(400, "location is required")
+            try:
+                max_age = float(query.get("max_age", [self.max_age])[0])
+            except ValueError:
+                return self.error(400, "max_age must be a number of seconds")
+            return await self.weather(query["location"][0],
+                                      max(max_age, MIN_MAX_AGE))
+        if url.path == "/metrics":
+            return (200, "text/plain; version=0.0.4",
+                    weather_metrics.to_prometheus().encode("utf-8"))
+        if url.path == "/store":
+            return 200, "application/json", json_codec.dumps({
+                "results": self.fetch_pool.footprint(),
+                "encoded": self.encoded.footprint()
+            })
+        if url.path == "/health":
+            return 200, "text/plain", b"ok"
+        return self.error(404, "not found")
+
+    async def weather(self, location, max_age):
+        """ Weather for a location from the shared pool """
+        try:
+            result = await asyncio.wrap_future(
+                self.fetch_pool.fetch(location, max_age))
+        except place_index.UnknownLocation as e:
+            # Not in the place index, the client shows the suggestions
+            return 404, "application/json", json_codec.dumps({
+                "error": f"{e}",
+                "location": e.location,
+                "suggestions": e.suggestions
+            })
+        except requests.HTTPError as e:
+            # Pass on 404 for an unknown location and so on
+            status = e.response.status_code if e.response is not None else 502
+            return self.error(status if status in REASONS else 502, f"{e}")
+        except Exception as e:
+            return self.error(502, f"{e}")
+
+        encoded = self.encoded.get(location)
+        if encoded is None or encoded["fetched"] != result["fetched"]:
+            encoded = {
+                "fetched": result["fetched"],
+                "body": json_codec.dumps(weather_cache.encode_result(result))
+            }
+            self.encoded.put(location, encoded)
+        return 200, "application/json", encoded["body"]
+
+    def error(self, status, message):
+        """ A JSON error response """
+        return status, "application/json", json_codec.dumps({"error": message})
+
+#----------------------------- RUN --------------------------------------------------#
+    async def serve(self, host="127.0.0.1", port=PORT):
+        """ Serve until cancelled """
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(
+        description="Local forecast service shared by many displays")
+    parser.add_argument(
+        "--host", default="127.0.0.1",
+        help="address to listen on, 0.0.0.0 for the LAN (default 127.0.0.1)")
+    parser.add_argument(
+        "--port", type=int, default=PORT,
+        help=f"port to listen on (default {PORT})")
+    parser.add_argument(
+        "--max-age", type=float, default=MAX_AGE,
+        help=f"seconds weather is shared before fetching again (default {MAX_AGE})")
+    parser.add_argument(
+        "--workers", type=int, default=8,
+        help="locations fetched from OpenWeatherMap at the same time (default 8)")
+    parser.add_argument(
+        "--max-memory", type=float, default=MAX_MEMORY,
+        help=f"MB of memory for cached results (default {MAX_MEMORY})")
+    return parser.parse_args()
+
+
+def main():
+    arguments = get_arguments()
+    max_bytes = int(arguments.max_memory * 1024 * 1024)
+    # The grid cells shared by nearby locations
+    owm_fetch.cells.max_bytes = max_bytes // 4
+    service = ForecastService(
+        FetchPool(arguments.workers, arguments.max_age,
+                  function=owm_fetch.fetch_from_owm,
+                  max_bytes=max_bytes // 2),
+        arguments.max_age, max_bytes)
+    print(f"Forecast service on http://{arguments.host}:{arguments.port}/weather")
+    try:
+        asyncio.run(service.serve(arguments.host, arguments.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.fetch_pool.shutdown(wait=False)
+
+
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
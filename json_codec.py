@@ -0,0 +1,95 @@
+"""
+    Name: json_codec.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: One place to decode and encode JSON
+    Uses the fastest backend installed: orjson, then ujson, then json
+    Optional: pip install orjson
+    Set the environment variable OWM_JSON_BACKEND=json to force a backend
+    Run this file to benchmark the backends with the bundled json files
+"""
+
+import json
+import os
+
+# Backends in order of preference
+BACKENDS = ("orjson", "ujson", "json")
+
+
+#----------------------------- BACKEND FUNCTIONS ------------------------------------#
+def _json_dumps(data):
+    """ Standard library json, compact separators, returns bytes """
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _load_backend(name):
+    """ Return (loads, dumps) for a backend, None if not installed """
+    if name == "json":
+        return json.loads, _json_dumps
+    try:
+        if name == "orjson":
+            import orjson
+            return orjson.loads, orjson.dumps
+        if name == "ujson":
+            import ujson
+            return ujson.loads, lambda data: ujson.dumps(data).encode("utf-8")
+    except ImportError:
+        pass
+    return None
+
+
+def _pick_backend():
+    """ Pick the forced backend or the first one installed """
+    forced = os.environ.get("OWM_JSON_BACKEND")
+    names = (forced,) + BACKENDS if forced in BACKENDS else BACKENDS
+    for name in names:
+        functions = _load_backend(name)
+        if functions is not None:
+            return name, functions
+
+
+BACKEND, (_loads, _dumps) = _pick_backend()
+
+
+#----------------------------- LOADS AND DUMPS --------------------------------------#
+def loads(data):
+    """ Decode JSON text or bytes into python objects """
+    return _loads(data)
+
+
+def dumps(data):
+    """ Encode python objects as compact JSON bytes """
+    return _dumps(data)
+
+
+#----------------------------- BENCHMARK --------------------------------------------#
+def main():
+    """ Benchmark every installed backend with the bundled json files """
+    import timeit
+
+    files = ("one_call_json.json", "owm_aqi_json.json", "address_json.json")
+    number = 500
+    print(f"Selected backend: {BACKEND}")
+    print(f"{'File':<20} {'Backend':<8} {'loads ms':>9} {'dumps ms':>9}")
+    for file_name in files:
+        with open(file_name, "rb") as file:
+            text = file.read()
+        for name in BACKENDS:
+            functions = _load_backend(name)
+            if functions is None:
+                continue
+            backend_loads, backend_dumps = functions
+            data = backend_loads(text)
+            load_seconds = timeit.timeit(
+                lambda: backend_loads(text), number=number)
+            dump_seconds = timeit.timeit(
+                lambda: backend_dumps(data), number=number)
+            print(f"{file_name:<20} {name:<8} "
+                  f"{load_seconds / number * 1000:9.4f} "
+                  f"{dump_seconds / number * 1000:9.4f}")
+
+
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
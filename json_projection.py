@@ -0,0 +1,162 @@
+"""
+    Name: json_projection.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Keep only the JSON fields a program declares
+    A fields declaration looks like weather_utils.ONE_CALL_FIELDS
+        True keeps the whole value
+        a dictionary keeps only the listed keys
+        a list of one declaration applies it to every item in a list
+    Run this file to benchmark against a full parse of one_call_json.json
+    Optional streaming parser: pip install ijson
+"""
+
+import json
+import sys
+# Fastest installed JSON decoder
+import json_codec
+
+# ijson parses without building the whole document, use it if installed
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+#----------------------------- PROJECT ----------------------------------------------#
+def project(data, fields):
+    """ Return a copy of data with only the declared fields """
+    if fields is True:
+        return data
+    if isinstance(fields, list):
+        # Declaration for every item in a list
+        if not isinstance(data, list):
+            return data
+        return [project(item, fields[0]) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {
+        key: project(data[key], item_fields)
+        for key, item_fields in fields.items()
+        if key in data
+    }
+
+
+#----------------------------- LOADS PROJECTED --------------------------------------#
+def loads_projected(text, fields):
+    """
+        Parse JSON text or bytes and keep only the declared fields
+        The full document is dropped as soon as it is projected
+    """
+    return project(json_codec.loads(text), fields)
+
+
+#----------------------------- STREAM PROJECTED -------------------------------------#
+def _child_fields(fields, key):
+    """ Declaration for a child value, None if the child is not wanted """
+    if fields is True:
+        return True
+    if isinstance(fields, list):
+        return fields[0]
+    return fields.get(key)
+
+
+def stream_projected(text, fields):
+    """
+        Parse JSON text or bytes with ijson events
+        Values that are not declared are skipped, never built
+        Falls back to loads_projected() if ijson is not installed
+    """
+    if ijson is None:
+        return loads_projected(text, fields)
+    if isinstance(text, str):
+        text = text.encode("utf-8")
+
+    root = None
+    # Stack of [container, declaration, current key]
+    stack = []
+    # Depth of an undeclared container being skipped
+    skip = 0
+    for prefix, event, value in ijson.parse(text, use_float=True):
+        if skip:
+            if event in ("start_map", "start_array"):
+                skip += 1
+            elif event in ("end_map", "end_array"):
+                skip -= 1
+            continue
+        if event == "map_key":
+            stack[-1][2] = value
+            continue
+        if event in ("end_map", "end_array"):
+            stack.pop()
+            continue
+
+        # A value starts, find its declaration from the parent
+        if stack:
+            parent, parent_fields, key = stack[-1]
+            item_fields = _child_fields(parent_fields, key)
+            if item_fields is None:
+                if event in ("start_map", "start_array"):
+                    skip = 1
+                continue
+        else:
+            item_fields = fields
+
+        if event == "start_map":
+            value = {}
+        elif event == "start_array":
+            value = []
+
+        if not stack:
+            root = value
+        elif isinstance(parent, list):
+            parent.append(value)
+        else:
+            parent[key] = value
+
+        if event in ("start_map", "start_array"):
+            stack.append([value, item_fields, None])
+    return root
+
+
+#----------------------------- BENCHMARK --------------------------------------------#
+def deep_size(data):
+    """ Measure the memory held by nested dictionaries and lists """
+    size = sys.getsizeof(data)
+    if isinstance(data, dict):
+        size += sum(deep_size(k) + deep_size(v) for k, v in data.items())
+    elif isinstance(data, list):
+        size += sum(deep_size(item) for item in data)
+    return size
+
+
+def main():
+    """ Benchmark full parse against projected parse """
+    import timeit
+    import weather_utils
+
+    with open("one_call_json.json", "rb") as file:
+        text = file.read()
+    fields = weather_utils.ONE_CALL_FIELDS
+    number = 500
+
+    tests = {
+        "json.loads (full)": lambda: json.loads(text),
+        f"{json_codec.BACKEND}.loads (full)": lambda: json_codec.loads(text),
+        "loads_projected": lambda: loads_projected(text, fields),
+    }
+    if ijson is not None:
+        tests["stream_projected (ijson)"] = lambda: stream_projected(
+            text, fields)
+
+    print(f"one_call_json.json: {len(text):,} bytes, {number} parses")
+    print(f"{'Parser':<26} {'ms/parse':>9} {'retained bytes':>15}")
+    for name, test in tests.items():
+        seconds = timeit.timeit(test, number=number)
+        print(f"{name:<26} {seconds / number * 1000:9.3f} {deep_size(test()):>15,}")
+
+
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
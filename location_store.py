@@ -0,0 +1,167 @@
+"""
+    Name: location_store.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Keep parsed results for many locations within a memory budget
+    The memory of each result is measured when it is stored,
+    the least recently used results are dropped to stay in the budget
+    and results older than max_age are dropped as well
+    Objects shared by several results, like the One Call data of a
+    grid cell, are counted for each one, so the budget is never exceeded
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+# location_key() to match location names
+import weather_cache
+# Count evictions
+import weather_metrics
+
+# Default memory budget
+MAX_BYTES = 64 * 1024 * 1024
+
+
+#----------------------------- MEASURE ----------------------------------------------#
+def measure(value):
+    """
+        Bytes of memory held by a value and everything inside it
+        Each object is counted once even if it appears twice
+    """
+    seen = set()
+    size = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return size
+
+
+class LocationStore:
+    def __init__(self, max_bytes=MAX_BYTES, max_age=None):
+        """
+            max_bytes: memory budget for all the results
+            max_age: seconds a result is kept, None keeps it until evicted
+        """
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        # location key -> (result, bytes, stored time), least recent first
+        self.entries = OrderedDict()
+        self.bytes = 0
+
+#----------------------------- GET AND PUT ------------------------------------------#
+    def get(self, location, max_age=None):
+        """
+            The result for a location, None if missing
+            or fetched more than max_age seconds ago
+        """
+        key = weather_cache.location_key(location)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            result = entry[0]
+            if max_age is not None and time.time() - result["fetched"] >= max_age:
+                return None
+            # Most recently used goes to the end
+            self.entries.move_to_end(key)
+            return result
+
+    def put(self, location, result):
+        """
+            Store a result, a dictionary with a fetched time
+            Returns False if it is bigger than the whole budget
+        """
+        size = measure(result)
+        if size > self.max_bytes:
+            weather_metrics.count("location_store", result="too_big")
+            return False
+        key = weather_cache.location_key(location)
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self.entries[key] = (result, size, time.time())
+            self.bytes += size
+            self._evict_expired()
+            # Drop the least recently used until the budget fits
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)), "lru")
+        return True
+
+    def remove(self, location):
+        """ Forget a location """
+        with self.lock:
+            key = weather_cache.location_key(location)
+            if key in self.entries:
+                self._remove(key, "removed")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, location):
+        return weather_cache.location_key(location) in self.entries
+
+#----------------------------- EVICT ------------------------------------------------#
+    def _remove(self, key, reason):
+        """ Remove an entry, the lock is already held """
+        _, size, _ = self.entries.pop(key)
+        self.bytes -= size
+        weather_metrics.count("location_store", result="evicted", reason=reason)
+
+    def _evict_expired(self):
+        """ Remove results older than max_age, the lock is already held """
+        if self.max_age is None:
+            return
+        now = time.time()
+        for key in [key for key, (result, _, _) in self.entries.items()
+                    if now - result["fetched"] >= self.max_age]:
+            self._remove(key, "age")
+
+    def evict_expired(self):
+        """ Remove results older than max_age """
+        with self.lock:
+            self._evict_expired()
+
+#----------------------------- FOOTPRINT --------------------------------------------#
+    def footprint(self):
+        """
+            Memory used, total and for each location
+            most recently used location last
+        """
+        now = time.time()
+        with self.lock:
+            locations = [
+                {"location": key, "bytes": size,
+                 "age_seconds": round(now - result["fetched"], 1)}
+                for key, (result, size, _) in self.entries.items()
+            ]
+            return {
+                "entries": len(locations),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "locations": locations
+            }
+
+    def report(self):
+        """ The footprint as a table for people to read """
+        footprint = self.footprint()
+        lines = [f"{footprint['entries']} locations, "
+                 f"{footprint['bytes'] / 1024:,.1f} KB of "
+                 f"{footprint['max_bytes'] / 1024:,.0f} KB",
+                 f"{'Location':<40} {'KB':>9} {'Age s':>8}"]
+        for entry in footprint["locations"]:
+            lines.append(f"{entry['location'][:40]:<40} "
+                         f"{entry['bytes'] / 1024:9.1f} "
+                         f"{entry['age_seconds']:8.0f}")
+        return "\n".join(lines)
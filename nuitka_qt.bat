@@ -1,10 +1,20 @@
 cd c:\temp
 
+rem Offline places, built once from a GeoNames or OpenWeatherMap dump
+rem in this folder, see place_index.py
+if not exist places.idx if exist cities500.txt python place_index.py build cities500.txt
+if not exist places.idx if exist city.list.json.gz python place_index.py build city.list.json.gz
+
+rem Package the places only when they were built
+set PLACES=
+if exist places.idx if exist places.kdt set PLACES=--include-data-files=places.idx=places.idx --include-data-files=places.kdt=places.kdt
+
 python -m nuitka ^
     --onefile ^
     --enable-plugin=anti-bloat ^
     --enable-plugin=pyside6 ^
     --windows-disable-console ^
     --windows-icon-from-ico=weather.ico ^
+    %PLACES% ^
     one_call_qt.py
 pause
\ No newline at end of file
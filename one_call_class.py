@@ -12,12 +12,34 @@ from datetime import datetime
 from PySide6 import QtGui
 from PySide6.QtCore import QRectF, Qt
 from PySide6.QtWidgets import QMessageBox
+import time
 import requests
-import weather_utils
-# import geocode_owm for reverse geocode
-import geocode_geopy
-# Request icon from url
-import urllib.request
+# Network requests without GUI code
+import owm_fetch
+# Time each stage
+import weather_metrics
+# Text shown on the form
+import weather_format
+# Imperial or metric display
+import weather_units
+# Unknown locations are caught before a request
+import place_index
+# How often each section is fetched again
+import refresh_policy
+# location_key() to tell a refresh from a new location
+import weather_cache
+
+# Pixmaps shared by every window, dashboard card and rendered tile
+# Icon id -> weather icon pixmap
+_icon_pixmaps = {}
+# (wind degrees, width, height) -> wind arrow pixmap
+_arrow_pixmaps = {}
+
+# Sections of the form, each is shown as soon as its data arrives
+SECTIONS = ("address", "current", "icon", "air_quality")
+# Label text of a section still loading and of one that failed
+PENDING = "..."
+FAILED = "--"
 
 
 class OneCall:
@@ -27,6 +49,28 @@ class OneCall:
         """
         # Create empty dictionary for weather data
         self.weather_data = {}
+        # Raw air pollution data and icon png data, kept for weather_cache
+        self.aqi_data = {}
+        self.icon_data = b""
+        # Unix time the weather data was fetched
+        self.fetched = 0
+        # owm_fetch fetch profile of weather_data, the sections fetch full
+        self.profile = "full"
+        # Display units, weather is always fetched in imperial
+        self.units = weather_units.CANONICAL
+        # True when get_location() loaded a whole result
+        self.complete = False
+        # (units, weather_data in those units), see display_data()
+        self.__display_data = None
+        # Section name -> pending, refreshing, ready or failed
+        # and why it failed
+        self.status = {}
+        self.errors = {}
+        # Section name -> Unix time it was fetched, for sections_location
+        self.section_fetched = {}
+        self.sections_location = None
+        # Icon id of weather_icon_pixmap
+        self.icon_id = None
         # Create owm object reference for access
         self.owm = owm
 
@@ -41,325 +85,382 @@ class OneCall:
             # Get location input from user
             self.__location = location
 
-            # Build the openweathermap api url
-            url = weather_utils.URL + self.__location
-
-            # Get the weather information out as a weather object
-            response = requests.get(url)
-            # print(response.text)
-
-            # If the status_code is 200, successful connection and data
-            if(response.status_code == 200):
-                # Load json response into __weather dictionary
-                weather_data = response.json()
-                # For testing
-                # print(self.__weather)
-                # Let user know the connection was successful
-                # print("\n[+] The connection to OpenWeatherMap was successful.")
-                # Get latitude and longitude from owm
-                self.__latitude = weather_data.get("coord").get("lat")
-                self.__longitude = weather_data.get("coord").get("lon")
-
-                # Reverse gecode the address with geopy Nominatim to confirm address
-                self.address = geocode_geopy.reverse_geocode(
-                    self.__latitude,
-                    self.__longitude
-                )
+            # Another copy of the program fetched it already
+            result = owm_fetch.cached_result(location)
+            # Complete results skip the step by step requests
+            self.complete = result is not None or bool(owm_fetch.SERVICE_URL)
+            if result is not None:
+                self.load_result(result)
+            elif owm_fetch.SERVICE_URL:
+                # The forecast service looks up the location and fetches
+                # everything in one request, in a worker thread
+                # service_ready() gets the weather when it arrives
+                self.owm.fetch_from_service(location)
+                return
             else:
-               # If there was a response code other than 200
-                title = "Problem"
-                message = f"The response status code for OWM weather was: {response.status_code}"
-                message += "\nYou may have typed an invalid location."
-                message += "\nPlease try again."
-                QMessageBox.information(self.owm, title, message)
-                # Select the input box, let the user try again
-                self.owm.set_input()
-        except:
-            # Handle connection exception
-            title = "Problem"
-            message = "[-] Sorry, there was a problem \nconnecting with OWM for location."
-            message += "\nPlease try again."
-            QMessageBox.information(self.owm, title, message)
-            # Select the input box, let the user try again
-            self.owm.set_input()
+                # Get latitude and longitude from owm
+                # the address and weather are fetched by get_weather()
+                self.__latitude, self.__longitude = \
+                    owm_fetch.get_coordinates(self.__location)
+        except Exception as e:
+            self.location_failed(e)
+            return
 
         # If everything is successful, get weather
         self.owm.get_weather()
 
-#-------------------------- GET ONE CALL WEATHER DATA -------------------------------#
-    def get_one_call_weather(self):
-        """ Get one call weather data """
-        try:
-            # Parameters for building the URL
-            weather_params = {
-                "lat": self.__latitude,
-                "lon": self.__longitude,
-                "appid": weather_utils.API_KEY,
-                "units": "imperial",
-                "exclude": "minutely"
-            }
-
-            # Make request to API with parameters
-            self.response = requests.get(
-                weather_utils.ONE_CALL_URL,
-                params=weather_params
-            )
-
-            # Testing
-            # print(self.response.content)
-            # Raise exception if anything other than status code 200
-            self.response.raise_for_status
-
-        # Recursive call for error to try a new location
-        except Exception as e:
-            # print(e)
-            # print("Oops, try again.")
+    def service_ready(self, result):
+        """ A result from the forecast service, get weather """
+        self.load_result(result)
+        self.owm.get_weather()
+
+    def location_failed(self, error):
+        """ Tell the user why a location could not be fetched """
+        title = "Problem"
+        if isinstance(error, place_index.UnknownLocation):
+            # Not in the place index, no request was made
+            message = f"{error.location} is not a known place."
+            if error.suggestions:
+                message += "\nDid you mean:\n" + "\n".join(error.suggestions)
+        elif isinstance(error, requests.HTTPError):
+            # If there was a response code other than 200
+            message = f"The response status code for OWM weather was: {error.response.status_code}"
+            message += "\nYou may have typed an invalid location."
+            message += "\nPlease try again."
+        else:
             # Handle connection exception
-            title = "Problem"
-            message = "[-] Sorry, there was a problem connecting with OneCall. " + e
+            message = "[-] Sorry, there was a problem \nconnecting with OWM for location."
             message += "\nPlease try again."
-            QMessageBox.information(self.owm, title, message)
-            # Select the input box, let the user try again
-            self.owm.set_input()
+        QMessageBox.information(self.owm, title, message)
+        # Select the input box, let the user try again
+        self.owm.set_input()
+
+#--------------------------- FETCH SECTIONS ----------------------------------------#
+    def sections_due(self):
+        """
+            Sections to fetch for the location, see refresh_policy
+            Every section is due for a new location
+        """
+        if weather_cache.location_key(self.__location) != \
+                self.sections_location:
+            return list(SECTIONS)
+        return refresh_policy.due(self.section_fetched)
+
+    def begin_sections(self, sections=SECTIONS):
+        """
+            Start fetching sections
+            A new location shows placeholders in every section,
+            a refresh keeps showing the last data until new data arrives
+        """
+        key = weather_cache.location_key(self.__location)
+        if "current" in sections:
+            self.profile = "full"
+        if key != self.sections_location:
+            # Forget the last location
+            self.sections_location = key
+            self.section_fetched = {}
+            self.address = None
+            self.weather_data = {}
+            self.aqi_data = {}
+            self.icon_data = b""
+            self.fetched = 0
+            self.status = dict.fromkeys(SECTIONS, "pending")
+            self.errors = {}
+            self.display_weather()
+            return
+        for name in sections:
+            # A section with nothing to show waits with its placeholder
+            if self.status.get(name) in ("pending", "failed"):
+                self.status[name] = "pending"
+            else:
+                self.status[name] = "refreshing"
+
+    def waiting(self, name):
+        """ True while a section is being fetched """
+        return self.status.get(name) in ("pending", "refreshing")
+
+    def section_fetchers(self, sections=SECTIONS):
+        """
+            Section name -> function that fetches its data
+            Each function returns (data, Unix time it was fetched)
+            The functions make no GUI calls, run them in worker threads
+            The icon needs the icon id, fetch it after current
+            Shared data is reused for the refresh interval of its section
+            and keeps the time its grid cell fetched it
+        """
+        latitude, longitude = self.__latitude, self.__longitude
+        fetchers = {
+            "address": lambda: (owm_fetch.get_address(latitude, longitude),
+                                time.time()),
+            "current": lambda: owm_fetch.get_one_call_for_cell(
+                latitude, longitude, refresh_policy.INTERVALS["current"],
+                timed=True),
+            "air_quality": lambda: owm_fetch.get_air_quality_for_cell(
+                latitude, longitude, refresh_policy.INTERVALS["air_quality"],
+                timed=True)
+        }
+        return {name: fetchers[name] for name in sections if name in fetchers}
+
+    def icon_due(self):
+        """ True if the icon has to be fetched, it expired or the weather changed """
+        icon_id = self.weather_data.get(
+            "current").get("weather")[0].get("icon")
+        return self.waiting("icon") or icon_id != self.icon_id
 
-        # Get weather data as python dictionary
-        self.weather_data = self.response.json()
+    def icon_fetcher(self):
+        """ Function that fetches the icon of the current weather """
+        icon_id = self.weather_data.get(
+            "current").get("weather")[0].get("icon")
+        return lambda: (owm_fetch.get_weather_icon_shared(icon_id),
+                        time.time())
+
+    def section_ready(self, name, data, fetched):
+        """
+            Keep the data of a section and display it
+            fetched: Unix time the data was fetched, see section_fetchers()
+        """
+        if name == "address":
+            self.address = data
+        elif name == "current":
+            self.weather_data = data
+            self.fetched = fetched
+            self.get_current_weather()
+            self.draw_weather_arrow()
+        elif name == "icon":
+            self.icon_data = data
+            self.load_weather_icon()
+        else:
+            self.aqi_data = data
+            self.parse_air_quality()
+        self.status[name] = "ready"
+        self.section_fetched[name] = fetched
+        getattr(self, f"display_{name}")()
+
+    def section_failed(self, name, error):
+        """ Show a placeholder in a section, the rest still display """
+        weather_metrics.count("sections", section=name, result="failed")
+        self.errors[name] = error
+        if self.status.get(name) == "refreshing":
+            # Keep showing the last data, it is still due next time
+            self.status[name] = "ready"
+            return
+        self.status[name] = "failed"
+        getattr(self, f"display_{name}")()
+
+    def unfinished_sections(self):
+        """ Names of the sections that are pending or failed """
+        return [name for name, status in self.status.items()
+                if status != "ready"]
 
 #----------------------------- GET CURRENT WEATHER ----------------------------------#
+    @weather_metrics.timed("parse_current")
     def get_current_weather(self):
         """
             Get current weather from One Call weather data
         """
-        # Create dictionary of current weather data
-        weather_dict = self.weather_data.get("current")
-        # Get time of data calculation
-        self.__data_time = weather_utils.convert_time(weather_dict.get("dt"))
-        # Weather description, Clear, Partly Cloudy
-        self.__description = weather_dict.get(
-            "weather")[0].get("description").title()
-        self.__temperature = weather_dict.get("temp")
-        self.__feels_like = weather_dict.get("feels_like")
-        self.__humidity = weather_dict.get("humidity")
-        self.__wind_speed = weather_dict.get("wind_speed")
-        self.degrees = weather_dict.get("wind_deg")
-        self.__cardinal_direction = weather_utils.degrees_to_cardinal(
-            self.degrees)
-        # Get pascals and convert to inches of mercury
-        self.__pressure = round(weather_dict.get('pressure') / 33.86, 2)
-        self.__clouds = weather_dict.get("clouds")
-        self.__uvi = weather_dict.get("uvi")
-        self.__uvi_string = weather_utils.uvi_to_string(self.__uvi)
-        # Get visibility in meters, convert to miles
-        self.__visibility = round(
-            weather_dict.get("visibility") * 0.00062137, 1)
-        
-        # Get sunrise and sunset time from API in Unix UTC
-        sunrise_time = weather_dict.get("sunrise")
-        sunset_time = weather_dict.get("sunset")
-        # Add shift in seconds from UTC
-        sunrise_time = sunrise_time + self.weather_data.get("timezone_offset")
-        sunset_time = sunset_time + self.weather_data.get("timezone_offset")
-        # Convert from Unix UTC timestamp to Python time
-        self.__sunrise_time = weather_utils.convert_time(sunrise_time)
-        self.__sunset_time = weather_utils.convert_time(sunset_time)
+        # Text for each label, shared with batch_sweep.py
+        self.current = weather_format.current_conditions(
+            self.display_data(), self.units)
+        # Wind direction for the weather arrow
+        self.degrees = self.weather_data.get("current").get("wind_deg")
+
+    @property
+    def weather_data(self):
+        """ One Call weather data in imperial, as fetched """
+        return self.__weather_data
+
+    @weather_data.setter
+    def weather_data(self, weather_data):
+        self.__weather_data = weather_data
+        # Converted again when it is next displayed
+        self.__display_data = None
+
+    def display_data(self):
+        """
+            weather_data in the display units, converted once
+            and kept until the weather or the units change
+        """
+        if self.__display_data is None or \
+                self.__display_data[0] != self.units:
+            self.__display_data = (self.units, weather_units.to_units(
+                self.weather_data, self.units))
+        return self.__display_data[1]
+
+    def set_units(self, units):
+        """ Show the weather in imperial or metric without a request """
+        self.units = units
+        if self.weather_data:
+            self.get_current_weather()
+            self.display_weather()
 
 #--------------------- DISPLAY WEATHER ON FORM -------------------#
+    @weather_metrics.timed("display_weather")
     def display_weather(self):
         """
             Get information from owm_class, display on form
+            Sections still loading or that failed show a placeholder
+        """
+        for name in SECTIONS:
+            getattr(self, f"display_{name}")()
+
+    def placeholder(self, name, labels):
+        """
+            Show the placeholder of a section that is not ready
+            Returns False if the section is ready to display
         """
-        # Display reverse geocode address to confirm that we have the right location
-        self.owm.lbl_reverse_geocode.setText(f'{self.address}')
-
-        # Display weather information on form
-        self.owm.lbl_temperature.setText(f'{self.__temperature}°F 🌡')
-        self.owm.lbl_description.setText(f"{self.__description}")
-        self.owm.lbl_feels_like.setText(f"{self.__feels_like}°F")
-        self.owm.lbl_humidity.setText(f"{self.__humidity}%")
-        self.owm.lbl_pressure.setText(f"{self.__pressure} inHg")
-        self.owm.lbl_wind.setText(
-            f"{self.__wind_speed} mph {self.__cardinal_direction}")
-        self.owm.lbl_cloud_cover.setText(f"{self.__clouds}%")
-        self.owm.lbl_uv_index.setText(f"{self.__uvi} {self.__uvi_string}")
-        self.owm.lbl_visibility.setText(f"{self.__visibility} miles")
-        self.owm.lbl_sunrise.setText(f"{self.__sunrise_time}")
-        self.owm.lbl_sunset.setText(f"{self.__sunset_time}")
+        status = self.status.get(name, "ready")
+        if status in ("ready", "refreshing"):
+            return False
+        text = PENDING if status == "pending" else FAILED
+        for label in labels:
+            getattr(self.owm, f"lbl_{label}").setText(text)
+        # Hover the section to see why it failed
+        getattr(self.owm, f"lbl_{labels[0]}").setToolTip(
+            self.errors.get(name, ""))
+        return True
+
+    def display_address(self):
+        """ Display reverse geocode address to confirm that we have the right location """
+        if not self.placeholder("address", ("reverse_geocode",)):
+            self.owm.lbl_reverse_geocode.setText(f'{self.address}')
+            self.owm.lbl_reverse_geocode.setToolTip("")
+
+    def display_current(self):
+        """ Display weather information on form, lbl_temperature and so on """
+        # Coordinates are known before any section is fetched
         self.owm.lbl_latitude.setText(f"{self.__latitude}")
         self.owm.lbl_longitude.setText(f"{self.__longitude}")
-
-        # Get and display OpenWeatherMap Icon on form
-        self.owm.lbl_weather_icon.setPixmap(QtGui.QPixmap(
-            self.weather_icon_image))
-
-        # Display Air Quality Index
-        self.owm.lbl_aqi.setText(
-            f"{self.__aqi} {self.__aqi_string}")
-        self.owm.lbl_ozone.setText(f"{self.__ozone} µg/m³")
-        self.owm.lbl_pm25.setText(f"{self.__pm25} µg/m³")
-        self.owm.lbl_pm10.setText(f"{self.__pm10} µg/m³")
-        self.owm.lbl_carbon_monoxide.setText(
-            f"{self.__carbon_monoxide} µg/m³")
-        self.owm.lbl_sulphur_dioxide.setText(
-            f"{self.__sulphur_dioxide} µg/m³")
-        self.owm.lbl_nitrogen_dioxide.setText(
-            f"{self.__nitrogen_dioxide} µg/m³")
+        if self.placeholder("current", weather_format.CURRENT_LABELS):
+            self.owm.lbl_wind_arrow.clear()
+            return
+        for name, text in self.current.items():
+            getattr(self.owm, f"lbl_{name}").setText(text)
+        self.owm.lbl_temperature.setToolTip("")
+
+    def display_icon(self):
+        """ Display OpenWeatherMap Icon on form """
+        if self.status.get("icon", "ready") not in ("ready", "refreshing"):
+            self.owm.lbl_weather_icon.clear()
+            return
+        self.owm.lbl_weather_icon.setPixmap(self.weather_icon_pixmap)
+
+    def display_air_quality(self):
+        """ Display Air Quality Index, lbl_aqi, lbl_ozone and so on """
+        if self.placeholder("air_quality", weather_format.AIR_QUALITY_LABELS):
+            return
+        for name, text in self.air_quality.items():
+            getattr(self.owm, f"lbl_{name}").setText(text)
+        self.owm.lbl_aqi.setToolTip(self.us_aqi)
 
 #----------------------------- 48-HOUR FORECAST -------------------------------------#
     def get_forty_eight_hour(self):
         """
-            Get 48-hour forecast from One Call Weather data
+            Print the 48-hour forecast from One Call Weather data
+            Use weather_export to save it to files
         """
-        # Slice 48 hours out of weather_data
-        weather_slice = self.weather_data["hourly"][:]
-
         print()
         print("="*70)
-        print(
-            f"48 Hour Weather Forecast for {datetime.datetime.now():%m/%d/%Y}")
+        print(f"48 Hour Weather Forecast for {datetime.now():%m/%d/%Y}")
         print(f"{self.address}")
         print("="*70)
-
-        counter = 0
-        # Iterate through the hourly weather data
-        for hourly_data in weather_slice:
-            counter += 1
-            # Only display every even data slice
-            if counter % 2:
-                temp = hourly_data["temp"]
-                description = hourly_data["weather"][0]["main"]
-                time = weather_utils.convert_hourly_time(hourly_data["dt"])
-                print(f"{time:>8}: {temp:>5.1f} °F  {description}")
+        # Same rows as the 48 hour dialog
+        for row in weather_format.forty_eight_hour_rows(
+                self.display_data(), self.units):
+            print(row)
 
 #------------------------------- 7-DAY FORECAST -------------------------------------#
     def get_seven_day(self):
         """
-            Get 7 day forecast from One Call Weather data
+            Print the 7 day forecast from One Call Weather data
+            Use weather_export to save it to files
         """
-        # Slice the daily list out of weather_data
-        weather_slice = self.weather_data["daily"][:]
-
         print(f"                 7 Day Forecast")
         print(f"{self.address}")
         print("="*70)
-        # print(f"Weather Forecast for {datetime.datetime.now():%m/%d/%Y}")
-        print(f"Date           Max       Min     Wind Spd  ")
-        # Iterate through the temps
-        for daily_data in weather_slice:
-            temp_max = daily_data["temp"]["max"]
-            temp_min = daily_data["temp"]["min"]
-            wind_speed = daily_data["wind_speed"]
-            description = daily_data["weather"][0]["description"].title()
-            time = weather_utils.convert_day_time(daily_data["dt"])
-            print(
-                f"{time:>9} {temp_max:7.1f} °F | {temp_min:4.1f} °F | {wind_speed:4.1f} mph | {description}")
-
-#-------------------------- GET WEATHER ICON FROM URL ----------------------------#
-    def get_weather_icon(self):
-        """
-            Get OWM weather icon from url in weather dictionary
-        """
-        # Get url for weather icon
+        # Same rows as the 7 day dialog, header first
+        for row in weather_format.seven_day_rows(self.display_data(), self.units):
+            print(row)
+
+#-------------------------- LOAD WEATHER ICON --------------------------------------#
+    @weather_metrics.timed("load_icon")
+    def load_weather_icon(self):
+        """ Load the icon png data into a pixmap, once for each icon id """
         icon_id = self.weather_data.get(
             "current").get("weather")[0].get("icon")
-        # print(icon_id)
-        weather_icon_url = f'http://openweathermap.org/img/wn/{icon_id}.png'
-
-        # Get the data from the weather icon url
-        data = urllib.request.urlopen(weather_icon_url).read()
-
-        # Create a QT Image object
-        self.weather_icon_image = QtGui.QImage()
-
-        # Load the url data into the image object
-        self.weather_icon_image.loadFromData(data)
+        pixmap = _icon_pixmaps.get(icon_id)
+        if pixmap is None:
+            # Create a QT Image object
+            image = QtGui.QImage()
+            # Load the url data into the image object
+            image.loadFromData(self.icon_data)
+            pixmap = QtGui.QPixmap.fromImage(image)
+            # Missing icon data is not cached, the next result may have it
+            if not pixmap.isNull():
+                _icon_pixmaps[icon_id] = pixmap
+        self.weather_icon_pixmap = pixmap
+        self.icon_id = icon_id
 
 #------------------------------- AIR QUALITY INDEX -------------------------------------#
-    def get_air_quality(self):
-        """ 
-            Get Air Quality Index from OpenWeatherMap with API call
-            How do I calculate the AQI from pollutant concentration data? 
-            The AQI is the highest value calculated for each pollutant as follows:
-            Identify the highest concentration among all of the monitors
-            within each reporting area and truncate as follows:
-              Ozone (ppm) – truncate to 3 decimal places
-              PM2.5 (μg/m3) – truncate to 1 decimal place
-              PM10 (μg/m3) – truncate to integer
-              CO (ppm) truncate to 1 decimal place
-              SO2 (ppb) – truncate to integer
-              NO2 (ppb) – truncate to integer 
+    @weather_metrics.timed("parse_air_quality")
+    def parse_air_quality(self):
+        """ Get the Air Quality Index and components out of aqi_data """
+        # Text for each label, shared with batch_sweep.py
+        self.air_quality = weather_format.air_quality(self.aqi_data)
+        # US EPA AQI from the components, OWM only gives 1-5
+        self.us_aqi = weather_format.us_air_quality(self.aqi_data)
+
+#----------------------------- SAVE AND LOAD RESULTS --------------------------------#
+    def result(self):
         """
-        params = {
-            "lat": self.__latitude,
-            "lon": self.__longitude
+            Return the current weather as a dictionary
+            in the same form as owm_fetch.fetch_weather()
+        """
+        return {
+            "location": self.__location,
+            "latitude": self.__latitude,
+            "longitude": self.__longitude,
+            "address": self.address,
+            "weather_data": self.weather_data,
+            "aqi_data": self.aqi_data,
+            "icon_data": self.icon_data,
+            "fetched": self.fetched,
+            "profile": self.profile
         }
-        # Build request with url and parameters
-        url = weather_utils.OWM_AQI_ENDPOINT
 
-        try:
-            response = requests.get(url, params)
-            # print(response.text)
-
-            # If the status_code is 200, successful connection and data
-            if(response.status_code == 200):
-                # Load json response into dictionary
-                data = response.json()
-                # Air Quality Index from OWM
-                self.__aqi = data.get("list")[0].get("main").get("aqi")
-
-                # Ground level ozone, convert ug/m3 to ppm truncate to 3 decimal places
-                # Get and truncate the ug/m3 data
-                self.__ozone = round(data.get("list")[0].get(
-                    "components").get("o3"), 3)
-
-                # Fine particulates truncate to 1 decimal place
-                self.__pm25 = round(data.get("list")[0].get(
-                    "components").get("pm2_5"), 1)
-
-                # Coarse particulates truncate to nearest integer
-                self.__pm10 = round(data.get("list")[0].get(
-                    "components").get("pm10"))
-
-                # Carbon Monoxide round to 1 decimal place
-                carbon_monoxide = data.get(
-                    "list")[0].get("components").get("co")
-                self.__carbon_monoxide = round(carbon_monoxide, 1)
-
-                # Sulphur Dioxide round to nearest integer
-                sulphur_dioxide = data.get(
-                    "list")[0].get("components").get("so2")
-                self.__sulphur_dioxide = round(sulphur_dioxide)
-
-                # Nitrogen Dioxide round to nearest integer
-                nitrogen_dioxide = data.get(
-                    "list")[0].get("components").get("no2")
-                self.__nitrogen_dioxide = round(nitrogen_dioxide)
-
-                # Convert AQI to text
-                if self.__aqi == 1:
-                    self.__aqi_string = "Good"
-                elif self.__aqi == 2:
-                    self.__aqi_string = "Fair"
-                elif self.__aqi == 3:
-                    self.__aqi_string = "Moderate"
-                elif self.__aqi == 4:
-                    self.__aqi_string = "Poor"
-                elif self.__aqi == 5:
-                    self.__aqi_string = "Very Poor"
-            else:
-                title = "Problem"
-                message = f"The response status code for OWM AQI was: {response.status_code}"
-                message += "\nPlease try again."
-                QMessageBox.information(self.owm, title, message)
-        except:
-            title = "Problem"
-            message = "[-] Sorry, there was a problem connecting with OWM AQI."
-            message += "\nPlease try again."
-            QMessageBox.information(self.owm, title, message)
+    def load_result(self, result):
+        """
+            Load a result from owm_fetch.fetch_weather() or weather_cache
+            Ready for draw_weather_arrow() and display_weather()
+        """
+        self.__location = result["location"]
+        self.__latitude = result["latitude"]
+        self.__longitude = result["longitude"]
+        self.address = result["address"]
+        self.weather_data = result["weather_data"]
+        self.aqi_data = result["aqi_data"]
+        self.icon_data = result["icon_data"]
+        self.fetched = result["fetched"]
+        self.profile = owm_fetch.result_profile(result)
+        # A whole result has every section, all fetched at once
+        self.status = dict.fromkeys(SECTIONS, "ready")
+        self.errors = {}
+        self.section_fetched = dict.fromkeys(SECTIONS, self.fetched)
+        self.sections_location = weather_cache.location_key(self.__location)
+        self.get_current_weather()
+        self.parse_air_quality()
+        self.load_weather_icon()
 
 #--------------------- DRAW WEATHER ARROW -------------------#
+    @weather_metrics.timed("draw_weather_arrow")
     def draw_weather_arrow(self):
+        # Each direction is drawn once for each label size
+        size = self.owm.lbl_wind_arrow.size()
+        key = (self.degrees, size.width(), size.height())
+        if key in _arrow_pixmaps:
+            self.owm.lbl_wind_arrow.setPixmap(_arrow_pixmaps[key])
+            return
         # Get the size of the label, create pixmap the same size
-        pixmap = QtGui.QPixmap(self.owm.lbl_wind_arrow.size())
+        pixmap = QtGui.QPixmap(size)
         # Clear the pixmap
         pixmap.fill(Qt.transparent)
         # Create a QPainter object to draw on the pixmap
@@ -387,6 +488,7 @@ class OneCall:
         painter.drawPie(rect, startAngle, spanAngle)
         # End drawing, paint to pixmap
         painter.end()
+        _arrow_pixmaps[key] = pixmap
         # Set pixmap to label
         self.owm.lbl_wind_arrow.setPixmap(pixmap)
 
@@ -12,11 +12,15 @@
 """
 
 # import datetime
+import argparse
 import sys
+import time
 from PySide6 import QtGui
 from PySide6 import QtCore
 from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QApplication, QDialog, QMainWindow, QMenu
+from PySide6.QtWidgets import (QApplication, QCompleter, QDialog, QFileDialog,
+                               QLabel, QMainWindow, QMenu, QMessageBox,
+                               QPlainTextEdit, QVBoxLayout)
 # Import gui py file created by QT Designer
 from main_ui import Ui_MainWindow
 from twelve_hour_ui import Ui_dialog_12_hour_forecast
@@ -24,11 +28,46 @@ from seven_day_ui import Ui_dialog_7_day_forecast
 from forty_eight_hour_ui import Ui_dialog_48_hour_forecast
 
 # Import controller class
+import one_call_class
 from one_call_class import OneCall
-import weather_utils
+# Forecast rows shared with batch_sweep.py
+import weather_format
+# Temperature and precipitation charts for the forecast dialogs
+import forecast_chart
+# Display units for --units
+import weather_units
+# Results shared by copies of the program on this computer
+import shared_cache
+# Network requests and last result cache for warm start
+import owm_fetch
+import weather_cache
+# History of every result in SQLite
+import weather_store
+# CSV, Parquet and Arrow files of the displayed weather
+import weather_export
+# Stage timings and counters for the diagnostics dialog
+import weather_metrics
+# Offline place names for autocomplete
+import place_index
+# Fetch likely locations before they are asked for
+import prefetch
+# How often each section of the form is fetched again
+import refresh_policy
+from location_store import LocationStore
+# cProfile and Chrome trace files with --profile or OWM_PROFILE
+import weather_profile
 # Qt dark palette
 import dark_palette
 
+# Milliseconds typing pauses before suggestions are prefetched
+TYPING_PAUSE = 700
+# Suggestions prefetched, the top of the list
+PREFETCH_SUGGESTIONS = 2
+# Memory for prefetched results, 16 MB
+RESULTS_MEMORY = 16 * 1024 * 1024
+# Memory for the grid cell results in owm_fetch.cells, 16 MB
+CELLS_MEMORY = 16 * 1024 * 1024
+
 
 #------------------- TWELVE HOUR FORECAST DIALOG CLASS ---------------#
 class twelve_hour_forecast_dialog(QDialog):
@@ -55,6 +94,8 @@ class twelve_hour_forecast_dialog(QDialog):
         self.twelve_hour_list.setFont(self.list_font)
         # Set alternating row color property
         self.twelve_hour_list.setAlternatingRowColors(True)
+        # Chart in place of the list with the Chart button
+        self.chart = forecast_chart.add_to_dialog(self, self.twelve_hour_list)
 
     def display_info(self):
         """ Create the 12 hour forecast dialog """
@@ -93,6 +134,8 @@ class seven_day_forecast_dialog(QDialog):
         self.seven_day_list.setFont(self.list_font)
         # Set alternating row color property
         self.seven_day_list.setAlternatingRowColors(True)
+        # Chart in place of the list with the Chart button
+        self.chart = forecast_chart.add_to_dialog(self, self.seven_day_list)
 
     def display_info(self):
         """ Create the 7 day forecast dialog """
@@ -131,6 +174,8 @@ class forty_eight_hour_forecast_dialog(QDialog):
         self.forty_eight_list.setFont(self.list_font)
         # Set alternating row color property
         self.forty_eight_list.setAlternatingRowColors(True)
+        # Chart in place of the list with the Chart button
+        self.chart = forecast_chart.add_to_dialog(self, self.forty_eight_list)
 
     def display_info(self):
         """ Create the 7 day forecast dialog """
@@ -144,6 +189,94 @@ class forty_eight_hour_forecast_dialog(QDialog):
         self.close()
 
 
+#------------------- DIAGNOSTICS DIALOG CLASS ---------------#
+class diagnostics_dialog(QDialog):
+    """
+        Show stage timings and counters from weather_metrics
+        Refreshed every second while it is open
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostics")
+        self.resize(620, 420)
+        self.text = QPlainTextEdit(self)
+        self.text.setReadOnly(True)
+        # Set the font for the table
+        font = QtGui.QFont()
+        font.setPointSize(10)
+        font.setFamily("Consolas, Courier New, monospace")
+        self.text.setFont(font)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.text)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        """ Show the latest metrics """
+        self.text.setPlainText(weather_metrics.to_text())
+
+    def display_info(self):
+        """ Show the dialog without blocking the main window """
+        self.refresh()
+        self.timer.start(1000)
+        self.show()
+
+    def hideEvent(self, event):
+        """ Stop refreshing while hidden """
+        self.timer.stop()
+        super().hideEvent(event)
+
+
+#------------------- REVALIDATE WEATHER IN THE BACKGROUND ---------------#
+class revalidate_worker(QtCore.QThread):
+    """
+        Fetch fresh weather for a location without blocking the GUI
+        The result is sent back to the GUI thread with a signal
+    """
+    result_ready = QtCore.Signal(dict)
+    # The exception, OneCall.location_failed() explains it to the user
+    failed = QtCore.Signal(object)
+
+    def __init__(self, location, parent=None):
+        super().__init__(parent)
+        self.location = location
+
+    @weather_profile.profiled
+    def run(self):
+        """ Runs in the worker thread """
+        try:
+            self.result_ready.emit(owm_fetch.fetch_weather(self.location))
+        except Exception as e:
+            self.failed.emit(e)
+
+
+#------------------- FETCH ONE SECTION IN THE BACKGROUND ---------------#
+class section_worker(QtCore.QThread):
+    """
+        Fetch the data of one section of the form
+        Each section is sent back as soon as it arrives
+        The request number lets the GUI ignore an older request
+    """
+    ready = QtCore.Signal(int, str, object)
+    failed = QtCore.Signal(int, str, str)
+
+    def __init__(self, request, name, fetch, parent=None):
+        super().__init__(parent)
+        self.request = request
+        self.name = name
+        self.fetch = fetch
+
+    @weather_profile.profiled
+    def run(self):
+        """ Runs in the worker thread """
+        try:
+            self.ready.emit(self.request, self.name, self.fetch())
+        except Exception as e:
+            self.failed.emit(self.request, self.name, f"{e}")
+
+
 #----------------------- MAIN PROGRAM WINDOW ---------------------#
 class OWM(QMainWindow, Ui_MainWindow):
 
@@ -173,18 +306,61 @@ class OWM(QMainWindow, Ui_MainWindow):
         self.action_exit.triggered.connect(self.close)
 
         self.action_about.triggered.connect(self.weather_class.about_program)
+        # Diagnostics are in the context menu and on F12
+        self.diagnostics_dialog = diagnostics_dialog(self)
+        self.action_diagnostics = QtGui.QAction("Diagnostics", self)
+        self.action_diagnostics.setShortcut("F12")
+        self.action_diagnostics.triggered.connect(
+            self.diagnostics_dialog.display_info)
+        self.addAction(self.action_diagnostics)
+        # Switch units right away, the weather is converted, not fetched again
+        self.action_metric = QtGui.QAction("Metric Units", self)
+        self.action_metric.setCheckable(True)
+        self.action_metric.setShortcut("Ctrl+M")
+        self.action_metric.toggled.connect(self.set_metric)
+        self.addAction(self.action_metric)
+        # Export the displayed weather for a spreadsheet or warehouse
+        self.action_export = QtGui.QAction("Export...", self)
+        self.action_export.setShortcut("Ctrl+E")
+        self.action_export.triggered.connect(self.export_weather)
+        self.addAction(self.action_export)
         self.action_get_weather.triggered.connect(
             self.weather_class.get_location)
+        # Context or right click menu, made once and reused
+        # a new QMenu for every right click is never freed
+        self.context_menu = QMenu(self)
+        self.context_menu.addAction(self.action_about)
+        self.context_menu.addAction(self.action_get_weather)
+        self.context_menu.addAction(self.action_diagnostics)
+        self.context_menu.addAction(self.action_metric)
+        self.context_menu.addAction(self.action_export)
+        self.context_menu.addAction(self.action_exit)
 
         # Remove sizing grip from status bar
         self.status_bar.setSizeGripEnabled(False)
+        # Label to show how old the displayed weather is
+        self.lbl_staleness = QLabel()
         # Add widgets to status bar
+        self.status_bar.addPermanentWidget(self.lbl_staleness)
         self.status_bar.addPermanentWidget(self.progress_bar)
         # Set statusbar tips
         self.btn_get_weather.setStatusTip("Get current weather (Press Enter)")
         self.btn_exit.setStatusTip("Exit (Press Esc)")
         self.lineEdit.setStatusTip(
             "Enter Town, State, Country (Scottsbluff, NE, US)")
+        # Suggest known places while typing, from the offline place index
+        self.place_model = QtCore.QStringListModel(self)
+        self.completer = QCompleter(self.place_model, self)
+        self.completer.setCaseSensitivity(Qt.CaseInsensitive)
+        # The index already picked the places, show them as they are
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.lineEdit.setCompleter(self.completer)
+        self.lineEdit.textEdited.connect(self.suggest_places)
+        # Prefetch the suggested places when typing pauses
+        self.typing_timer = QtCore.QTimer(self)
+        self.typing_timer.setSingleShot(True)
+        self.typing_timer.setInterval(TYPING_PAUSE)
+        self.typing_timer.timeout.connect(self.prefetch_typed)
 
         self.btn_12_hour_forecast.clicked.connect(self.show_12_hour_forecast)
         self.btn_12_hour_forecast.setEnabled(False)
@@ -198,6 +374,125 @@ class OWM(QMainWindow, Ui_MainWindow):
         # Wait for the user to click Get Weather or press Return
         self.set_input()
 
+        # Keep a history of every result, the program works without it
+        try:
+            self.store = weather_store.WeatherStore()
+        except Exception:
+            self.store = None
+
+        # Likely locations are fetched in the background
+        self.prefetcher = None
+        if prefetch.ENABLED:
+            # Prefetched results wait here until Enter is pressed
+            if owm_fetch.RESULTS is None:
+                owm_fetch.RESULTS = LocationStore(RESULTS_MEMORY)
+            self.prefetcher = prefetch.prefetch_worker(parent=self)
+            self.prefetcher.start_low()
+
+        # Section workers still running, and the number of the request
+        self.section_workers = set()
+        self.request = 0
+        self.request_started = 0
+        self.first_section = False
+        # True while the refresh timer fetches sections
+        self.refreshing = False
+        # Refresh an unattended display, each section on its own interval
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setInterval(refresh_policy.CHECK_INTERVAL)
+        self.refresh_timer.timeout.connect(self.refresh_due)
+        if refresh_policy.AUTO_REFRESH:
+            self.refresh_timer.start()
+
+        # Show the last saved weather while fresh weather is fetched
+        self.revalidate = None
+        # Worker getting a result from the forecast service, --service
+        self.service_fetch = None
+        self.warm_start()
+        # The user often goes back to a recent location
+        if self.prefetcher is not None:
+            self.prefetcher.request_recent(skip=self.lineEdit.text())
+
+#--------------------- WARM START FROM LAST RESULT -------------------#
+    def warm_start(self):
+        """
+            Display the last saved result right away
+            then fetch fresh weather in the background
+        """
+        result = weather_cache.load_result()
+        # A current only result has no forecasts for the dialogs
+        if result is None or not owm_fetch.covers(result, "full"):
+            return
+        try:
+            self.lineEdit.setText(result["location"])
+            self.weather_class.load_result(result)
+            self.show_weather()
+        except Exception:
+            # A damaged or old cache entry, wait for the user instead
+            return
+        self.set_input()
+        self.show_staleness("updating...")
+
+        # Fetch fresh weather in a worker thread
+        self.revalidate = revalidate_worker(result["location"], self)
+        self.revalidate.result_ready.connect(self.revalidated)
+        self.revalidate.failed.connect(
+            lambda error: self.show_staleness("offline"))
+        self.revalidate.start()
+
+    def revalidated(self, result):
+        """ Swap in fresh weather from the revalidate worker """
+        # The user started a newer request, keep what they asked for
+        if weather_cache.location_key(result["location"]) != \
+                weather_cache.location_key(self.lineEdit.text()):
+            return
+        self.weather_class.load_result(result)
+        self.show_weather()
+        self.save_weather()
+        self.show_staleness()
+
+#--------------------- FETCH FROM THE FORECAST SERVICE -------------------#
+    def fetch_from_service(self, location):
+        """
+            Get a whole result from the forecast service in a worker thread
+            The GUI keeps responding while the service fetches
+        """
+        self.progress_bar.setValue(10)
+        worker = revalidate_worker(location, self)
+        worker.result_ready.connect(self.service_ready)
+        worker.failed.connect(
+            lambda error: self.service_failed(location, error))
+        worker.finished.connect(worker.deleteLater)
+        self.service_fetch = worker
+        worker.start()
+
+    def service_ready(self, result):
+        """ Display a result from the forecast service """
+        # The user asked for another location meanwhile
+        if weather_cache.location_key(result["location"]) != \
+                weather_cache.location_key(self.lineEdit.text()):
+            return
+        self.weather_class.service_ready(result)
+
+    def service_failed(self, location, error):
+        """ The forecast service could not fetch a location """
+        if weather_cache.location_key(location) != \
+                weather_cache.location_key(self.lineEdit.text()):
+            return
+        self.weather_class.location_failed(error)
+
+    def show_staleness(self, state=""):
+        """ Show the time the displayed weather was fetched """
+        fetched = QtCore.QDateTime.fromSecsSinceEpoch(
+            int(self.weather_class.fetched))
+        message = f"Updated {fetched.toString('M/d h:mm AP')}"
+        if state:
+            # Cached data gets a warning color until it is fresh
+            message = f"Cached {fetched.toString('M/d h:mm AP')}, {state}"
+            self.lbl_staleness.setStyleSheet("color: orange")
+        else:
+            self.lbl_staleness.setStyleSheet("")
+        self.lbl_staleness.setText(message)
+
 #--------------------- SELECT INPUT -------------------#
     def set_input(self):
         """ Set focus and select lineEdit, wait for user input"""
@@ -205,24 +500,252 @@ class OWM(QMainWindow, Ui_MainWindow):
         self.lineEdit.selectAll()
         self.progress_bar.setValue(0)
 
+#--------------------- SUGGEST PLACES -------------------#
+    def suggest_places(self, text):
+        """ Show the biggest known places that start with the text typed """
+        index = place_index.get_index()
+        if index is None or len(text.strip()) < place_index.MIN_PREFIX:
+            self.place_model.setStringList([])
+            return
+        self.place_model.setStringList(index.suggest(text))
+        self.completer.complete()
+        # Start again each time a key is pressed
+        self.typing_timer.start()
+
+    def prefetch_typed(self):
+        """ Typing paused, prefetch the likeliest places """
+        if self.prefetcher is None:
+            return
+        text = self.lineEdit.text()
+        candidates = self.place_model.stringList()[:PREFETCH_SUGGESTIONS]
+        # A whole known name is the likeliest, fetch it first
+        index = place_index.get_index()
+        if index is not None and index.lookup(text) is not None:
+            candidates.append(text)
+        self.prefetcher.request(reversed(candidates))
+
 #--------------------- GET WEATHER -------------------#
+    @weather_metrics.timed("get_weather")
     def get_weather(self):
         """ Get and display weather on form """
-        self.progress_bar.setValue(33)
-        self.weather_class.get_one_call_weather()
-        self.weather_class.get_current_weather()
-        self.weather_class.get_air_quality()
+        # Sections still coming in belong to the last location
+        self.request += 1
+        self.refreshing = False
+        # The shared cache or forecast service gave everything already
+        if not self.weather_class.complete:
+            # Only the sections whose refresh interval expired
+            self.fetch_sections(self.weather_class.sections_due())
+            return
+        self.show_weather()
+        self.weather_finished()
+
+    def refresh_due(self):
+        """ Refresh timer, fetch the expired sections of the displayed location """
+        # Nothing displayed yet, or a request is still coming in
+        if not self.weather_class.fetched or self.section_workers:
+            return
+        sections = self.weather_class.sections_due()
+        if not sections:
+            return
+        if owm_fetch.SERVICE_URL:
+            # Every display asks the forecast service, never OpenWeatherMap
+            self.refresh_from_service()
+            return
+        self.request += 1
+        # Leave the input box alone, the user may be typing
+        self.refreshing = True
+        self.fetch_sections(sections)
+
+    def refresh_from_service(self):
+        """ Fetch the displayed location again from the forecast service """
+        if self.revalidate is not None and self.revalidate.isRunning():
+            return
+        location = self.weather_class.result()["location"]
+        self.revalidate = revalidate_worker(location, self)
+        self.revalidate.result_ready.connect(self.refreshed)
+        self.revalidate.failed.connect(
+            lambda error: self.show_staleness("offline"))
+        self.revalidate.start()
+
+    def refreshed(self, result):
+        """ Swap in weather refreshed by the forecast service """
+        # The user asked for another location meanwhile
+        if weather_cache.location_key(result["location"]) != \
+                self.weather_class.sections_location:
+            return
+        self.weather_class.load_result(result)
+        self.show_weather()
+        self.save_weather()
+        self.show_staleness()
+
+    def fetch_sections(self, sections):
+        """
+            Fetch the address, current weather, icon and AQI in worker
+            threads, each section is displayed as soon as it arrives
+            A slow or failed section does not hold up the others
+        """
+        if not sections:
+            # Everything displayed is still fresh
+            self.weather_finished()
+            return
+        self.weather_class.begin_sections(sections)
+        if self.weather_class.status["current"] == "pending":
+            self.set_forecast_buttons(False)
+        self.progress_bar.setValue(10)
+        self.request_started = time.perf_counter()
+        self.first_section = True
+        for name, fetch in self.weather_class.section_fetchers(
+                sections).items():
+            self.start_section(name, fetch)
+        # The icon comes after current, or now if current is still fresh
+        if "icon" in sections and "current" not in sections:
+            self.start_section("icon", self.weather_class.icon_fetcher())
+
+    def start_section(self, name, fetch):
+        """ Fetch one section in a worker thread """
+        worker = section_worker(self.request, name, fetch, self)
+        worker.ready.connect(self.section_ready)
+        worker.failed.connect(self.section_failed)
+        # Forget the worker once it is done
+        worker.finished.connect(lambda: self.section_workers.discard(worker))
+        worker.finished.connect(worker.deleteLater)
+        self.section_workers.add(worker)
+        worker.start()
+
+    def section_ready(self, request, name, section):
+        """ Display a section that arrived, (data, fetched time) """
+        if request != self.request:
+            return
+        if self.first_section:
+            self.first_section = False
+            # How long the user waited to see something
+            weather_metrics.record("first_section",
+                                   time.perf_counter() - self.request_started)
+        self.weather_class.section_ready(name, *section)
+        if name == "current":
+            self.set_forecast_buttons(True)
+            # The icon id is in the current weather, a new id is fetched
+            if self.weather_class.icon_due():
+                self.weather_class.begin_sections(["icon"])
+                self.start_section("icon", self.weather_class.icon_fetcher())
+        self.section_done()
+
+    def section_failed(self, request, name, error):
+        """ Show a placeholder for a section that failed """
+        if request != self.request:
+            return
+        self.weather_class.section_failed(name, error)
+        if name == "current" and self.weather_class.waiting("icon"):
+            # No icon id without the current weather
+            self.weather_class.section_failed("icon", error)
+        self.status_bar.showMessage(
+            f"{name.replace('_', ' ').title()} is not available: {error}",
+            10000)
+        self.section_done()
+
+    def section_done(self):
+        """ Show progress, finish when no section is being fetched """
+        sections = one_call_class.SECTIONS
+        waiting = sum(self.weather_class.waiting(name) for name in sections)
+        self.progress_bar.setValue(100 - 90 * waiting // len(sections))
+        if not waiting:
+            self.weather_finished()
+
+    def weather_finished(self):
+        """ Every section has arrived or failed """
+        if not self.refreshing:
+            # # Set focus and select lineEdit for next user entry
+            self.lineEdit.setFocus()
+            self.lineEdit.selectAll()
+        self.progress_bar.setValue(100)
+        if self.weather_class.fetched:
+            self.show_staleness()
+        # Save for the next warm start
+        self.save_weather()
+
+    def show_weather(self):
+        """ Display the weather loaded in weather_class """
         self.weather_class.draw_weather_arrow()
-        self.weather_class.get_weather_icon()
-        self.progress_bar.setValue(66)
         self.weather_class.display_weather()
-        # # Set focus and select lineEdit for next user entry
-        self.lineEdit.setFocus()
-        self.lineEdit.selectAll()
-        self.progress_bar.setValue(100)
-        self.btn_12_hour_forecast.setDisabled(False)
-        self.btn_7_day_forecast.setDisabled(False)
-        self.btn_48_hour_forecast.setDisabled(False)
+        self.set_forecast_buttons(True)
+
+    def set_forecast_buttons(self, enabled):
+        """ The forecast dialogs need the current weather """
+        self.btn_12_hour_forecast.setEnabled(enabled)
+        self.btn_7_day_forecast.setEnabled(enabled)
+        self.btn_48_hour_forecast.setEnabled(enabled)
+
+    def save_weather(self):
+        """
+            Save the displayed weather for the next warm start
+            and add it to the history store
+            A result with a missing section is displayed, not saved
+        """
+        if not self.weather_class.fetched or \
+                self.weather_class.unfinished_sections():
+            return
+        result = self.weather_class.result()
+        # Only a full result has the forecasts a warm start needs
+        if not owm_fetch.covers(result, "full"):
+            return
+        try:
+            weather_cache.save_result(result)
+            # Other copies of the program can show it without a request
+            owm_fetch.share_result(result)
+            if self.store is not None:
+                # Rows already in the store are skipped
+                self.store.add_results([result])
+        except Exception:
+            # Not being able to save is not worth bothering the user
+            pass
+
+    def closeEvent(self, event):
+        """ Override the closeEvent, save weather on shutdown """
+        self.save_weather()
+        # Let a running revalidate finish before Qt tears down
+        if self.revalidate is not None:
+            self.revalidate.wait()
+        for worker in list(self.section_workers):
+            worker.wait()
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+        event.accept()
+
+    def set_metric(self, metric):
+        """ Display metric or imperial units """
+        self.weather_class.set_units("metric" if metric else "imperial")
+
+    def export_weather(self):
+        """
+            Export the displayed weather, one file per table
+            weather_current.csv, weather_hourly.csv and so on
+        """
+        if not self.weather_class.fetched or \
+                self.weather_class.unfinished_sections():
+            return
+        filters = {
+            "CSV files (*.csv)": "csv",
+            "Parquet files (*.parquet)": "parquet",
+            "Arrow files (*.arrow)": "arrow"
+        }
+        file_name, selected = QFileDialog.getSaveFileName(
+            self, "Export Weather", "weather", ";;".join(filters))
+        if not file_name:
+            return
+        export_format = filters.get(selected, "csv")
+        # The table name is added to the name the user picked
+        prefix = file_name
+        extension = weather_export.FORMATS[export_format]
+        if prefix.endswith(extension):
+            prefix = prefix[:-len(extension)]
+        try:
+            file_names = weather_export.export_results(
+                prefix, [self.weather_class.result()], export_format)
+        except (ImportError, OSError) as e:
+            QMessageBox.information(self, "Problem", f"Export failed. {e}")
+            return
+        self.status_bar.showMessage(
+            f"Exported {len(file_names)} files to {prefix}_*{extension}", 5000)
 
 #-------- OVERRIDE MOUSE EVENTS TO MOVE PROGRAM WINDOW -------------#
     def mousePressEvent(self, event):
@@ -256,27 +779,13 @@ class OWM(QMainWindow, Ui_MainWindow):
         
         # Clear weather_list
         self.twelve_hour_dialog.twelve_hour_list.clear()
-        # Slice 12 hours out of weather_data
-        weather_slice = self.weather_class.weather_data["hourly"][:12]
-        # print(
-        #     f"12 Hour Weather Forecast for {datetime.datetime.now():%m/%d/%Y}")
-        # print(f"{self.__address}")
-        self.twelve_hour_dialog.twelve_hour_list.addItem(
-            f"  Time      Temp    Humidity  Wind Spd")
-        count = 0
-
-        # Iterate through the temps
-        for hourly_data in weather_slice:
-            temperature = hourly_data["temp"]
-            description_main = hourly_data["weather"][0]["main"]
-            description = hourly_data["weather"][0]["description"]
-            humidity = hourly_data["humidity"]
-            wind_speed = hourly_data["wind_speed"]
-            time = weather_utils.convert_hourly_time(hourly_data["dt"])
-            display = f"{time:>8}: {temperature:>5.1f} °F   {humidity:4.1f} %   {wind_speed:4.1f} mph   {description_main} ({description})"
-            self.twelve_hour_dialog.twelve_hour_list.addItem(
-                display)
-            count += 1
+        # Rows are formatted by weather_format, shared with batch_sweep.py
+        self.twelve_hour_dialog.twelve_hour_list.addItems(
+            weather_format.twelve_hour_rows(
+                self.weather_class.display_data(), self.weather_class.units))
+        # The chart is only drawn again if the forecast changed
+        self.twelve_hour_dialog.chart.set_series(forecast_chart.hourly_series(
+            self.weather_class.display_data(), self.weather_class.units, 12))
 
         # Call QDialog display_info method
         self.twelve_hour_dialog.display_info()
@@ -290,24 +799,13 @@ class OWM(QMainWindow, Ui_MainWindow):
         
         # Clear weather_list
         self.seven_day_dialog.seven_day_list.clear()
-        # Slice the daily list out of weather_data
-        weather_slice = self.weather_class.weather_data["daily"][:]
-        
-        self.seven_day_dialog.seven_day_list.addItem(
-            f"Date           Max       Min     Wind Spd  ")
-        count = 0
-        # Iterate through the forecast
-        for daily_data in weather_slice:
-            temp_max = daily_data["temp"]["max"]
-            temp_min = daily_data["temp"]["min"]
-            wind_speed = daily_data["wind_speed"]
-            description_main = daily_data["weather"][0]["main"]
-            description = daily_data["weather"][0]["description"]
-            time = weather_utils.convert_day_time(daily_data["dt"])
-            display = f"{time:>9} {temp_max:7.1f} °F   {temp_min:4.1f} °F   {wind_speed:4.1f} mph    {description_main} ({description})"
-            self.seven_day_dialog.seven_day_list.addItem(
-                display)
-            count += 1
+        # Rows are formatted by weather_format, shared with batch_sweep.py
+        self.seven_day_dialog.seven_day_list.addItems(
+            weather_format.seven_day_rows(
+                self.weather_class.display_data(), self.weather_class.units))
+        # The chart is only drawn again if the forecast changed
+        self.seven_day_dialog.chart.set_series(forecast_chart.daily_series(
+            self.weather_class.display_data(), self.weather_class.units))
 
         # Call QDialog display_info method
         self.seven_day_dialog.display_info()
@@ -320,21 +818,14 @@ class OWM(QMainWindow, Ui_MainWindow):
         self.forty_eight_hour_dialog.lbl_48_location.setText(f"{self.weather_class.address}")
         # Clear weather_list
         self.forty_eight_hour_dialog.forty_eight_list.clear()
-        # Slice the daily list out of weather_data
-        weather_slice = self.weather_class.weather_data["hourly"][:]
-
-        count = 0
-        # Iterate through the forecast
-        for hourly_data in weather_slice:
-            # Only display every even data slice
-            if count % 2:
-                temp = hourly_data["temp"]
-                description_main = hourly_data["weather"][0]["main"]
-                description = hourly_data["weather"][0]["main"]
-                time = weather_utils.convert_hourly_time(hourly_data["dt"])
-                display = f"{time:>8}   {temp:>5.1f} °F   {description_main} ({description})"
-                self.forty_eight_hour_dialog.forty_eight_list.addItem(display)
-            count += 1
+        # Rows are formatted by weather_format, shared with batch_sweep.py
+        self.forty_eight_hour_dialog.forty_eight_list.addItems(
+            weather_format.forty_eight_hour_rows(
+                self.weather_class.display_data(), self.weather_class.units))
+        # The chart is only drawn again if the forecast changed
+        self.forty_eight_hour_dialog.chart.set_series(
+            forecast_chart.hourly_series(
+                self.weather_class.display_data(), self.weather_class.units))
 
         # Call QDialog display_info method
         self.forty_eight_hour_dialog.display_info()
@@ -343,32 +834,102 @@ class OWM(QMainWindow, Ui_MainWindow):
     def contextMenuEvent(self, event):
         """ 
             Override the contextMenuEvent
-            Setup a context or right click menu
+            Show the context or right click menu made in init
         """
-        # Creating a menu object with the central widget as parent
-        menu = QMenu(self)
-        # Populating the menu with actions defined in init
-        menu.addAction(self.action_about)
-        menu.addAction(self.action_get_weather)
-        menu.addAction(self.action_exit)
         # Launching the menu
-        menu.exec(event.globalPos())
+        self.context_menu.exec(event.globalPos())
+
+
+#--------------------- COMMAND LINE ARGUMENTS -------------------#
+def get_arguments():
+    """ Parse program arguments, leave the rest for Qt """
+    parser = argparse.ArgumentParser(description="OpenWeatherMap OneCall")
+    parser.add_argument(
+        "--dashboard",
+        nargs="+",
+        metavar="LOCATION",
+        help="show several locations in one window"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=weather_profile.DEFAULT_FOLDER,
+        metavar="FOLDER",
+        help="write cProfile and Chrome trace files for this session"
+    )
+    parser.add_argument(
+        "--service",
+        metavar="URL",
+        help="get weather from a forecast_service.py, http://server:8765"
+    )
+    parser.add_argument(
+        "--no-shared-cache",
+        action="store_true",
+        help="do not share results with other copies of the program"
+    )
+    parser.add_argument(
+        "--units",
+        choices=weather_units.SYSTEMS,
+        default=weather_units.CANONICAL,
+        help="display units, switch with Ctrl+M (default imperial)"
+    )
+    parser.add_argument(
+        "--auto-refresh",
+        action="store_true",
+        help="keep the displayed location up to date, each part of the "
+             "weather on its own interval"
+    )
+    parser.add_argument(
+        "--no-prefetch",
+        action="store_true",
+        help="do not fetch recent and suggested locations in the background"
+    )
+    arguments, qt_arguments = parser.parse_known_args()
+    return arguments, sys.argv[:1] + qt_arguments
 
 
 #--------------------- START APPLICATION -------------------#
 def main():
+    arguments, qt_arguments = get_arguments()
+    # Profile from the start so startup is in the files
+    if arguments.profile:
+        weather_profile.start(arguments.profile)
+    else:
+        weather_profile.start_from_environment()
+    # Every display asks the shared service instead of OpenWeatherMap
+    owm_fetch.SERVICE_URL = arguments.service
+    owm_fetch.cells.max_bytes = CELLS_MEMORY
+    prefetch.ENABLED = not arguments.no_prefetch
+    refresh_policy.AUTO_REFRESH = arguments.auto_refresh
+    # Copies of the program on this computer share recent results
+    if not arguments.no_shared_cache:
+        try:
+            owm_fetch.SHARED_CACHE = shared_cache.SharedCache()
+        except (OSError, ValueError):
+            # Works without it, every copy fetches for itself
+            pass
     # Create application object
-    owm = QApplication(sys.argv)
+    owm = QApplication(qt_arguments)
     # Set a QT style
     owm.setStyle('Fusion')
     # Set colors to darkPalette, from external py file
     owm.setPalette(dark_palette.darkPalette)
     # Create program object
-    window = OWM()
+    if arguments.dashboard:
+        # Import here so the single location window does not need it
+        import dashboard
+        window = dashboard.dashboard_window(
+            arguments.dashboard, units=arguments.units)
+    else:
+        window = OWM()
+        window.action_metric.setChecked(arguments.units == "metric")
     # Make program visible
     window.show()
     # Execute the program, setup clean exit of program
     sys.exit(owm.exec())
 
 
-main()
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,430 @@
+"""
+    Name: owm_fetch.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Network requests for OpenWeatherMap without any GUI code
+    Used by the OneCall class and by background workers
+    Every function raises an exception on failure,
+    the caller decides how to tell the user
+"""
+
+import threading
+import time
+import requests
+import weather_utils
+import weather_units
+# Fastest installed JSON decoder
+import json_codec
+# Keep only the One Call fields the program reads
+import json_projection
+# Share requests between nearby locations
+import cell_cache
+# Reverse geocode offline, geocode_geopy when no place is near
+import place_tree
+# Offline place names, no request for known places
+import place_index
+# Results from the forecast service are encoded like the cache file
+import weather_cache
+# Time every request, count retries
+import weather_metrics
+
+# Seconds to wait for a server before giving up
+TIMEOUT = 10
+
+# Extra tries after a connection error, timeout or server error
+RETRIES = 2
+
+# Seconds an icon is reused, icons never change
+ICON_MAX_AGE = 24 * 60 * 60
+
+# One Call fetch profiles, the parts left out of the response
+# and how many hourly forecasts are kept, None keeps all 48
+# current_12h still downloads 48 hours, One Call cannot send fewer
+FETCH_PROFILES = {
+    "current": {"exclude": "minutely,hourly,daily,alerts", "hours": None},
+    "current_12h": {"exclude": "minutely,daily,alerts", "hours": 12},
+    "full": {"exclude": "minutely", "hours": None}
+}
+# Profiles from the least to the most data, each covers those before it
+PROFILE_ORDER = ("current", "current_12h", "full")
+
+# One requests Session per thread, reuses connections between requests
+_thread_data = threading.local()
+
+# One Call and AQI requests shared by every location in a grid cell
+cells = cell_cache.CellCache()
+
+# Local forecast service, http://server:8765, None asks OpenWeatherMap
+SERVICE_URL = None
+
+# shared_cache.SharedCache used by every copy of the program, None for none
+SHARED_CACHE = None
+
+# location_store.LocationStore of results fetched by this copy, None for none
+# Prefetched locations wait here until they are asked for
+RESULTS = None
+
+# Coordinates of names looked up online, places do not move
+_coordinates = {}
+# Names kept before starting over
+MAX_COORDINATES = 1000
+
+
+#------------------------------- SESSION --------------------------------------------#
+def session():
+    """ Return the requests Session for the current thread """
+    if not hasattr(_thread_data, "session"):
+        _thread_data.session = requests.Session()
+        # Always ask for compressed responses, JSON shrinks about 10 times
+        _thread_data.session.headers["Accept-Encoding"] = "gzip"
+    return _thread_data.session
+
+
+def requests_made():
+    """ HTTP requests made by the current thread, retries included """
+    return getattr(_thread_data, "requests", 0)
+
+
+#------------------------------- GET ------------------------------------------------#
+def _get(endpoint, url, params=None):
+    """
+        GET a url with retries, timed as the endpoint stage
+        Returns the requests Response
+        Raises an exception for status codes other than 200
+    """
+    for attempt in range(RETRIES + 1):
+        _thread_data.requests = requests_made() + 1
+        try:
+            with weather_metrics.span(endpoint):
+                response = session().get(url, params=params, timeout=TIMEOUT)
+            # Only server errors are worth trying again
+            if response.status_code < 500 or attempt == RETRIES:
+                break
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == RETRIES:
+                weather_metrics.count("requests", endpoint=endpoint,
+                                      status="error")
+                raise
+        weather_metrics.count("retries", endpoint=endpoint)
+        # Wait a little longer before each try
+        time.sleep(0.5 * 2 ** attempt)
+    weather_metrics.count("requests", endpoint=endpoint,
+                          status=response.status_code)
+    count_bytes(endpoint, response)
+    # Raise exception if anything other than status code 200
+    response.raise_for_status()
+    return response
+
+
+def count_bytes(endpoint, response):
+    """
+        Count the bytes received for an endpoint, as sent over the
+        network (compressed) and after decompressing
+    """
+    decoded = len(response.content)
+    # Bytes read from the socket, 0 for chunked responses
+    received = response.raw.tell() if response.raw is not None else 0
+    if not received:
+        received = int(response.headers.get("Content-Length", decoded))
+    weather_metrics.count("response_bytes", received, endpoint=endpoint)
+    weather_metrics.count("decoded_bytes", decoded, endpoint=endpoint)
+
+
+#------------------------------- GET COORDINATES ------------------------------------#
+def get_coordinates(location):
+    """
+        Get latitude and longitude for a location name
+        from the place index or OpenWeatherMap current weather
+        Raises place_index.UnknownLocation for names not in the index
+    """
+    # Known places need no request
+    index = place_index.get_index()
+    if index is not None:
+        place = index.lookup(location)
+        if place is not None:
+            weather_metrics.count("geocode", source="place_index")
+            return place[1], place[2]
+        # OpenWeatherMap would not find it either, save the request
+        if place_index.REJECT_UNKNOWN and not index.known_city(location):
+            weather_metrics.count("geocode", source="rejected")
+            raise place_index.UnknownLocation(
+                location, index.did_you_mean(location))
+    # Looked up online before
+    key = weather_cache.location_key(location)
+    if key in _coordinates:
+        weather_metrics.count("geocode", source="cache")
+        return _coordinates[key]
+    weather_metrics.count("geocode", source="owm")
+    # Build the openweathermap api url
+    url = weather_utils.URL + location
+    response = _get("geocode", url)
+    weather_data = json_codec.loads(response.content)
+    # Get latitude and longitude from owm
+    latitude = weather_data.get("coord").get("lat")
+    longitude = weather_data.get("coord").get("lon")
+    if len(_coordinates) >= MAX_COORDINATES:
+        _coordinates.clear()
+    _coordinates[key] = (latitude, longitude)
+    return latitude, longitude
+
+
+#------------------------------- GET ONE CALL ---------------------------------------#
+def get_one_call_bytes(latitude, longitude, profile="full"):
+    """
+        Get one call weather data as JSON bytes, parsed by the caller
+        profile: current, current_12h or full, see FETCH_PROFILES
+    """
+    # Parameters for building the URL
+    weather_params = {
+        "lat": latitude,
+        "lon": longitude,
+        "appid": weather_utils.API_KEY,
+        # Always fetched in one system, weather_units converts for display
+        "units": weather_units.CANONICAL,
+        "exclude": FETCH_PROFILES[profile]["exclude"]
+    }
+    # Make request to API with parameters
+    return _get("one_call", weather_utils.ONE_CALL_URL, weather_params).content
+
+
+def get_one_call(latitude, longitude, fields=weather_utils.ONE_CALL_FIELDS,
+                 profile="full"):
+    """
+        Get one call weather data as python dictionary
+        Only the declared fields are kept, fields=None keeps everything
+    """
+    content = get_one_call_bytes(latitude, longitude, profile)
+    with weather_metrics.span("parse_one_call"):
+        if fields is None:
+            weather_data = json_codec.loads(content)
+        else:
+            weather_data = json_projection.loads_projected(content, fields)
+    return apply_profile(weather_data, profile)
+
+
+def result_profile(result):
+    """ Fetch profile of a result, results saved before profiles are full """
+    return result.get("profile", "full")
+
+
+def covers(result, profile="full"):
+    """ True if a result has everything a fetch profile asks for """
+    return PROFILE_ORDER.index(result_profile(result)) >= \
+        PROFILE_ORDER.index(profile)
+
+
+def _profile_key(location, profile):
+    """ RESULTS key, each profile of a location is kept apart """
+    return f"{profile}|{weather_cache.location_key(location)}"
+
+
+def apply_profile(weather_data, profile):
+    """ Keep only the hourly forecasts of a fetch profile """
+    hours = FETCH_PROFILES[profile]["hours"]
+    if hours is not None and "hourly" in weather_data:
+        weather_data["hourly"] = weather_data["hourly"][:hours]
+    return weather_data
+
+
+#------------------------------- GET AIR QUALITY ------------------------------------#
+def get_air_quality_bytes(latitude, longitude):
+    """ Get air pollution data as JSON bytes, parsed by the caller """
+    params = {
+        "lat": latitude,
+        "lon": longitude
+    }
+    return _get("air_quality", weather_utils.OWM_AQI_ENDPOINT, params).content
+
+
+def get_air_quality(latitude, longitude):
+    """ Get air pollution data as python dictionary """
+    return json_codec.loads(get_air_quality_bytes(latitude, longitude))
+
+
+def get_air_quality_forecast(latitude, longitude):
+    """ Get the hourly air pollution forecast as python dictionary """
+    params = {
+        "lat": latitude,
+        "lon": longitude
+    }
+    return json_codec.loads(_get(
+        "air_quality_forecast", weather_utils.OWM_AQI_FORECAST_ENDPOINT,
+        params).content)
+
+
+def get_air_quality_history(latitude, longitude, start, end):
+    """
+        Get hourly air pollution between two Unix times
+        as python dictionary
+    """
+    params = {
+        "lat": latitude,
+        "lon": longitude,
+        "start": int(start),
+        "end": int(end)
+    }
+    return json_codec.loads(_get(
+        "air_quality_history", weather_utils.OWM_AQI_HISTORY_ENDPOINT,
+        params).content)
+
+
+#------------------------------- GET WEATHER ICON -----------------------------------#
+def get_weather_icon(icon_id):
+    """ Get the png data for an OWM weather icon """
+    weather_icon_url = weather_utils.ICON_URL.format(icon_id=icon_id)
+    # Get the data from the weather icon url
+    return _get("icon", weather_icon_url).content
+
+
+#------------------------------- SHARED BY GRID CELL --------------------------------#
+def get_one_call_for_cell(latitude, longitude, max_age=None, profile="full",
+                          timed=False):
+    """
+        One Call weather shared by every location in the grid cell
+        timed returns (weather data, Unix time it was fetched)
+    """
+    if profile == "full":
+        return cells.get("one_call", latitude, longitude, get_one_call,
+                         max_age=max_age, timed=timed)
+    # Each profile is shared separately
+    return cells.get(f"one_call_{profile}", latitude, longitude,
+                     lambda latitude, longitude: get_one_call(
+                         latitude, longitude, profile=profile),
+                     max_age=max_age, timed=timed)
+
+
+def get_air_quality_for_cell(latitude, longitude, max_age=None, timed=False):
+    """
+        Air pollution shared by every location in the grid cell
+        timed returns (air pollution data, Unix time it was fetched)
+    """
+    return cells.get("air_quality", latitude, longitude, get_air_quality,
+                     max_age=max_age, timed=timed)
+
+
+def get_air_quality_forecast_for_cell(latitude, longitude, max_age=None):
+    """ Air pollution forecast shared by every location in the grid cell """
+    return cells.get("air_quality_forecast", latitude, longitude,
+                     get_air_quality_forecast, max_age=max_age)
+
+
+def get_weather_icon_shared(icon_id):
+    """ Weather icon png data, requested once for each icon """
+    return cells.run(("icon", icon_id), get_weather_icon, icon_id,
+                     max_age=ICON_MAX_AGE)
+
+
+#------------------------------- GET ADDRESS ----------------------------------------#
+def get_address(latitude, longitude):
+    """ Reverse geocode lat and lon to an address string """
+    # Nearest place from the offline tree, or geopy Nominatim
+    with weather_metrics.span("reverse_geocode"):
+        address = place_tree.reverse_geocode(latitude, longitude)
+    # No place close by and Nominatim turned off
+    if address is None:
+        return ""
+    return f"{address}"
+
+
+#------------------------------- FORECAST SERVICE -----------------------------------#
+def fetch_from_service(location, max_age=None):
+    """
+        Get a fetch_weather() result from the forecast service
+        Raises place_index.UnknownLocation like get_coordinates()
+    """
+    params = {"location": location}
+    if max_age is not None:
+        params["max_age"] = max_age
+    try:
+        response = _get("service", SERVICE_URL.rstrip("/") + "/weather",
+                        params)
+    except requests.HTTPError as e:
+        # The service sends the suggestions for an unknown location
+        if e.response is not None and e.response.status_code == 404:
+            try:
+                suggestions = json_codec.loads(
+                    e.response.content).get("suggestions")
+            except (ValueError, AttributeError):
+                suggestions = None
+            if suggestions is not None:
+                raise place_index.UnknownLocation(
+                    location, suggestions) from e
+        raise
+    return weather_cache.decode_result(json_codec.loads(response.content))
+
+
+#------------------------------- FETCH WEATHER --------------------------------------#
+def fetch_weather(location, latitude=None, longitude=None, max_age=None,
+                  profile="full"):
+    """
+        Get everything the main window displays for a location
+        Returns a dictionary that OneCall.load_result() understands
+        Pass latitude and longitude to skip looking up the location
+        max_age: seconds a result shared by the grid cell can be reused
+        profile: how much of the One Call forecast to fetch
+        Comes from the forecast service when SERVICE_URL is set
+    """
+    # Another copy of the program may have fetched it already
+    result = cached_result(location, max_age, profile)
+    if result is not None:
+        return result
+    if SERVICE_URL:
+        result = fetch_from_service(location, max_age)
+    else:
+        result = fetch_from_owm(location, latitude, longitude, max_age,
+                                profile)
+    share_result(result)
+    return result
+
+
+def cached_result(location, max_age=None, profile="full"):
+    """
+        A fresh result fetched by this copy or from the shared cache
+        with at least the data of profile, None if there is none
+        A current only result never answers for a full one
+    """
+    if max_age is None:
+        max_age = cells.max_age
+    # The profile asked for, then the ones with more data
+    for covering in PROFILE_ORDER[PROFILE_ORDER.index(profile):]:
+        result = None
+        if RESULTS is not None:
+            result = RESULTS.get(_profile_key(location, covering), max_age)
+        if result is None and SHARED_CACHE is not None:
+            result = SHARED_CACHE.get(location, max_age, covering)
+        if result is not None:
+            return result
+    return None
+
+
+def share_result(result):
+    """ Keep a result for this copy and the other copies """
+    if RESULTS is not None:
+        RESULTS.put(_profile_key(result["location"], result_profile(result)),
+                    result)
+    if SHARED_CACHE is not None:
+        SHARED_CACHE.put(result)
+
+
+def fetch_from_owm(location, latitude=None, longitude=None, max_age=None,
+                   profile="full"):
+    """ fetch_weather() straight from OpenWeatherMap, never the service """
+    if latitude is None or longitude is None:
+        latitude, longitude = get_coordinates(location)
+    # The grid cell may have fetched it up to max_age ago
+    weather_data, fetched = get_one_call_for_cell(
+        latitude, longitude, max_age, profile, timed=True)
+    icon_id = weather_data.get("current").get("weather")[0].get("icon")
+    return {
+        "location": location,
+        "latitude": latitude,
+        "longitude": longitude,
+        "address": get_address(latitude, longitude),
+        "weather_data": weather_data,
+        "aqi_data": get_air_quality_for_cell(latitude, longitude, max_age),
+        "icon_data": get_weather_icon_shared(icon_id),
+        # Unix time the weather data was fetched, used for staleness
+        "fetched": fetched,
+        # How much of the forecast there is, see covers()
+        "profile": profile
+    }
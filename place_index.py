@@ -0,0 +1,321 @@
+"""
+    Name: place_index.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Offline place names for autocomplete and geocoding
+    places.idx is built once from a city list dump and bundled with the
+    program, known places are found without a network request
+        python place_index.py build cities500.txt      GeoNames dump
+        python place_index.py build city.list.json.gz  OpenWeatherMap list
+        python place_index.py search "Scotts"
+    Build also writes places.kdt for place_tree.py reverse geocoding
+    Names are kept as sorted keys, every place that starts with what was
+    typed is next to each other, so a prefix is found with bisect
+    The file is memory mapped, nothing is read until it is searched
+    Build it from the OpenWeatherMap city list, the same places
+    OpenWeatherMap can find, then names that are not in it are rejected
+    without a request, set REJECT_UNKNOWN to False for a partial list
+"""
+
+import argparse
+import bisect
+import csv
+import gzip
+import heapq
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import zipfile
+from array import array
+# location_key() to match location names
+import weather_cache
+
+# Index bundled next to the program
+PLACES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "places.idx")
+
+# File header: magic, places, keys
+MAGIC = b"OWMPLC01"
+HEADER = struct.Struct("<8sII")
+
+# Suggestions shown while typing
+SUGGESTIONS = 10
+# Characters typed before suggestions are shown
+MIN_PREFIX = 2
+
+# Locations whose city is not in the index are not looked up online
+REJECT_UNKNOWN = True
+
+
+class UnknownLocation(LookupError):
+    """ A location that is not in the place index """
+
+    def __init__(self, location, suggestions):
+        self.location = location
+        self.suggestions = suggestions
+        super().__init__(f"{location} is not a known place")
+
+
+def _key(text):
+    """ Search key of a name, same as weather_cache.location_key() """
+    return weather_cache.location_key(text).encode("utf-8")
+
+
+class _Strings:
+    """ Sequence of strings in a blob with an offsets column, for bisect """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]])
+
+
+class PlaceIndex:
+    """ Places and sorted name keys from a memory mapped places.idx """
+
+    def __init__(self, file_name=PLACES_FILE):
+        with open(file_name, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.map)
+        magic, places, keys = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{file_name} is not a place index")
+        self.sections = {}
+        offset = HEADER.size
+        # Columns, each one starts after the last
+        for name, code, count in (
+                ("latitude", "f", places), ("longitude", "f", places),
+                ("population", "I", places), ("name_offsets", "I", places + 1),
+                ("key_offsets", "I", keys + 1), ("key_places", "I", keys)):
+            size = array(code).itemsize * count
+            self.sections[name] = view[offset:offset + size].cast(code)
+            offset += size
+        names_size = self.sections["name_offsets"][-1]
+        self.names = _Strings(self.sections["name_offsets"],
+                              view[offset:offset + names_size])
+        offset += names_size
+        self.keys = _Strings(self.sections["key_offsets"],
+                             view[offset:offset + self.sections["key_offsets"][-1]])
+        self.latitude = self.sections["latitude"]
+        self.longitude = self.sections["longitude"]
+        self.population = self.sections["population"]
+        self.key_places = self.sections["key_places"]
+
+    def __len__(self):
+        return len(self.latitude)
+
+    def place(self, index):
+        """ Return (name, latitude, longitude) of a place """
+        return (self.names[index].decode("utf-8"),
+                round(self.latitude[index], 4), round(self.longitude[index], 4))
+
+#----------------------------- SEARCH -----------------------------------------------#
+    def _range(self, prefix):
+        """ First and last + 1 key that starts with prefix """
+        first = bisect.bisect_left(self.keys, prefix)
+        # Every key that starts with prefix sorts before prefix + 0xff
+        last = bisect.bisect_left(self.keys, prefix + b"\xff", first)
+        return first, last
+
+    def lookup(self, location):
+        """
+            (name, latitude, longitude) of a location, None if unknown
+            The biggest place wins when several have the same name
+        """
+        key = _key(location)
+        first, last = self._range(key)
+        best = None
+        for index in range(first, last):
+            if self.keys[index] != key:
+                break
+            place = self.key_places[index]
+            if best is None or self.population[place] > self.population[best]:
+                best = place
+        return None if best is None else self.place(best)
+
+    def suggest(self, text, count=SUGGESTIONS):
+        """ Names of the biggest places that start with text """
+        first, last = self._range(_key(text))
+        places = {self.key_places[index] for index in range(first, last)}
+        biggest = heapq.nlargest(count, places, key=self.population.__getitem__)
+        return [self.names[place].decode("utf-8") for place in biggest]
+
+    def known_city(self, location):
+        """ True if any place name starts with the city part of a location """
+        city = _key(location.split(",")[0])
+        first, last = self._range(city)
+        return first < last
+
+    def did_you_mean(self, location, count=5):
+        """ Suggestions for an unknown location, shorter prefixes until found """
+        city = location.split(",")[0].strip()
+        for length in range(len(city), 0, -1):
+            suggestions = self.suggest(city[:length], count)
+            if suggestions:
+                return suggestions
+        return []
+
+    def close(self):
+        for section in self.sections.values():
+            section.release()
+        self.names.blob.release()
+        self.keys.blob.release()
+        self.map.close()
+
+
+#----------------------------- SHARED INDEX -----------------------------------------#
+_index = None
+_loaded = False
+
+
+def get_index():
+    """ The bundled PlaceIndex, None if places.idx is missing """
+    global _index, _loaded
+    if not _loaded:
+        _loaded = True
+        try:
+            _index = PlaceIndex()
+        except (OSError, ValueError):
+            # Without the index every location is looked up online
+            _index = None
+    return _index
+
+
+#----------------------------- BUILD ------------------------------------------------#
+def _open_text(file_name):
+    """ Open a dump as text, zip and gzip files are read as they are """
+    if file_name.endswith(".zip"):
+        archive = zipfile.ZipFile(file_name)
+        member = [name for name in archive.namelist()
+                  if not name.lower().startswith("readme")][0]
+        return io.TextIOWrapper(archive.open(member), encoding="utf-8")
+    if file_name.endswith(".gz"):
+        return gzip.open(file_name, "rt", encoding="utf-8")
+    return open(file_name, encoding="utf-8")
+
+
+def _display_name(city, state, country):
+    """ City, ST, CC like OpenWeatherMap expects, states only in the US """
+    if country == "US" and state:
+        return f"{city}, {state}, {country}"
+    return f"{city}, {country}"
+
+
+def read_geonames(file_name):
+    """
+        Yield (name, other names, latitude, longitude, population)
+        from a GeoNames cities500.txt style dump
+    """
+    with _open_text(file_name) as file:
+        for row in csv.reader(file, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if len(row) < 15:
+                continue
+            country, state = row[8], row[10]
+            # The ASCII name lets Sao Paulo find São Paulo
+            yield (_display_name(row[1], state, country),
+                   [_display_name(row[2], state, country)],
+                   float(row[4]), float(row[5]), int(row[14] or 0))
+
+
+def read_owm(file_name):
+    """ Yield places from an OpenWeatherMap city.list.json """
+    with _open_text(file_name) as file:
+        for city in json.load(file):
+            yield (_display_name(city["name"], city.get("state", ""),
+                                 city.get("country", "")),
+                   [], city["coord"]["lat"], city["coord"]["lon"], 0)
+
+
+def build(places, file_name=PLACES_FILE):
+    """
+        Write an index of (name, other names, latitude, longitude,
+        population), returns the number of places
+        Each place is found by its name and by City, CC without a state
+    """
+    latitude, longitude, population = array("f"), array("f"), array("I")
+    names = []
+    keys = []
+    for name, other_names, place_latitude, place_longitude, people in places:
+        index = len(names)
+        names.append(name.encode("utf-8"))
+        latitude.append(place_latitude)
+        longitude.append(place_longitude)
+        population.append(min(people, 0xFFFFFFFF))
+        parts = [part.strip() for part in name.split(",")]
+        aliases = {name} | set(other_names)
+        # Scottsbluff, NE and Scottsbluff, US find Scottsbluff, NE, US
+        if len(parts) == 3:
+            for alias in [name] + list(other_names):
+                city = alias.split(",")[0]
+                aliases |= {f"{city}, {parts[1]}", f"{city}, {parts[2]}"}
+        for alias in aliases:
+            keys.append((_key(alias), index))
+    keys.sort()
+
+    def offsets(strings):
+        column = array("I", [0])
+        for string in strings:
+            column.append(column[-1] + len(string))
+        return column
+
+    with open(file_name + ".tmp", "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(names), len(keys)))
+        for column in (latitude, longitude, population, offsets(names),
+                       offsets(key for key, _ in keys),
+                       array("I", (index for _, index in keys))):
+            column.tofile(file)
+        file.write(b"".join(names))
+        file.write(b"".join(key for key, _ in keys))
+    os.replace(file_name + ".tmp", file_name)
+    return len(names)
+
+
+#----------------------------- COMMAND LINE -----------------------------------------#
+def get_arguments():
+    parser = argparse.ArgumentParser(description="Offline place name index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_command = commands.add_parser(
+        "build", help="build places.idx and places.kdt from a GeoNames "
+                      "or OpenWeatherMap dump")
+    build_command.add_argument(
+        "dump", help="cities500.txt, cities15000.zip or city.list.json.gz")
+    build_command.add_argument(
+        "--output", default=PLACES_FILE, help="index file (default places.idx)")
+    search_command = commands.add_parser("search", help="suggest place names")
+    search_command.add_argument("text", help="start of a place name")
+    return parser.parse_args()
+
+
+def main():
+    arguments = get_arguments()
+    if arguments.command == "build":
+        reader = read_owm if ".json" in arguments.dump else read_geonames
+        count = build(reader(arguments.dump), arguments.output)
+        print(f"{count:,} places, {os.path.getsize(arguments.output):,} bytes "
+              f"in {arguments.output}")
+        # Import here, place_tree needs this module for the names
+        import place_tree
+        tree_file = os.path.splitext(arguments.output)[0] + ".kdt"
+        place_tree.build(PlaceIndex(arguments.output), tree_file)
+        print(f"Reverse geocoding tree, {os.path.getsize(tree_file):,} bytes "
+              f"in {tree_file}")
+        return
+    index = get_index()
+    if index is None:
+        sys.exit(f"No place index, build {PLACES_FILE} first")
+    for name in index.suggest(arguments.text):
+        print(name, index.lookup(name)[1:])
+
+
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
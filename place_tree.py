@@ -0,0 +1,226 @@
+"""
+    Name: place_tree.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Offline reverse geocoding, the nearest place to a latitude
+    and longitude from the places in places.idx
+    Places are points on a unit sphere, x, y, z, so distances work
+    across the poles and the date line, kept as a KD-tree in places.kdt
+    The tree is implicit, the middle point of a range splits it and
+    its halves follow, so the file is only columns with no pointers
+    and is memory mapped, startup reads nothing
+        python place_index.py build city.list.json.gz   builds both files
+        python place_tree.py 41.8666 -103.6672
+    Nominatim is only asked when no place is within MAX_KM
+"""
+
+import argparse
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+# Names of the places
+import place_index
+# Count offline and Nominatim addresses
+import weather_metrics
+
+# Tree bundled next to the program
+TREE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "places.kdt")
+
+# File header: magic, points
+MAGIC = b"OWMKDT01"
+HEADER = struct.Struct("<8sI")
+
+# Mean radius of the Earth
+EARTH_KM = 6371.0
+# Farther than this, ask Nominatim for an address
+MAX_KM = 50
+# Set False to never ask Nominatim
+NOMINATIM_FALLBACK = True
+
+
+def to_xyz(latitude, longitude):
+    """ Point on the unit sphere of a latitude and longitude """
+    latitude = math.radians(latitude)
+    longitude = math.radians(longitude)
+    return (math.cos(latitude) * math.cos(longitude),
+            math.cos(latitude) * math.sin(longitude),
+            math.sin(latitude))
+
+
+def chord_to_km(chord):
+    """ Distance along the surface for a straight line between points """
+    return 2 * EARTH_KM * math.asin(min(chord / 2, 1.0))
+
+
+class PlaceTree:
+    """ Memory mapped KD-tree of places.kdt, names from a PlaceIndex """
+
+    def __init__(self, file_name=TREE_FILE, index=None):
+        with open(file_name, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.map)
+        magic, count = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{file_name} is not a place tree")
+        self.columns = []
+        offset = HEADER.size
+        # x, y, z in tree order, then the place of each point
+        for code in ("f", "f", "f", "I"):
+            size = array(code).itemsize * count
+            self.columns.append(view[offset:offset + size].cast(code))
+            offset += size
+        self.axes = self.columns[:3]
+        self.places = self.columns[3]
+        self.index = index or place_index.get_index()
+        if self.index is None:
+            raise ValueError("places.kdt needs places.idx for the names")
+
+    def __len__(self):
+        return len(self.places)
+
+#----------------------------- NEAREST ----------------------------------------------#
+    def nearest_point(self, latitude, longitude):
+        """ Return (tree position, chord distance) of the nearest point """
+        query = to_xyz(latitude, longitude)
+        axes = self.axes
+        best, best_distance = -1, math.inf
+        # (first, last, axis) ranges of the tree still to search
+        stack = [(0, len(self.places), 0)]
+        while stack:
+            first, last, axis = stack.pop()
+            if first >= last:
+                continue
+            middle = (first + last) // 2
+            distance = sum((query[k] - axes[k][middle]) ** 2 for k in range(3))
+            if distance < best_distance:
+                best, best_distance = middle, distance
+            difference = query[axis] - axes[axis][middle]
+            near = (first, middle, (axis + 1) % 3)
+            far = (middle + 1, last, (axis + 1) % 3)
+            if difference > 0:
+                near, far = far, near
+            # The far half can only be nearer if the split plane is
+            if difference * difference < best_distance:
+                stack.append(far)
+            stack.append(near)
+        return best, math.sqrt(best_distance)
+
+    def nearest(self, latitude, longitude, max_km=MAX_KM):
+        """
+            (name, kilometers) of the nearest place
+            None if there is no place within max_km
+        """
+        if not len(self.places):
+            return None
+        point, chord = self.nearest_point(latitude, longitude)
+        kilometers = chord_to_km(chord)
+        if max_km is not None and kilometers > max_km:
+            return None
+        name = self.index.place(self.places[point])[0]
+        return name, kilometers
+
+    def close(self):
+        for column in self.columns:
+            column.release()
+        self.map.close()
+
+
+#----------------------------- SHARED TREE ------------------------------------------#
+_tree = None
+_loaded = False
+# Nominatim requests of each thread, see nominatim_requests()
+_thread_data = threading.local()
+
+
+def get_tree():
+    """ The bundled PlaceTree, None if places.kdt or places.idx is missing """
+    global _tree, _loaded
+    if not _loaded:
+        _loaded = True
+        try:
+            _tree = PlaceTree()
+        except (OSError, ValueError):
+            # Without the tree every address comes from Nominatim
+            _tree = None
+    return _tree
+
+
+def reverse_geocode(latitude, longitude):
+    """
+        Name of the nearest place, offline if the tree has one close by
+        Returns None if there is none and Nominatim is turned off
+    """
+    tree = get_tree()
+    if tree is not None:
+        place = tree.nearest(latitude, longitude)
+        if place is not None:
+            weather_metrics.count("reverse_geocode", source="place_tree")
+            return place[0]
+    if not NOMINATIM_FALLBACK:
+        return None
+    weather_metrics.count("reverse_geocode", source="nominatim")
+    _thread_data.nominatim = nominatim_requests() + 1
+    # Import here so the offline tree does not need geopy
+    import geocode_geopy
+    return geocode_geopy.reverse_geocode(latitude, longitude)
+
+
+def nominatim_requests():
+    """ Nominatim requests made by the current thread """
+    return getattr(_thread_data, "nominatim", 0)
+
+
+#----------------------------- BUILD ------------------------------------------------#
+def build(index, file_name=TREE_FILE):
+    """ Write the KD-tree of every place in a PlaceIndex """
+    points = [to_xyz(index.latitude[place], index.longitude[place]) + (place,)
+              for place in range(len(index))]
+    # Sort each range on its axis, the middle point splits it
+    # A stack instead of recursion, trees of many places are deep
+    stack = [(0, len(points), 0)]
+    while stack:
+        first, last, axis = stack.pop()
+        if last - first <= 1:
+            continue
+        points[first:last] = sorted(points[first:last],
+                                    key=lambda point: point[axis])
+        middle = (first + last) // 2
+        stack.append((first, middle, (axis + 1) % 3))
+        stack.append((middle + 1, last, (axis + 1) % 3))
+
+    with open(file_name + ".tmp", "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(points)))
+        for axis in range(3):
+            array("f", (point[axis] for point in points)).tofile(file)
+        array("I", (point[3] for point in points)).tofile(file)
+    os.replace(file_name + ".tmp", file_name)
+    return len(points)
+
+
+#----------------------------- COMMAND LINE -----------------------------------------#
+def get_arguments():
+    parser = argparse.ArgumentParser(
+        description="Nearest place to a latitude and longitude, offline")
+    parser.add_argument("latitude", type=float)
+    parser.add_argument("longitude", type=float)
+    return parser.parse_args()
+
+
+def main():
+    arguments = get_arguments()
+    tree = get_tree()
+    if tree is None:
+        sys.exit("No place tree, run place_index.py build first")
+    place = tree.nearest(arguments.latitude, arguments.longitude, None)
+    print(f"{place[0]}, {place[1]:.1f} km")
+
+
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+    Name: prefetch.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Fetch the locations a user is likely to ask for next
+    Recent locations and the places suggested while typing are fetched
+    in a background thread at the lowest priority, pressing Enter on
+    one of them shows it from owm_fetch.RESULTS without waiting
+    A token bucket keeps prefetching within a share of the API budget,
+    a location that does not fit the budget is skipped, not delayed
+    Each location takes REQUESTS_PER_LOCATION up front, then the requests
+    it actually made are settled, icons and geocodes included
+    Nominatim addresses have a bucket of their own, its usage policy
+    is much stricter than the OpenWeatherMap budget
+"""
+
+import queue
+import threading
+import time
+from PySide6 import QtCore
+import owm_fetch
+# Nominatim requests made by the prefetch thread
+import place_tree
+import weather_cache
+import weather_metrics
+
+# Requests per minute prefetching may use, OpenWeatherMap allows 60
+RATE_PER_MINUTE = 10
+# Requests that can be used at once after a quiet time
+BURST = 15
+# Requests a location usually costs, geocode, One Call and air pollution
+# Taken before the fetch, the difference is settled after it
+REQUESTS_PER_LOCATION = 3
+# Nominatim reverse geocodes per minute prefetching may use,
+# only places far from every place in places.kdt need one
+NOMINATIM_PER_MINUTE = 2
+NOMINATIM_BURST = 2
+
+# Set False to turn prefetching off, --no-prefetch
+ENABLED = True
+
+
+class TokenBucket:
+    """ Allow rate tokens a second, up to capacity at once, thread safe """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        """ Add the tokens since the last use, the lock is held """
+        now = time.monotonic()
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, tokens=1):
+        """ Use tokens if there are enough, returns False if not """
+        with self.lock:
+            self._refill()
+            if self.tokens < tokens:
+                return False
+            self.tokens -= tokens
+            return True
+
+    def charge(self, tokens):
+        """
+            Use tokens already spent, the bucket can go below 0
+            and takes longer to refill, negative tokens give some back
+        """
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - tokens)
+
+
+class prefetch_worker(QtCore.QThread):
+    """
+        Fetch requested locations one at a time in the background
+        The newest request is fetched first, it is the most likely
+    """
+
+    def __init__(self, budget=None, max_age=None, parent=None):
+        super().__init__(parent)
+        self.budget = budget or TokenBucket(RATE_PER_MINUTE / 60, BURST)
+        self.nominatim = TokenBucket(NOMINATIM_PER_MINUTE / 60,
+                                     NOMINATIM_BURST)
+        self.max_age = max_age
+        self.queue = queue.LifoQueue()
+        # Location keys waiting in the queue
+        self.pending = set()
+        self.lock = threading.Lock()
+
+    def start_low(self):
+        """ Start at the lowest priority so the GUI always comes first """
+        self.start(QtCore.QThread.LowestPriority)
+
+    def request(self, locations):
+        """
+            Prefetch locations, the last one is fetched first
+            Locations already waiting are skipped, fresh ones are
+            skipped when their turn comes
+        """
+        for location in locations:
+            key = weather_cache.location_key(location)
+            with self.lock:
+                if key in self.pending:
+                    continue
+                self.pending.add(key)
+            self.queue.put(location)
+
+    def request_recent(self, skip=None):
+        """ Prefetch the saved locations, except skip """
+        skip = weather_cache.location_key(skip) if skip else None
+        recent = [location for location in weather_cache.recent_locations()
+                  if weather_cache.location_key(location) != skip]
+        # The most recent is fetched first
+        self.request(reversed(recent))
+
+    def run(self):
+        """ Runs in the worker thread until stop() """
+        while True:
+            location = self.queue.get()
+            if location is None:
+                break
+            with self.lock:
+                self.pending.discard(weather_cache.location_key(location))
+            try:
+                if owm_fetch.cached_result(location, self.max_age) is not None:
+                    weather_metrics.count("prefetch", result="fresh")
+                    continue
+                # A location may need a Nominatim address, keep one
+                if not self.nominatim.take(1):
+                    weather_metrics.count("prefetch", result="over_budget")
+                    continue
+                if not self.budget.take(REQUESTS_PER_LOCATION):
+                    self.nominatim.charge(-1)
+                    weather_metrics.count("prefetch", result="over_budget")
+                    continue
+                made = owm_fetch.requests_made()
+                nominatim = place_tree.nominatim_requests()
+                try:
+                    with weather_metrics.span("prefetch"):
+                        # Kept in owm_fetch.RESULTS by share_result()
+                        owm_fetch.fetch_weather(location, max_age=self.max_age)
+                finally:
+                    # Settle what the location really cost
+                    self.budget.charge(owm_fetch.requests_made() - made -
+                                       REQUESTS_PER_LOCATION)
+                    self.nominatim.charge(
+                        place_tree.nominatim_requests() - nominatim - 1)
+                weather_metrics.count("prefetch", result="fetched")
+            except Exception:
+                # Only a guess, the user never sees it fail
+                weather_metrics.count("prefetch", result="failed")
+
+    def stop(self):
+        """ Stop after the location being fetched """
+        self.queue.put(None)
+        self.wait()
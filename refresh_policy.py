@@ -0,0 +1,44 @@
+"""
+    Name: refresh_policy.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: How often each section of the form is fetched again
+    The address never changes, icons and air quality change about
+    once an hour, the current weather about every 10 minutes
+    A refresh only fetches the sections whose interval has expired,
+    the form keeps showing the others
+    python one_call_qt.py --auto-refresh   refreshes an unattended display
+"""
+
+import time
+
+# Seconds a section is shown before it is fetched again, None for never
+INTERVALS = {
+    "address": None,
+    "current": 10 * 60,
+    "icon": 60 * 60,
+    "air_quality": 60 * 60
+}
+
+# Milliseconds between checks for sections to refresh
+CHECK_INTERVAL = 60 * 1000
+
+# Set True to refresh the displayed location on its own, --auto-refresh
+AUTO_REFRESH = False
+
+
+def due(fetched, now=None):
+    """
+        Names of the sections that need fetching
+        fetched: section name -> Unix time it was fetched
+        Sections never fetched are always due
+    """
+    if now is None:
+        now = time.time()
+    names = []
+    for name, interval in INTERVALS.items():
+        if name not in fetched:
+            names.append(name)
+        elif interval is not None and now - fetched[name] >= interval:
+            names.append(name)
+    return names
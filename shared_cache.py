@@ -0,0 +1,203 @@
+"""
+    Name: shared_cache.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Share recent weather results between copies of the program
+    on the same computer, a terminal server runs many copies
+    Results live in a memory mapped file with a fixed number of slots,
+    so its size is bounded, the least recently used slot is replaced
+    A lock file keeps copies from writing over each other
+    Results are stored with marshal, which loads much faster than JSON,
+    the file is only read by this Python on this computer
+"""
+
+import contextlib
+import marshal
+import mmap
+import os
+import struct
+import threading
+import time
+# CACHE_DIR and location_key()
+import weather_cache
+import weather_metrics
+
+# Lock the whole cache with fcntl, or msvcrt on Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Cache file and its lock file
+CACHE_FILE = os.path.join(weather_cache.CACHE_DIR, "shared_cache.mmap")
+
+# Slots and bytes per slot, 64 x 128 KB = 8 MB
+SLOTS = 64
+SLOT_SIZE = 128 * 1024
+
+# File header: magic, marshal version, slots, slot size, use counter
+MAGIC = b"OWMSHM02"
+HEADER = struct.Struct("<8sIIIQ")
+# Slot header: profile and location key, stored time, fetched time, last use, length
+SLOT_HEADER = struct.Struct("<120sddQI")
+# Longest location key that fits in a slot header
+MAX_KEY = 120
+
+
+class SharedCache:
+    def __init__(self, file_name=CACHE_FILE, slots=SLOTS, slot_size=SLOT_SIZE):
+        self.file_name = file_name
+        self.slots = slots
+        self.slot_size = slot_size
+        # Bytes a result can use after the slot header
+        self.max_payload = slot_size - SLOT_HEADER.size
+        size = HEADER.size + slots * slot_size
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        # File locks do not keep threads of one process apart
+        self.thread_lock = threading.Lock()
+        self.lock_file = open(file_name + ".lock", "a+b")
+        with self.lock():
+            # Create the file if needed, then open it for reading and writing
+            open(file_name, "ab").close()
+            self.file = open(file_name, "r+b")
+            # A new file, or one made with other settings, starts empty
+            self.file.seek(0)
+            header = self.file.read(HEADER.size)
+            expected = (MAGIC, marshal.version, slots, slot_size)
+            if len(header) < HEADER.size or \
+                    HEADER.unpack(header)[:4] != expected or \
+                    os.path.getsize(file_name) != size:
+                self.file.truncate(0)
+                self.file.truncate(size)
+                self.file.seek(0)
+                self.file.write(HEADER.pack(*expected, 0))
+                self.file.flush()
+            self.map = mmap.mmap(self.file.fileno(), size)
+
+#----------------------------- LOCK -------------------------------------------------#
+    @contextlib.contextmanager
+    def lock(self):
+        """ Lock the cache for this thread, waits for other copies """
+        self.thread_lock.acquire()
+        if fcntl is not None:
+            fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            self.lock_file.seek(0)
+            msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                self.lock_file.seek(0)
+                msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            self.thread_lock.release()
+
+#----------------------------- SLOTS ------------------------------------------------#
+    def _offset(self, slot):
+        return HEADER.size + slot * self.slot_size
+
+    def _slot(self, slot):
+        """ Return (key, stored, fetched, last use, length) of a slot """
+        key, stored, fetched, used, length = SLOT_HEADER.unpack_from(
+            self.map, self._offset(slot))
+        return key.rstrip(b"\0"), stored, fetched, used, length
+
+    def _tick(self):
+        """ Next value of the use counter, newer uses are bigger """
+        header = HEADER.unpack_from(self.map, 0)
+        counter = header[4] + 1
+        HEADER.pack_into(self.map, 0, *header[:4], counter)
+        return counter
+
+    def _find(self, key):
+        """ Slot holding a key, None if it is not cached """
+        for slot in range(self.slots):
+            if self._slot(slot)[0] == key:
+                return slot
+        return None
+
+    @staticmethod
+    def _key(location, profile):
+        """ Each fetch profile of a location has its own slot """
+        key = f"{profile}|{weather_cache.location_key(location)}"
+        return key.encode("utf-8")[:MAX_KEY]
+
+#----------------------------- GET AND PUT ------------------------------------------#
+    def get(self, location, max_age=600, profile="full"):
+        """
+            The cached result for a location fetched with profile,
+            None if missing or too old
+        """
+        key = self._key(location, profile)
+        with self.lock():
+            slot = self._find(key)
+            payload = None
+            if slot is not None:
+                _, stored, fetched, _, length = self._slot(slot)
+                if time.time() - fetched < max_age:
+                    # Touch the slot so it is the last to be replaced
+                    offset = self._offset(slot)
+                    SLOT_HEADER.pack_into(self.map, offset, key, stored,
+                                          fetched, self._tick(), length)
+                    start = offset + SLOT_HEADER.size
+                    payload = self.map[start:start + length]
+        result = None
+        if payload is not None:
+            # Load outside the lock, other copies keep going
+            try:
+                result = marshal.loads(payload)
+            except (ValueError, EOFError, TypeError):
+                pass
+            # Long names cut to MAX_KEY can share a slot, check the result
+            if result is not None and (
+                    weather_cache.location_key(result["location"]) !=
+                    weather_cache.location_key(location) or
+                    result.get("profile", "full") != profile):
+                result = None
+        weather_metrics.count("cache", cache="shared",
+                              result="miss" if result is None else "hit")
+        return result
+
+    def put(self, result):
+        """
+            Cache a result from owm_fetch.fetch_weather()
+            Returns False if it is too big for a slot
+        """
+        payload = marshal.dumps(result)
+        if len(payload) > self.max_payload:
+            return False
+        # Results from before fetch profiles are full
+        key = self._key(result["location"], result.get("profile", "full"))
+        with self.lock():
+            slot = self._find(key)
+            if slot is None:
+                # Replace the least recently used slot, empty slots are 0
+                slot = min(range(self.slots),
+                           key=lambda slot: self._slot(slot)[3])
+            offset = self._offset(slot)
+            start = offset + SLOT_HEADER.size
+            self.map[start:start + len(payload)] = payload
+            SLOT_HEADER.pack_into(self.map, offset, key, time.time(),
+                                  result["fetched"], self._tick(),
+                                  len(payload))
+        return True
+
+    def stats(self):
+        """ Return a dictionary of slots used and bytes cached """
+        with self.lock():
+            slots = [self._slot(slot) for slot in range(self.slots)]
+        used = [slot for slot in slots if slot[0]]
+        return {
+            "slots": self.slots,
+            "used": len(used),
+            "bytes": sum(slot[4] for slot in used),
+            "file_bytes": len(self.map)
+        }
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+        self.lock_file.close()
@@ -0,0 +1,159 @@
+"""
+    Name: signage_render.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Render the weather panel to PNG files for digital signage
+    Runs on the Qt offscreen platform, no window or display is needed
+    One panel from QT Designer is built once and reused for every tile,
+    weather icons and wind arrows are drawn once and cached by OneCall
+    Locations are fetched in a shared pool while tiles are rendered
+    python signage_render.py locations.txt --folder tiles
+    The locations file is the same as for batch_sweep.py
+"""
+
+import argparse
+import os
+import sys
+import time
+from urllib.parse import quote
+from PySide6.QtCore import QRect, Qt
+from PySide6.QtWidgets import QApplication, QMainWindow
+# Import gui py file created by QT Designer
+from main_ui import Ui_MainWindow
+# Import controller class
+from one_call_class import OneCall
+# Locations file and the shared fetch pool
+from batch_sweep import read_locations, sweep
+import owm_fetch
+import weather_cache
+import weather_metrics
+import weather_units
+# Qt dark palette
+import dark_palette
+
+# Tiles show everything above the forecast buttons
+TILE_HEIGHT = 595
+
+
+#----------------------- PANEL RENDERER ---------------------------#
+class panel_renderer(QMainWindow, Ui_MainWindow):
+    """
+        The main window panel without buttons, never shown on screen
+        OneCall displays each result on it, then it is saved as a PNG
+    """
+
+    def __init__(self, units=weather_units.CANONICAL):
+        super().__init__()
+        # Create the GUI once, every tile reuses the same widgets
+        self.setupUi(self)
+        self.setFixedSize(self.size())
+        # Create weather object with a reference to the panel
+        self.weather_class = OneCall(self)
+        self.weather_class.units = units
+
+        # Signage only shows the weather
+        self.lineEdit.setReadOnly(True)
+        self.lineEdit.setFrame(False)
+        self.btn_get_weather.hide()
+        self.btn_exit.hide()
+        self.layoutWidget.hide()
+        self.progress_bar.hide()
+        self.status_bar.hide()
+        # Lay out and polish the widgets without showing a window
+        self.setAttribute(Qt.WA_DontShowOnScreen)
+        self.show()
+
+    def set_input(self):
+        """ OneCall calls set_input after an error, nothing to select """
+        pass
+
+    def render(self, result, file_name):
+        """ Display a result on the panel and save it as a PNG file """
+        with weather_metrics.span("render_tile"):
+            self.lineEdit.setText(result["location"])
+            self.weather_class.load_result(result)
+            self.weather_class.draw_weather_arrow()
+            self.weather_class.display_weather()
+            tile = self.centralwidget.grab(
+                QRect(0, 0, self.centralwidget.width(), TILE_HEIGHT))
+            if not tile.save(file_name, "PNG"):
+                raise OSError(f"could not write {file_name}")
+
+
+def tile_name(folder, location):
+    """ PNG file of a location in the tiles folder """
+    return os.path.join(
+        folder, quote(weather_cache.location_key(location), safe="") + ".png")
+
+
+def render_many(locations, folder, units=weather_units.CANONICAL, workers=8):
+    """
+        Fetch (location, latitude, longitude) and render a tile for each
+        Tiles are rendered as results arrive, the rest are still fetching
+        Yields (location, file name, error) as each tile is written
+    """
+    os.makedirs(folder, exist_ok=True)
+    renderer = panel_renderer(units)
+    # The panel only shows current conditions, skip the forecasts
+    for location, result, error in sweep(locations, workers, "current"):
+        if error is not None:
+            yield location, None, error
+            continue
+        file_name = tile_name(folder, location)
+        try:
+            renderer.render(result, file_name)
+        except Exception as e:
+            yield location, None, e
+            continue
+        yield location, file_name, None
+
+
+#----------------------------- COMMAND LINE ARGUMENTS -------------------------------#
+def get_arguments():
+    parser = argparse.ArgumentParser(
+        description="Render weather panels to PNG files for signage")
+    parser.add_argument("locations", help="file with one location per line")
+    parser.add_argument(
+        "--folder", default="tiles",
+        help="folder for the PNG files (default tiles)")
+    parser.add_argument(
+        "--workers", type=int, default=8,
+        help="locations fetched at the same time (default 8)")
+    parser.add_argument(
+        "--units", choices=weather_units.SYSTEMS,
+        default=weather_units.CANONICAL,
+        help="display units (default imperial)")
+    parser.add_argument(
+        "--service", metavar="URL",
+        help="get weather from a forecast_service.py, http://server:8765")
+    return parser.parse_args()
+
+
+def main():
+    arguments = get_arguments()
+    owm_fetch.SERVICE_URL = arguments.service
+    # No display is needed unless a platform was chosen
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication(sys.argv[:1])
+    # Same look as the program
+    app.setStyle('Fusion')
+    app.setPalette(dark_palette.darkPalette)
+
+    locations = read_locations(arguments.locations)
+    start = time.perf_counter()
+    failed = 0
+    for location, file_name, error in render_many(
+            locations, arguments.folder, arguments.units, arguments.workers):
+        if error is not None:
+            failed += 1
+            print(f"{location}: failed, {error}")
+        else:
+            print(f"{location}: {file_name}")
+    seconds = time.perf_counter() - start
+    print(f"{len(locations)} tiles, {failed} failed, {seconds:.1f} seconds")
+
+
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,367 @@
+"""
+    Name: soak.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Soak test, run the main window for thousands of refreshes
+    and watch its memory, a kiosk runs for weeks without a restart
+    Qt runs offscreen against a local stand-in for OpenWeatherMap,
+    nothing is sent over the network and no window opens
+    Each cycle refreshes the weather, opens the forecast dialogs,
+    the chart and the context menu and switches the units
+    RSS, Python objects and Qt objects are sampled as it runs,
+    growth after the warm up fails the test with the types that grew
+        python soak.py --cycles 5000 --csv soak.csv
+    RSS is read from /proc, or pip install psutil on Windows
+    References to None are counted too, a Qt binding that releases
+    None without owning it crashes the program once none are left,
+    the soak stops before that and reports it
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6 import QtCore, QtGui
+from PySide6.QtWidgets import QApplication
+
+# Folder of the bundled sample responses
+FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+# Locations visited in turn, a new one every LOCATION_EVERY cycles
+LOCATIONS = ["Scottsbluff, NE, US", "Denver, CO, US", "Omaha, NE, US",
+             "Cheyenne, WY, US", "Lincoln, NE, US"]
+LOCATION_EVERY = 10
+# Icons the stand-in server goes through, like the weather changing
+ICONS = ["01d", "02d", "03d", "04d", "09d", "10d", "11d", "13d", "50d",
+         "01n", "02n", "10n"]
+
+# Seconds to wait for the sections of one cycle
+CYCLE_TIMEOUT = 10
+# Stop before None runs out of references and Python aborts
+MIN_NONE_REFS = 2000
+
+
+#----------------------------- STAND-IN SERVER --------------------------------------#
+class stand_in_handler(BaseHTTPRequestHandler):
+    """ Answers like OpenWeatherMap from the bundled sample responses """
+    one_call = None
+    air_quality = b""
+    icon = b""
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            stand_in_handler.requests += 1
+            number = stand_in_handler.requests
+        path = urlparse(self.path).path
+        if path == "/onecall":
+            # The wind and sky change with every request
+            weather_data = dict(self.one_call)
+            current = dict(weather_data["current"])
+            current["wind_deg"] = number * 7 % 360
+            current["weather"] = [dict(current["weather"][0],
+                                       icon=ICONS[number % len(ICONS)])]
+            weather_data["current"] = current
+            body = json.dumps(weather_data).encode("utf-8")
+        elif path == "/air":
+            body = self.air_quality
+        elif path == "/weather":
+            body = b'{"coord": {"lat": 41.8666, "lon": -103.6672}}'
+        else:
+            body = self.icon
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    """ Start the stand-in server, point the program at it, returns it """
+    import weather_utils
+    with open(os.path.join(FOLDER, "one_call_json.json"), "rb") as file:
+        stand_in_handler.one_call = json.load(file)
+    with open(os.path.join(FOLDER, "owm_aqi_json.json"), "rb") as file:
+        stand_in_handler.air_quality = file.read()
+    # Any small png will do for an icon
+    image = QtGui.QImage(50, 50, QtGui.QImage.Format_ARGB32)
+    image.fill(QtGui.QColor("orange"))
+    buffer = QtCore.QBuffer()
+    buffer.open(QtCore.QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    stand_in_handler.icon = bytes(buffer.data())
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stand_in_handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    weather_utils.URL = base + "/weather?q="
+    weather_utils.ONE_CALL_URL = base + "/onecall"
+    weather_utils.OWM_AQI_ENDPOINT = base + "/air"
+    weather_utils.ICON_URL = base + "/icon/{icon_id}.png"
+    return server
+
+
+#----------------------------- MEASURE ----------------------------------------------#
+def rss_mb():
+    """ Resident memory in MB, None if it cannot be read """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 / 1024
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, AttributeError, ValueError):
+        return None
+
+
+def qt_objects():
+    """ Qt object class name -> count, every window and its children """
+    counts = Counter()
+    for widget in QApplication.topLevelWidgets():
+        counts[widget.metaObject().className()] += 1
+        for child in widget.findChildren(QtCore.QObject):
+            counts[child.metaObject().className()] += 1
+    return counts
+
+
+def python_objects():
+    """ Python type name -> count of objects the garbage collector tracks """
+    return Counter(type(item).__name__ for item in gc.get_objects())
+
+
+def sample(app, cycle):
+    """ Measure after deleting what was scheduled for deletion """
+    app.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+    gc.collect()
+    python_counts = python_objects()
+    qt_counts = qt_objects()
+    return {
+        "cycle": cycle,
+        "rss_mb": rss_mb(),
+        "python_objects": sum(python_counts.values()),
+        "qt_objects": sum(qt_counts.values()),
+        "none_refs": sys.getrefcount(None),
+        "python_counts": python_counts,
+        "qt_counts": qt_counts
+    }
+
+
+#----------------------------- DRIVE THE WINDOW -------------------------------------#
+def wait_for_sections(app, window):
+    """ Process events until every section has arrived or failed """
+    end = time.monotonic() + CYCLE_TIMEOUT
+    while window.section_workers or any(
+            window.weather_class.waiting(name) for name in window.weather_class.status):
+        if time.monotonic() > end:
+            raise TimeoutError("sections did not arrive")
+        # processEvents() with a time limit crashes some PySide6 versions
+        app.processEvents()
+        time.sleep(0.005)
+    app.processEvents()
+
+
+def close_soon(widget=None):
+    """ Close a dialog or popup menu once its exec() loop is running """
+    QtCore.QTimer.singleShot(0, lambda: (
+        widget or QApplication.activePopupWidget()).close())
+
+
+def cycle(app, window, number):
+    """ One refresh, the forecast dialogs, the context menu and units """
+    if number % LOCATION_EVERY == 0:
+        location = LOCATIONS[number // LOCATION_EVERY % len(LOCATIONS)]
+        window.lineEdit.setText(location)
+        window.weather_class.get_location()
+    else:
+        # What the --auto-refresh timer does
+        window.refresh_due()
+    wait_for_sections(app, window)
+
+    for dialog, show in (
+            (window.twelve_hour_dialog, window.show_12_hour_forecast),
+            (window.seven_day_dialog, window.show_7_day_forecast),
+            (window.forty_eight_hour_dialog, window.show_48_hour_forecast)):
+        # Every other time with the chart showing
+        dialog.chart.setVisible(number % 2 == 1)
+        close_soon(dialog)
+        show()
+
+    close_soon()
+    window.contextMenuEvent(QtGui.QContextMenuEvent(
+        QtGui.QContextMenuEvent.Mouse, QtCore.QPoint(20, 20),
+        QtCore.QPoint(20, 20)))
+    window.action_metric.toggle()
+    app.processEvents()
+
+
+#----------------------------- SOAK -------------------------------------------------#
+def growth(first, last):
+    """ Type name -> count added between two samples, largest first """
+    added = last - first
+    return added.most_common(10)
+
+
+def soak(cycles, warmup, every, limits, csv_file=None):
+    """
+        Run the window for cycles, returns a list of failure messages
+        limits: rss_mb, python_objects, qt_objects growth allowed
+        after the warm up, none_refs references to None that may be lost
+    """
+    app = QApplication.instance() or QApplication(sys.argv)
+    server = start_server()
+    # Import after the home folder and the server are set
+    import one_call_qt
+    import owm_fetch
+    import place_index
+    import place_tree
+    import prefetch
+    import refresh_policy
+    # No network: names the index does not know go to the stand-in,
+    # addresses only come from the offline tree
+    place_index.REJECT_UNKNOWN = False
+    place_tree.NOMINATIM_FALLBACK = False
+    # Prefetching only follows typing, there is no typing here
+    prefetch.ENABLED = False
+    # Every refresh fetches everything, weeks of refreshes in minutes
+    for name, interval in refresh_policy.INTERVALS.items():
+        if interval is not None:
+            refresh_policy.INTERVALS[name] = 0
+    owm_fetch.RETRIES = 0
+
+    window = one_call_qt.OWM()
+    window.show()
+    samples = [sample(app, 0)]
+    started = time.perf_counter()
+    finished = 0
+    try:
+        for number in range(1, cycles + 1):
+            cycle(app, window, number - 1)
+            finished = number
+            # Measure at the samples and before None runs out
+            low = sys.getrefcount(None) < MIN_NONE_REFS
+            if number == warmup or number % every == 0 or \
+                    number == cycles or low:
+                samples.append(sample(app, number))
+                latest = samples[-1]
+                rss = "n/a" if latest["rss_mb"] is None \
+                    else f"{latest['rss_mb']:.1f} MB"
+                print(f"cycle {latest['cycle']:>6}  RSS {rss:>10}  "
+                      f"Python objects {latest['python_objects']:>8,}  "
+                      f"Qt objects {latest['qt_objects']:>6,}  "
+                      f"None refs {latest['none_refs']:>7,}", flush=True)
+            if low:
+                break
+    finally:
+        window.close()
+        server.shutdown()
+    seconds = time.perf_counter() - started
+    print(f"{finished:,} cycles in {seconds:.1f} seconds, "
+          f"{stand_in_handler.requests:,} requests to the stand-in server")
+
+    if csv_file:
+        with open(csv_file, "w") as file:
+            file.write("cycle,rss_mb,python_objects,qt_objects,none_refs\n")
+            for row in samples:
+                file.write(f"{row['cycle']},{row['rss_mb'] or ''},"
+                           f"{row['python_objects']},{row['qt_objects']},"
+                           f"{row['none_refs']}\n")
+
+    # Caches fill during the warm up, after it nothing should grow
+    # the first sample if the soak stopped before the warm up ended
+    baseline = next((row for row in samples[1:] if row["cycle"] >= warmup),
+                    samples[0])
+    last = samples[-1]
+    failures = []
+    lost = samples[0]["none_refs"] - last["none_refs"]
+    if lost > limits["none_refs"]:
+        from PySide6 import __version__ as pyside_version
+        failures.append(
+            f"{lost:,} references to None lost in {finished:,} cycles, "
+            f"PySide6 {pyside_version} on Python "
+            f"{sys.version_info.major}.{sys.version_info.minor} releases "
+            f"None on calls that return nothing, the program aborts when "
+            f"none are left, see requirements.txt")
+    if baseline["rss_mb"] is not None and \
+            last["rss_mb"] - baseline["rss_mb"] > limits["rss_mb"]:
+        failures.append(f"RSS grew {last['rss_mb'] - baseline['rss_mb']:.1f} MB")
+    if last["python_objects"] - baseline["python_objects"] > \
+            limits["python_objects"]:
+        failures.append(
+            f"Python objects grew "
+            f"{last['python_objects'] - baseline['python_objects']:,}: "
+            f"{growth(baseline['python_counts'], last['python_counts'])}")
+    if last["qt_objects"] - baseline["qt_objects"] > limits["qt_objects"]:
+        failures.append(
+            f"Qt objects grew {last['qt_objects'] - baseline['qt_objects']:,}: "
+            f"{growth(baseline['qt_counts'], last['qt_counts'])}")
+    return failures
+
+
+#----------------------------- COMMAND LINE -----------------------------------------#
+def get_arguments():
+    parser = argparse.ArgumentParser(
+        description="Soak test the main window for memory growth")
+    parser.add_argument("--cycles", type=int, default=3000,
+                        help="refresh and dialog cycles (default 3000)")
+    parser.add_argument("--warmup", type=int, default=500,
+                        help="cycles before the baseline sample, caches "
+                             "fill first (default 500)")
+    parser.add_argument("--every", type=int, default=250,
+                        help="cycles between samples (default 250)")
+    parser.add_argument("--max-rss-growth", type=float, default=16,
+                        help="MB of RSS growth allowed (default 16)")
+    parser.add_argument("--max-object-growth", type=int, default=2000,
+                        help="Python objects growth allowed (default 2000)")
+    parser.add_argument("--max-qt-growth", type=int, default=0,
+                        help="Qt objects growth allowed (default 0)")
+    parser.add_argument("--max-none-lost", type=int, default=500,
+                        help="references to None that may be lost "
+                             "(default 500)")
+    parser.add_argument("--csv", help="write the samples to a CSV file")
+    arguments = parser.parse_args()
+    if arguments.warmup >= arguments.cycles:
+        parser.error("--warmup must be less than --cycles")
+    return arguments
+
+
+def main():
+    arguments = get_arguments()
+    # Keep the cache, history and shared cache out of the real ones,
+    # soak() imports the program after the home folder is set
+    with tempfile.TemporaryDirectory(prefix="owm_soak_",
+                                     ignore_cleanup_errors=True) as home:
+        os.environ["HOME"] = os.environ["USERPROFILE"] = home
+        failures = soak(arguments.cycles, arguments.warmup, arguments.every, {
+            "rss_mb": arguments.max_rss_growth,
+            "python_objects": arguments.max_object_growth,
+            "qt_objects": arguments.max_qt_growth,
+            "none_refs": arguments.max_none_lost
+        }, arguments.csv)
+    if failures:
+        print("Soak test failed\n" + "\n".join(failures), file=sys.stderr,
+              flush=True)
+        # Python tidying up Qt at exit can abort once None has run out
+        os._exit(1)
+    print("Soak test passed, no growth after the warm up")
+
+
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+    Name: weather_cache.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Persist the last successful weather result per location
+    The main window shows the saved result immediately on startup
+    while fresh data is fetched in the background
+"""
+
+import base64
+import gzip
+import os
+# Fastest installed JSON encoder and decoder
+import json_codec
+# Count warm start hits and misses
+import weather_metrics
+
+# Folder and file for the saved results
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".owm_one_call")
+LAST_RESULT_FILE = os.path.join(CACHE_DIR, "last_result.json.gz")
+# Number of locations to keep in the file
+MAX_LOCATIONS = 10
+
+
+#----------------------------- LOCATION KEY -----------------------------------------#
+def location_key(location):
+    """ Normalize a location so Scottsbluff,NE and scottsbluff, ne match """
+    return ",".join(part.strip() for part in location.lower().split(","))
+
+
+#----------------------------- READ CACHE FILE --------------------------------------#
+def _read():
+    """ Read the cache file, return an empty cache if missing or damaged """
+    try:
+        with gzip.open(LAST_RESULT_FILE, "rb") as file:
+            return json_codec.loads(file.read())
+    except (OSError, ValueError):
+        return {"last": None, "results": {}}
+
+
+#----------------------------- ENCODE RESULT ----------------------------------------#
+def encode_result(result):
+    """ A result as a dictionary that can be JSON encoded """
+    # Icon png bytes are not JSON, store as base64 text
+    stored = dict(result)
+    stored["icon_data"] = base64.b64encode(result["icon_data"]).decode("ascii")
+    return stored
+
+
+def decode_result(stored):
+    """ A result back from encode_result() """
+    stored["icon_data"] = base64.b64decode(stored["icon_data"])
+    return stored
+
+
+#----------------------------- SAVE RESULT ------------------------------------------#
+def save_result(result):
+    """
+        Save a result from owm_fetch.fetch_weather()
+        as the last result for its location
+    """
+    cache = _read()
+    key = location_key(result["location"])
+    stored = encode_result(result)
+    # Move the location to the end so the oldest is trimmed first
+    cache["results"].pop(key, None)
+    cache["results"][key] = stored
+    cache["last"] = key
+    while len(cache["results"]) > MAX_LOCATIONS:
+        del cache["results"][next(iter(cache["results"]))]
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Write to a temp file then replace, a crash never leaves half a file
+    temp_file = LAST_RESULT_FILE + ".tmp"
+    with gzip.open(temp_file, "wb") as file:
+        file.write(json_codec.dumps(cache))
+    os.replace(temp_file, LAST_RESULT_FILE)
+
+
+#----------------------------- RECENT LOCATIONS -------------------------------------#
+def recent_locations():
+    """ Names of the saved locations, most recently saved first """
+    results = _read()["results"]
+    return [result["location"] for result in reversed(results.values())]
+
+
+#----------------------------- LOAD RESULT ------------------------------------------#
+def load_result(location=None):
+    """
+        Load the saved result for a location,
+        or the last saved result if no location is given
+        Returns None if nothing is saved
+    """
+    cache = _read()
+    key = location_key(location) if location else cache.get("last")
+    result = cache["results"].get(key)
+    weather_metrics.count("cache", cache="warm_start",
+                          result="miss" if result is None else "hit")
+    if result is None:
+        return None
+    return decode_result(result)
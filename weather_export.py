@@ -0,0 +1,183 @@
+"""
+    Name: weather_export.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Export current, hourly, daily and AQI data for a warehouse
+    Writes one file per table, the same rows as the WeatherStore tables
+        sweep_current.csv, sweep_hourly.csv, sweep_daily.csv ...
+    CSV rows are written and flushed as each location completes
+    Parquet and Arrow files are columnar, typed and compressed,
+    rows are written a row group at a time so a sweep is never held
+    in memory, times are UTC timestamps
+    python batch_sweep.py locations.txt --export exports/sweep --export-format parquet
+    Optional Parquet and Arrow: pip install pyarrow
+"""
+
+import csv
+import os
+# Table rows from a result
+import weather_store
+from weather_store import AQI_COMPONENTS
+
+# Parquet and Arrow need pyarrow, CSV works without it
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Export formats and their file extensions
+FORMATS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+# Column name and type of each table, in the order of the WeatherStore tables
+# int is a Unix time, float, str or aqi for the 1-5 index
+COLUMNS = {
+    "locations": (("location", str), ("latitude", float),
+                  ("longitude", float), ("address", str)),
+    "current": (("location", str), ("dt", int), ("temp", float),
+                ("feels_like", float), ("pressure", float),
+                ("humidity", float), ("uvi", float), ("clouds", float),
+                ("visibility", float), ("wind_speed", float),
+                ("wind_deg", float), ("description", str)),
+    "hourly": (("location", str), ("issued", int), ("dt", int),
+               ("temp", float), ("humidity", float), ("wind_speed", float),
+               ("description", str)),
+    "daily": (("location", str), ("issued", int), ("dt", int),
+              ("temp_min", float), ("temp_max", float),
+              ("wind_speed", float), ("description", str)),
+    "aqi": (("location", str), ("dt", int), ("aqi", "aqi")) +
+           tuple((name, float) for name in AQI_COMPONENTS)
+}
+
+# Rows kept for each Parquet row group or Arrow record batch
+ROW_GROUP = 50000
+
+
+def file_names(prefix, export_format):
+    """ Table name -> file name of an export """
+    return {table: f"{prefix}_{table}{FORMATS[export_format]}"
+            for table in COLUMNS}
+
+
+#----------------------------- CSV --------------------------------------------------#
+class CsvExporter:
+    """ One CSV file per table, written as rows arrive """
+
+    def __init__(self, prefix):
+        self.files = {}
+        self.writers = {}
+        for table, file_name in file_names(prefix, "csv").items():
+            file = open(file_name, "w", newline="", encoding="utf-8")
+            self.files[table] = file
+            self.writers[table] = csv.writer(file)
+            self.writers[table].writerow(name for name, _ in COLUMNS[table])
+
+    def write_rows(self, rows):
+        """ Append rows from weather_store.result_rows() """
+        for table, table_rows in rows.items():
+            self.writers[table].writerows(table_rows)
+            # Readers see each location as soon as it is written
+            self.files[table].flush()
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+
+
+#----------------------------- PARQUET AND ARROW ------------------------------------#
+def _arrow_type(kind):
+    """ Arrow type of a COLUMNS type """
+    return {
+        str: pyarrow.string(),
+        int: pyarrow.timestamp("s", tz="UTC"),
+        float: pyarrow.float64(),
+        "aqi": pyarrow.uint8()
+    }[kind]
+
+
+class ArrowExporter:
+    """
+        One Parquet or Arrow IPC file per table
+        Rows are buffered to ROW_GROUP rows, then written as one group
+    """
+
+    def __init__(self, prefix, export_format="parquet", row_group=ROW_GROUP):
+        if pyarrow is None:
+            raise ImportError(f"pip install pyarrow to export {export_format}")
+        self.row_group = row_group
+        self.schemas = {
+            table: pyarrow.schema([(name, _arrow_type(kind))
+                                   for name, kind in columns])
+            for table, columns in COLUMNS.items()
+        }
+        self.writers = {}
+        self.sinks = []
+        for table, file_name in file_names(prefix, export_format).items():
+            if export_format == "parquet":
+                self.writers[table] = pyarrow.parquet.ParquetWriter(
+                    file_name, self.schemas[table], compression="zstd")
+            else:
+                # Arrow IPC file, compressed record batches
+                sink = pyarrow.OSFile(file_name, "wb")
+                self.sinks.append(sink)
+                self.writers[table] = pyarrow.ipc.new_file(
+                    sink, self.schemas[table],
+                    options=pyarrow.ipc.IpcWriteOptions(compression="zstd"))
+        self.pending = weather_store.empty_rows()
+
+    def write_rows(self, rows):
+        """ Add rows from weather_store.result_rows() """
+        for table, table_rows in rows.items():
+            self.pending[table].extend(table_rows)
+            if len(self.pending[table]) >= self.row_group:
+                self._flush(table)
+
+    def _flush(self, table):
+        """ Write the pending rows of a table as one column batch """
+        rows = self.pending[table]
+        if not rows:
+            return
+        schema = self.schemas[table]
+        batch = pyarrow.record_batch(
+            [pyarrow.array(column, field.type)
+             for column, field in zip(zip(*rows), schema)], schema=schema)
+        self.writers[table].write_table(pyarrow.Table.from_batches([batch]))
+        self.pending[table] = []
+
+    def close(self):
+        for table, writer in self.writers.items():
+            self._flush(table)
+            writer.close()
+        for sink in self.sinks:
+            sink.close()
+
+
+#----------------------------- OPEN AN EXPORT ---------------------------------------#
+def open_exporter(prefix, export_format="csv"):
+    """
+        Start an export, files are prefix_table.csv and so on
+        Call write_rows() or write_result() as locations complete
+        then close()
+    """
+    folder = os.path.dirname(os.path.abspath(prefix))
+    os.makedirs(folder, exist_ok=True)
+    if export_format == "csv":
+        return CsvExporter(prefix)
+    return ArrowExporter(prefix, export_format)
+
+
+def write_result(exporter, result):
+    """ Export one result from owm_fetch.fetch_weather() """
+    exporter.write_rows(weather_store.result_rows(result))
+
+
+def export_results(prefix, results, export_format="csv"):
+    """ Export results, returns the file names written """
+    exporter = open_exporter(prefix, export_format)
+    try:
+        for result in results:
+            write_result(exporter, result)
+    finally:
+        exporter.close()
+    return list(file_names(prefix, export_format).values())
@@ -0,0 +1,188 @@
+"""
+    Name: weather_format.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Turn One Call and AQI data into the text the program shows
+    No GUI code, so the main window, the forecast dialogs and
+    batch_sweep.py worker processes all produce the same text
+"""
+
+import weather_utils
+# Imperial or metric, converted from the imperial One Call data
+import weather_units
+# US EPA AQI from the components
+import aqi_epa
+
+
+# Labels filled by current_conditions() and air_quality()
+# placeholders are shown in them until the data arrives
+CURRENT_LABELS = ("temperature", "description", "feels_like", "humidity",
+                  "pressure", "wind", "cloud_cover", "uv_index", "visibility",
+                  "sunrise", "sunset")
+AIR_QUALITY_LABELS = ("aqi", "ozone", "pm25", "pm10", "carbon_monoxide",
+                      "sulphur_dioxide", "nitrogen_dioxide")
+
+
+#----------------------------- CURRENT CONDITIONS -----------------------------------#
+def current_conditions(weather_data, units=weather_units.CANONICAL):
+    """
+        Return current weather from One Call weather data
+        as a dictionary of label name: text for the form
+        units: imperial or metric
+    """
+    weather_data = weather_units.to_units(weather_data, units)
+    symbols = weather_units.SYMBOLS[units]
+    # Create dictionary of current weather data
+    weather_dict = weather_data.get("current")
+    # Weather description, Clear, Partly Cloudy
+    description = weather_dict.get("weather")[0].get("description").title()
+    temperature = weather_dict.get("temp")
+    feels_like = weather_dict.get("feels_like")
+    humidity = weather_dict.get("humidity")
+    wind_speed = weather_dict.get("wind_speed")
+    cardinal_direction = weather_utils.degrees_to_cardinal(
+        weather_dict.get("wind_deg"))
+    # Pressure and visibility are already in display units
+    pressure = weather_dict.get('pressure')
+    clouds = weather_dict.get("clouds")
+    uvi = weather_dict.get("uvi")
+    uvi_string = weather_utils.uvi_to_string(uvi)
+    visibility = weather_dict.get("visibility")
+
+    # Get sunrise and sunset time from API in Unix UTC
+    # Add shift in seconds from UTC
+    sunrise_time = weather_dict.get("sunrise") + \
+        weather_data.get("timezone_offset")
+    sunset_time = weather_dict.get("sunset") + \
+        weather_data.get("timezone_offset")
+
+    return {
+        "temperature": f'{temperature}{symbols["temperature"]} 🌡',
+        "description": f"{description}",
+        "feels_like": f"{feels_like}{symbols['temperature']}",
+        "humidity": f"{humidity}%",
+        "pressure": f"{pressure} {symbols['pressure']}",
+        "wind": f"{wind_speed} {symbols['speed']} {cardinal_direction}",
+        "cloud_cover": f"{clouds}%",
+        "uv_index": f"{uvi} {uvi_string}",
+        "visibility": f"{visibility} {symbols['distance']}",
+        # Convert from Unix UTC timestamp to Python time
+        "sunrise": weather_utils.convert_time(sunrise_time),
+        "sunset": weather_utils.convert_time(sunset_time)
+    }
+
+
+#----------------------------- AIR QUALITY ------------------------------------------#
+def air_quality(aqi_data):
+    """
+        Return the Air Quality Index and components from OWM air pollution
+        data as a dictionary of label name: text for the form
+        How do I calculate the AQI from pollutant concentration data?
+        The AQI is the highest value calculated for each pollutant as follows:
+        Identify the highest concentration among all of the monitors
+        within each reporting area and truncate as follows:
+          Ozone (ppm) – truncate to 3 decimal places
+          PM2.5 (μg/m3) – truncate to 1 decimal place
+          PM10 (μg/m3) – truncate to integer
+          CO (ppm) truncate to 1 decimal place
+          SO2 (ppb) – truncate to integer
+          NO2 (ppb) – truncate to integer
+    """
+    data = aqi_data.get("list")[0]
+    components = data.get("components")
+    # Air Quality Index from OWM
+    aqi = data.get("main").get("aqi")
+    # Convert AQI to text
+    aqi_string = ("Good", "Fair", "Moderate", "Poor", "Very Poor")[aqi - 1]
+
+    return {
+        "aqi": f"{aqi} {aqi_string}",
+        # Ground level ozone truncate to 3 decimal places
+        "ozone": f"{round(components.get('o3'), 3)} µg/m³",
+        # Fine particulates truncate to 1 decimal place
+        "pm25": f"{round(components.get('pm2_5'), 1)} µg/m³",
+        # Coarse particulates truncate to nearest integer
+        "pm10": f"{round(components.get('pm10'))} µg/m³",
+        # Carbon Monoxide round to 1 decimal place
+        "carbon_monoxide": f"{round(components.get('co'), 1)} µg/m³",
+        # Sulphur Dioxide round to nearest integer
+        "sulphur_dioxide": f"{round(components.get('so2'))} µg/m³",
+        # Nitrogen Dioxide round to nearest integer
+        "nitrogen_dioxide": f"{round(components.get('no2'))} µg/m³"
+    }
+
+
+def us_air_quality(aqi_data):
+    """ US EPA AQI calculated from the components, US AQI 42 Good (PM2.5) """
+    components = aqi_data.get("list")[0].get("components")
+    return f"US AQI {aqi_epa.describe(*aqi_epa.us_aqi(components))}"
+
+
+#----------------------------- 12 HOUR FORECAST -------------------------------------#
+def twelve_hour_rows(weather_data, units=weather_units.CANONICAL):
+    """ Rows of the 12 hour forecast dialog, header first """
+    weather_data = weather_units.to_units(weather_data, units)
+    degrees = weather_units.symbol("temperature", units)
+    speed = weather_units.symbol("speed", units)
+    rows = [f"  Time      Temp    Humidity  Wind Spd"]
+    # Slice 12 hours out of weather_data
+    # Current only fetch profiles have no forecasts
+    for hourly_data in weather_data.get("hourly", [])[:12]:
+        temperature = hourly_data["temp"]
+        description_main = hourly_data["weather"][0]["main"]
+        description = hourly_data["weather"][0]["description"]
+        humidity = hourly_data["humidity"]
+        wind_speed = hourly_data["wind_speed"]
+        time = weather_utils.convert_hourly_time(hourly_data["dt"])
+        rows.append(f"{time:>8}: {temperature:>5.1f} {degrees}   {humidity:4.1f} %   {wind_speed:4.1f} {speed}   {description_main} ({description})")
+    return rows
+
+
+#----------------------------- 48 HOUR FORECAST -------------------------------------#
+def forty_eight_hour_rows(weather_data, units=weather_units.CANONICAL):
+    """ Rows of the 48 hour forecast dialog, every other hour """
+    weather_data = weather_units.to_units(weather_data, units)
+    degrees = weather_units.symbol("temperature", units)
+    rows = []
+    count = 0
+    for hourly_data in weather_data.get("hourly", []):
+        # Only display every even data slice
+        if count % 2:
+            temp = hourly_data["temp"]
+            description_main = hourly_data["weather"][0]["main"]
+            description = hourly_data["weather"][0]["main"]
+            time = weather_utils.convert_hourly_time(hourly_data["dt"])
+            rows.append(f"{time:>8}   {temp:>5.1f} {degrees}   {description_main} ({description})")
+        count += 1
+    return rows
+
+
+#----------------------------- 7 DAY FORECAST ---------------------------------------#
+def seven_day_rows(weather_data, units=weather_units.CANONICAL):
+    """ Rows of the 7 day forecast dialog, header first """
+    weather_data = weather_units.to_units(weather_data, units)
+    degrees = weather_units.symbol("temperature", units)
+    speed = weather_units.symbol("speed", units)
+    rows = [f"Date           Max       Min     Wind Spd  "]
+    for daily_data in weather_data.get("daily", []):
+        temp_max = daily_data["temp"]["max"]
+        temp_min = daily_data["temp"]["min"]
+        wind_speed = daily_data["wind_speed"]
+        description_main = daily_data["weather"][0]["main"]
+        description = daily_data["weather"][0]["description"]
+        time = weather_utils.convert_day_time(daily_data["dt"])
+        rows.append(f"{time:>9} {temp_max:7.1f} {degrees}   {temp_min:4.1f} {degrees}   {wind_speed:4.1f} {speed}    {description_main} ({description})")
+    return rows
+
+
+#----------------------------- WHOLE RESULT -----------------------------------------#
+def format_result(weather_data, aqi_data, units=weather_units.CANONICAL):
+    """ Everything the main window and forecast dialogs show, as text """
+    return {
+        "current": current_conditions(weather_data, units),
+        "air_quality": air_quality(aqi_data),
+        "us_aqi": us_air_quality(aqi_data),
+        "twelve_hour": twelve_hour_rows(weather_data, units),
+        "forty_eight_hour": forty_eight_hour_rows(weather_data, units),
+        "seven_day": seven_day_rows(weather_data, units)
+    }
@@ -0,0 +1,215 @@
+"""
+    Name: weather_metrics.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Time each stage of fetching and displaying weather
+    and count cache hits, misses and retries
+    Export as Prometheus text, a JSON file or a web page at /metrics
+    Thread safe, worker threads record into the same metrics
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_lock = threading.Lock()
+# Stage name -> [count, total seconds, max seconds, last seconds]
+_stages = {}
+# (counter name, sorted label items) -> value
+_counters = {}
+# Functions called with (stage, start, end) after every span
+_listeners = []
+
+
+#----------------------------- RECORD -----------------------------------------------#
+@contextlib.contextmanager
+def span(stage):
+    """
+        Time the code in a with block as a stage
+            with weather_metrics.span("one_call"):
+                ...
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        record(stage, end - start)
+        for listener in _listeners:
+            listener(stage, start, end)
+
+
+def add_listener(listener):
+    """
+        Call listener(stage, start, end) after every span
+        start and end are time.perf_counter() seconds
+    """
+    _listeners.append(listener)
+
+
+def remove_listener(listener):
+    """ Stop calling a listener """
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def timed(stage):
+    """
+        Decorator, time every call of a function as a stage
+            @weather_metrics.timed("display_weather")
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(stage, seconds):
+    """ Add one timing to a stage """
+    with _lock:
+        stats = _stages.setdefault(stage, [0, 0.0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+        stats[3] = seconds
+
+
+def count(name, amount=1, **labels):
+    """
+        Add to a counter, labels tell counters with one name apart
+            weather_metrics.count("cache", cache="cell", result="hit")
+    """
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def reset():
+    """ Forget everything recorded """
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+
+
+#----------------------------- EXPORT -----------------------------------------------#
+def snapshot():
+    """ Return every stage and counter as a dictionary """
+    with _lock:
+        stages = {
+            stage: {
+                "count": stats[0],
+                "total_seconds": stats[1],
+                "average_seconds": stats[1] / stats[0],
+                "max_seconds": stats[2],
+                "last_seconds": stats[3]
+            }
+            for stage, stats in _stages.items()
+        }
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in _counters.items()
+        ]
+    return {"time": time.time(), "stages": stages, "counters": counters}
+
+
+def to_prometheus():
+    """ Return every stage and counter in Prometheus text format """
+    data = snapshot()
+    lines = [
+        "# HELP owm_stage_seconds Time spent in each stage",
+        "# TYPE owm_stage_seconds summary"
+    ]
+    for stage, stats in sorted(data["stages"].items()):
+        lines.append(
+            f'owm_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        lines.append(
+            f'owm_stage_seconds_sum{{stage="{stage}"}} {stats["total_seconds"]:.6f}')
+    for name in sorted({counter["name"] for counter in data["counters"]}):
+        lines.append(f"# TYPE owm_{name}_total counter")
+        for counter in data["counters"]:
+            if counter["name"] != name:
+                continue
+            labels = ",".join(
+                f'{key}="{value}"' for key, value in counter["labels"].items())
+            lines.append(f"owm_{name}_total{{{labels}}} {counter['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def to_text():
+    """ Return every stage and counter as a table for people to read """
+    data = snapshot()
+    lines = [f"{'Stage':<22} {'Count':>6} {'Avg ms':>9} {'Max ms':>9} {'Last ms':>9}"]
+    for stage, stats in sorted(data["stages"].items()):
+        lines.append(
+            f"{stage:<22} {stats['count']:>6} "
+            f"{stats['average_seconds'] * 1000:9.1f} "
+            f"{stats['max_seconds'] * 1000:9.1f} "
+            f"{stats['last_seconds'] * 1000:9.1f}")
+    lines.append("")
+    lines.append(f"{'Counter':<50} {'Value':>9}")
+    for counter in sorted(data["counters"],
+                          key=lambda counter: (counter["name"],
+                                               sorted(counter["labels"].items()))):
+        labels = " ".join(
+            f"{key}={value}" for key, value in counter["labels"].items())
+        lines.append(f"{counter['name'] + ' ' + labels:<50} {counter['value']:>9}")
+    return "\n".join(lines)
+
+
+def dump_json(file_name):
+    """ Write a snapshot to a JSON file, replacing the last one """
+    temp_file = file_name + ".tmp"
+    with open(temp_file, "w", encoding="utf-8") as file:
+        json.dump(snapshot(), file, indent=2)
+    # Readers never see half a file
+    os.replace(temp_file, file_name)
+
+
+def dump_json_every(file_name, seconds):
+    """
+        Write a snapshot every few seconds from a daemon thread
+        Returns an Event, set it to stop
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(seconds):
+            dump_json(file_name)
+
+    threading.Thread(target=run, name="metrics_dump", daemon=True).start()
+    return stop
+
+
+#----------------------------- PROMETHEUS ENDPOINT ----------------------------------#
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """ Answer GET /metrics with Prometheus text """
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """ Do not print a line for every scrape """
+        pass
+
+
+def serve_prometheus(port, host="127.0.0.1"):
+    """ Serve /metrics from a daemon thread, returns the server """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics_server",
+                     daemon=True).start()
+    return server
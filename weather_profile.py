@@ -0,0 +1,167 @@
+"""
+    Name: weather_profile.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Profile a session of the program for offline analysis
+    Turn on with the environment variable OWM_PROFILE=folder
+    or python one_call_qt.py --profile folder
+    Each session writes two files into the folder
+        owm_<time>_<pid>.prof         cProfile stats, open with pstats or snakeviz
+        owm_<time>_<pid>.trace.json   Chrome trace events of the last
+                                      MAX_EVENTS weather_metrics spans,
+                                      open in chrome://tracing or
+                                      ui.perfetto.dev
+    Worker threads are profiled by wrapping their work with @profiled
+"""
+
+import atexit
+import cProfile
+import functools
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+# Trace events come from the weather_metrics spans
+import weather_metrics
+
+# Folder used when OWM_PROFILE=1
+DEFAULT_FOLDER = "profiles"
+# Trace events kept, the oldest are dropped so a session of weeks
+# stays within about 100 MB
+MAX_EVENTS = 200_000
+
+# The running session, None when profiling is off
+_session = None
+
+
+class _Session:
+    def __init__(self, folder):
+        self.folder = folder
+        self.lock = threading.Lock()
+        # pstats.Stats of every worker thread call so far, None before
+        # the first, each call is merged in when it finishes
+        self.thread_stats = None
+        # Chrome trace events, the last MAX_EVENTS
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.thread_names = {}
+        self.pid = os.getpid()
+        self.start = time.perf_counter()
+        name = f"owm_{time.strftime('%Y%m%d_%H%M%S')}_{self.pid}"
+        self.prof_file = os.path.join(folder, name + ".prof")
+        self.trace_file = os.path.join(folder, name + ".trace.json")
+        self.profile = cProfile.Profile()
+
+    def trace(self, stage, start, end):
+        """ weather_metrics listener, one complete event for each span """
+        thread = threading.current_thread()
+        event = {
+            "name": stage,
+            "cat": "owm",
+            "ph": "X",
+            # Chrome traces are in microseconds
+            "ts": (start - self.start) * 1_000_000,
+            "dur": (end - start) * 1_000_000,
+            "pid": self.pid,
+            "tid": thread.ident
+        }
+        with self.lock:
+            self.events.append(event)
+            self.thread_names[thread.ident] = thread.name
+
+
+#----------------------------- START AND STOP ---------------------------------------#
+def start(folder=DEFAULT_FOLDER):
+    """ Start profiling the calling thread and recording trace events """
+    global _session
+    if _session is not None:
+        return
+    os.makedirs(folder, exist_ok=True)
+    _session = _Session(folder)
+    weather_metrics.add_listener(_session.trace)
+    _session.profile.enable()
+    # Write the files however the program ends
+    atexit.register(stop)
+
+
+def start_from_environment():
+    """ Start profiling if OWM_PROFILE is set, returns True if started """
+    folder = os.environ.get("OWM_PROFILE")
+    if not folder:
+        return False
+    start(DEFAULT_FOLDER if folder == "1" else folder)
+    return True
+
+
+def active():
+    """ True while a profiling session is running """
+    return _session is not None
+
+
+def stop():
+    """
+        Stop profiling and write the .prof and .trace.json files
+        Returns the two file names, None if profiling was off
+    """
+    global _session
+    session = _session
+    if session is None:
+        return None
+    _session = None
+    session.profile.disable()
+    weather_metrics.remove_listener(session.trace)
+
+    # Merge the worker thread profiles into the main thread profile
+    stats = pstats.Stats(session.profile)
+    with session.lock:
+        if session.thread_stats is not None:
+            stats.add(session.thread_stats)
+        events = list(session.events)
+        thread_names = dict(session.thread_names)
+    stats.dump_stats(session.prof_file)
+
+    # Name the threads in the trace viewer
+    for thread_id, name in thread_names.items():
+        events.append({
+            "name": "thread_name",
+            "ph": "M",
+            "pid": session.pid,
+            "tid": thread_id,
+            "args": {"name": name}
+        })
+    with open(session.trace_file, "w", encoding="utf-8") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+    return session.prof_file, session.trace_file
+
+
+#----------------------------- WORKER THREADS ---------------------------------------#
+def profiled(function):
+    """
+        Decorator for work done in worker threads
+        cProfile only sees the thread that enabled it, so each call
+        gets its own profile, merged into the session total when
+        the call finishes so long sessions do not keep every profile
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        session = _session
+        if session is None or threading.current_thread() is threading.main_thread():
+            return function(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler, keep the trace only
+            return function(*args, **kwargs)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.disable()
+            stats = pstats.Stats(profile)
+            with session.lock:
+                if session.thread_stats is None:
+                    session.thread_stats = stats
+                else:
+                    session.thread_stats.add(stats)
+    return wrapper
@@ -0,0 +1,296 @@
+"""
+    Name: weather_store.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Keep every fetched result in a local SQLite database
+    Current conditions, hourly and daily forecasts and AQI are appended
+    in batches, WAL mode lets the GUI read while a sweep writes
+    Run this file to benchmark inserting the bundled json files
+"""
+
+import os
+import sqlite3
+import time
+# CACHE_DIR and location_key()
+import weather_cache
+# US AQI from the stored components
+import aqi_epa
+
+# Default database file
+STORE_FILE = os.path.join(weather_cache.CACHE_DIR, "history.sqlite3")
+
+# Tables and indexes, forecasts are keyed by the time they were issued
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS locations (
+    location TEXT PRIMARY KEY,
+    latitude REAL,
+    longitude REAL,
+    address TEXT
+);
+CREATE TABLE IF NOT EXISTS current (
+    location TEXT NOT NULL,
+    dt INTEGER NOT NULL,
+    temp REAL,
+    feels_like REAL,
+    pressure REAL,
+    humidity REAL,
+    uvi REAL,
+    clouds REAL,
+    visibility REAL,
+    wind_speed REAL,
+    wind_deg REAL,
+    description TEXT,
+    PRIMARY KEY (location, dt)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS hourly (
+    location TEXT NOT NULL,
+    issued INTEGER NOT NULL,
+    dt INTEGER NOT NULL,
+    temp REAL,
+    humidity REAL,
+    wind_speed REAL,
+    description TEXT,
+    PRIMARY KEY (location, issued, dt)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS hourly_dt ON hourly (location, dt);
+CREATE TABLE IF NOT EXISTS daily (
+    location TEXT NOT NULL,
+    issued INTEGER NOT NULL,
+    dt INTEGER NOT NULL,
+    temp_min REAL,
+    temp_max REAL,
+    wind_speed REAL,
+    description TEXT,
+    PRIMARY KEY (location, issued, dt)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS daily_dt ON daily (location, dt);
+CREATE TABLE IF NOT EXISTS aqi (
+    location TEXT NOT NULL,
+    dt INTEGER NOT NULL,
+    aqi INTEGER,
+    co REAL,
+    no REAL,
+    no2 REAL,
+    o3 REAL,
+    so2 REAL,
+    pm2_5 REAL,
+    pm10 REAL,
+    nh3 REAL,
+    PRIMARY KEY (location, dt)
+) WITHOUT ROWID;
+"""
+
+# Air pollution components in the order of the aqi table
+AQI_COMPONENTS = ("co", "no", "no2", "o3", "so2", "pm2_5", "pm10", "nh3")
+
+
+class WeatherStore:
+    def __init__(self, file_name=STORE_FILE):
+        """ Open or create the database """
+        if file_name != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(file_name)),
+                        exist_ok=True)
+        self.connection = sqlite3.connect(file_name)
+        self.connection.row_factory = sqlite3.Row
+        # Readers do not block the writer, fewer disk syncs per commit
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+#----------------------------- ADD RESULTS ------------------------------------------#
+    def add_results(self, results):
+        """
+            Append results from owm_fetch.fetch_weather()
+            Rows already stored are skipped
+        """
+        rows = empty_rows()
+        for result in results:
+            result_rows(result, rows)
+        self.add_rows(rows)
+
+    def add_rows(self, rows):
+        """
+            Append rows from result_rows()
+            All rows go in with one executemany per table and one commit
+        """
+        with self.connection:
+            # Keep a known address when a sweep has none
+            self.connection.executemany(
+                "INSERT INTO locations VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (location) DO UPDATE SET "
+                "latitude = excluded.latitude, "
+                "longitude = excluded.longitude, "
+                "address = COALESCE(excluded.address, locations.address)",
+                rows["locations"])
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO current "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows["current"])
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO hourly VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows["hourly"])
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO daily VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows["daily"])
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO aqi "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows["aqi"])
+
+#----------------------------- QUERIES ----------------------------------------------#
+    def last_hours(self, location, hours=24):
+        """ Current conditions at a location for the last hours """
+        since = int(time.time()) - hours * 3600
+        cursor = self.connection.execute(
+            "SELECT * FROM current WHERE location = ? AND dt >= ? "
+            "ORDER BY dt",
+            (weather_cache.location_key(location), since))
+        return [dict(row) for row in cursor]
+
+    def aqi_last_hours(self, location, hours=24):
+        """
+            Air pollution at a location for the last hours
+            with the US AQI and the pollutant that set it
+            The US AQI is None for hours missing a pollutant
+        """
+        since = int(time.time()) - hours * 3600
+        cursor = self.connection.execute(
+            "SELECT * FROM aqi WHERE location = ? AND dt >= ? ORDER BY dt",
+            (weather_cache.location_key(location), since))
+        rows = [dict(row) for row in cursor]
+        for row in rows:
+            row["us_aqi"] = row["us_aqi_pollutant"] = None
+        # A NULL pollutant would be NaN in the columns
+        complete = [row for row in rows if all(
+            row.get(name) is not None for name in aqi_epa.POLLUTANTS)]
+        if not complete:
+            return rows
+        # Every hour at once
+        aqi, pollutants, _ = aqi_epa.us_aqi_columns(
+            aqi_epa.components_to_columns(complete))
+        for row, value, pollutant in zip(complete, aqi, pollutants):
+            row["us_aqi"] = int(value)
+            row["us_aqi_pollutant"] = str(pollutant)
+        return rows
+
+    def forecast_vs_actual(self, location, window=1800):
+        """
+            Hourly forecast temperatures next to the observed temperature
+            An observation within window seconds of the forecast hour counts
+            lead_hours is how far ahead the forecast was made
+        """
+        cursor = self.connection.execute(
+            """
+            SELECT hourly.dt, hourly.issued,
+                   (hourly.dt - hourly.issued) / 3600.0 AS lead_hours,
+                   hourly.temp AS forecast_temp,
+                   current.temp AS actual_temp,
+                   current.temp - hourly.temp AS error
+            FROM hourly JOIN current
+              ON current.location = hourly.location
+             AND current.dt BETWEEN hourly.dt - ? AND hourly.dt + ?
+            WHERE hourly.location = ? AND hourly.dt >= hourly.issued
+            ORDER BY hourly.dt, hourly.issued
+            """,
+            (window, window, weather_cache.location_key(location)))
+        return [dict(row) for row in cursor]
+
+    def close(self):
+        self.connection.close()
+
+
+#----------------------------- TABLE ROWS -------------------------------------------#
+def empty_rows():
+    """ Dictionary of table name: list of rows """
+    return {"locations": [], "current": [], "hourly": [],
+            "daily": [], "aqi": []}
+
+
+def result_rows(result, rows=None):
+    """
+        Split one result into table rows, added to rows if given
+        No database needed, so worker processes can build rows
+    """
+    if rows is None:
+        rows = empty_rows()
+    location = weather_cache.location_key(result["location"])
+    weather_data = result["weather_data"]
+    current = weather_data.get("current", {})
+    issued = current.get("dt")
+    rows["locations"].append((location, result["latitude"],
+                              result["longitude"], result.get("address")))
+    rows["current"].append((
+        location, issued, current.get("temp"), current.get("feels_like"),
+        current.get("pressure"), current.get("humidity"),
+        current.get("uvi"), current.get("clouds"),
+        current.get("visibility"), current.get("wind_speed"),
+        current.get("wind_deg"), _description(current)))
+    for hourly in weather_data.get("hourly", []):
+        rows["hourly"].append((
+            location, issued, hourly.get("dt"), hourly.get("temp"),
+            hourly.get("humidity"), hourly.get("wind_speed"),
+            _description(hourly)))
+    for daily in weather_data.get("daily", []):
+        temp = daily.get("temp", {})
+        rows["daily"].append((
+            location, issued, daily.get("dt"), temp.get("min"),
+            temp.get("max"), daily.get("wind_speed"),
+            _description(daily)))
+    for aqi in result.get("aqi_data", {}).get("list", []):
+        components = aqi.get("components", {})
+        rows["aqi"].append(
+            (location, aqi.get("dt"), aqi.get("main", {}).get("aqi")) +
+            tuple(components.get(name) for name in AQI_COMPONENTS))
+    return rows
+
+
+#----------------------------- DESCRIPTION ------------------------------------------#
+def _description(weather_dict):
+    """ Weather description from a One Call item, None if missing """
+    weather = weather_dict.get("weather")
+    return weather[0].get("description") if weather else None
+
+
+#----------------------------- BENCHMARK --------------------------------------------#
+def main():
+    """ Benchmark a sweep of locations into a temporary database """
+    import json
+    import tempfile
+    import weather_utils
+    import json_projection
+
+    with open("one_call_json.json", "rb") as file:
+        weather_data = json_projection.loads_projected(
+            file.read(), weather_utils.ONE_CALL_FIELDS)
+    with open("owm_aqi_json.json", "rb") as file:
+        aqi_data = json.load(file)
+
+    locations = 2000
+    batch = 500
+    results = [{
+        "location": f"Location {number}",
+        "latitude": 41.87,
+        "longitude": -103.67,
+        "address": f"Location {number}",
+        "weather_data": weather_data,
+        "aqi_data": aqi_data
+    } for number in range(locations)]
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = WeatherStore(os.path.join(folder, "history.sqlite3"))
+        start = time.perf_counter()
+        for first in range(0, locations, batch):
+            store.add_results(results[first:first + batch])
+        seconds = time.perf_counter() - start
+        rows = sum(store.connection.execute(
+            f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("current", "hourly", "daily", "aqi"))
+        store.close()
+    print(f"{locations} locations, {rows:,} rows in {seconds:.2f} seconds, "
+          f"{locations / seconds:,.0f} locations per second")
+
+
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+    Name: weather_units.py
+    Author: William A Loring
+    Created: 10/19/2026
+    Purpose: Show weather in imperial or metric units without another request
+    One Call is always fetched in imperial units, the canonical data
+    that is cached and stored, then converted here for display
+    One Call sends temperatures in °F, wind in mph, pressure in hPa
+    and visibility in meters
+"""
+
+# Units One Call weather is fetched in
+CANONICAL = "imperial"
+
+# Display systems and the symbol shown for each quantity
+SYMBOLS = {
+    "imperial": {
+        "temperature": "°F",
+        "speed": "mph",
+        "pressure": "inHg",
+        "distance": "miles"
+    },
+    "metric": {
+        "temperature": "°C",
+        "speed": "km/h",
+        "pressure": "hPa",
+        "distance": "km"
+    }
+}
+SYSTEMS = tuple(SYMBOLS)
+
+# Convert from what One Call sends to each display system
+CONVERSIONS = {
+    "imperial": {
+        "temperature": lambda fahrenheit: fahrenheit,
+        "speed": lambda mph: mph,
+        # Hectopascals to inches of mercury
+        "pressure": lambda hpa: round(hpa / 33.86, 2),
+        # Meters to miles
+        "distance": lambda meters: round(meters * 0.00062137, 1)
+    },
+    "metric": {
+        "temperature": lambda fahrenheit: round((fahrenheit - 32) * 5 / 9, 2),
+        "speed": lambda mph: round(mph * 1.609344, 2),
+        "pressure": lambda hpa: hpa,
+        "distance": lambda meters: round(meters / 1000, 1)
+    }
+}
+
+# One Call fields and the quantity each one measures
+FIELDS = {
+    "temp": "temperature",
+    "feels_like": "temperature",
+    "wind_speed": "speed",
+    "pressure": "pressure",
+    "visibility": "distance"
+}
+
+# Key marking weather data already in display units
+UNITS_KEY = "display_units"
+
+
+#----------------------------- CONVERT ----------------------------------------------#
+def convert(quantity, value, units):
+    """ One value from One Call units to display units """
+    return CONVERSIONS[units][quantity](value)
+
+
+def convert_series(quantity, values, units):
+    """ A column of values from One Call units to display units """
+    function = CONVERSIONS[units][quantity]
+    return [function(value) for value in values]
+
+
+def symbol(quantity, units):
+    """ Symbol of a quantity in a display system, °F, km/h """
+    return SYMBOLS[units][quantity]
+
+
+def _convert_items(items, units):
+    """
+        Copy a list of current, hourly or daily dictionaries
+        converting one field column at a time
+    """
+    items = [dict(item) for item in items]
+    if not items:
+        return items
+    for field, quantity in FIELDS.items():
+        if field not in items[0]:
+            continue
+        if not isinstance(items[0][field], dict):
+            for item, value in zip(items, convert_series(
+                    quantity, [item[field] for item in items], units)):
+                item[field] = value
+            continue
+        # Daily temperatures are dictionaries of min, max, day and so on
+        values = [dict(item[field]) for item in items]
+        for name in values[0]:
+            for value, converted in zip(values, convert_series(
+                    quantity, [value[name] for value in values], units)):
+                value[name] = converted
+        for item, value in zip(items, values):
+            item[field] = value
+    return items
+
+
+def to_units(weather_data, units):
+    """
+        Return a copy of One Call weather data in display units
+        The weather data passed in is not changed
+        Data this returned is already in its units and comes back as is,
+        callers that show it several times keep the copy, see
+        OneCall.display_data()
+    """
+    if weather_data.get(UNITS_KEY) == units:
+        return weather_data
+    if UNITS_KEY in weather_data:
+        raise ValueError("weather data is already converted, "
+                         "convert the One Call data instead")
+    converted = dict(weather_data)
+    converted[UNITS_KEY] = units
+    if "current" in weather_data:
+        converted["current"] = _convert_items([weather_data["current"]], units)[0]
+    for series in ("hourly", "daily"):
+        if series in weather_data:
+            converted[series] = _convert_items(weather_data[series], units)
+    return converted
@@ -31,8 +31,63 @@ GEOCODE_ENDPOINT = "https://api.openweathermap.org/geo/1.0/direct?q="
 
 OWM_AQI_ENDPOINT = "http://api.openweathermap.org/data/2.5/air_pollution?appid=" + API_KEY
 
+# Hourly air pollution for the next 4 days, and from a start to an end time
+OWM_AQI_FORECAST_ENDPOINT = "http://api.openweathermap.org/data/2.5/air_pollution/forecast?appid=" + API_KEY
+
+OWM_AQI_HISTORY_ENDPOINT = "http://api.openweathermap.org/data/2.5/air_pollution/history?appid=" + API_KEY
+
 NWS_ENDPOINT = "https://api.weather.gov/"
 
+ICON_URL = "http://openweathermap.org/img/wn/{icon_id}.png"
+
+# Size in degrees of the grid cells that share One Call and AQI requests
+# 0.02 degrees of latitude is about 2.2 km, 0 turns sharing off
+GRID_RESOLUTION = 0.02
+
+
+#----------------------- ONE CALL FIELDS ---------------------------------#
+# The One Call fields the program reads, used by json_projection
+# True keeps the whole value, a dictionary keeps only its keys
+# and a list of one dictionary keeps those keys for every item
+ONE_CALL_WEATHER_FIELDS = [{"main": True, "description": True, "icon": True}]
+ONE_CALL_FIELDS = {
+    "lat": True,
+    "lon": True,
+    "timezone_offset": True,
+    "current": {
+        "dt": True,
+        "sunrise": True,
+        "sunset": True,
+        "temp": True,
+        "feels_like": True,
+        "pressure": True,
+        "humidity": True,
+        "uvi": True,
+        "clouds": True,
+        "visibility": True,
+        "wind_speed": True,
+        "wind_deg": True,
+        "weather": ONE_CALL_WEATHER_FIELDS
+    },
+    "hourly": [{
+        "dt": True,
+        "temp": True,
+        "humidity": True,
+        "wind_speed": True,
+        # Chance of precipitation for the forecast charts
+        "pop": True,
+        "weather": ONE_CALL_WEATHER_FIELDS
+    }],
+    "daily": [{
+        "dt": True,
+        "temp": {"min": True, "max": True},
+        "wind_speed": True,
+        # Chance of precipitation for the forecast charts
+        "pop": True,
+        "weather": ONE_CALL_WEATHER_FIELDS
+    }]
+}
+
 
 #--------------------------- AQI TO STRING -----------------------------------#
 def aqi_to_string(aqi):
@@ -47,7 +102,7 @@ def aqi_to_string(aqi):
         aqi_string = "Unhealthy"
     elif aqi <= 300:
         aqi_string = "Very Unhealthy"
-    elif aqi > 301:
+    elif aqi > 300:
         aqi_string = "Hazardous"
     else:
         aqi_string = "None"